@@ -1,10 +1,17 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import plotly.express as px
-import requests
 from pyngrok import ngrok
-import time
+import rollups
+import columnar
+import db_pool
+import result_cache
+import geo
+import utils
+import figure_cache
+import queries
+import query_stats
+import growth
 
 # -------------------------------
 # NGROK SETUP
@@ -20,32 +27,68 @@ DB_PATH = "/content/project_files/phonepe_pulse.db"
 # -------------------------------
 # Cached DB Loader
 # -------------------------------
-@st.cache_data
-def load_data(query):
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+@st.cache_resource
+def get_pool():
+    # shared across reruns: one read-only connection per live script thread, closed with it
+    return db_pool.ConnectionPool(DB_PATH)
+
+@st.cache_resource
+def get_result_cache():
+    # keyed on (query, params, DB generation): an ingest invalidates it without a restart
+    return result_cache.ResultCache()
+
+def run_sql(conn, query, params):
+    query = rollups.route_query(query, rollups.available_rollups(conn))
+    return pd.read_sql_query(query, conn, params=params)
+
+def load_data(query, params=None):
+    # query is a name from the queries registry; params override its defaults
+    name, compute = query, None
+    if query in queries.QUERIES:
+        compute = queries.get(query).compute
+        query, params = queries.bind(query, params)
+    conn = get_pool().connection()
+    # computed queries keep their own per-generation state (growth.ENGINE), SQL goes through the result cache
+    run = (lambda: compute(conn, **params)) if compute else \
+        (lambda: get_result_cache().fetch(conn, query, params, run_sql))
+    # timed as the user sees it (cache hits included), slow ones logged with their plan
+    return query_stats.timed(conn, query_stats.label(name, query), query, params, run)
+
+# -------------------------------
+# Columnar Store (mapped once per store build)
+# -------------------------------
+def load_columnar_store():
+    # remapped when a rebuild swaps the store in; {} (SQL fallback) while it lags the DB generation
+    return columnar.open_store(columnar.COLUMNAR_DIR, result_cache.get_generation(get_pool().connection()))
+
+def state_totals(data_type, year, quarter):
+    """SUM(amount) by state for one quarter, from the columnar store when it has the table."""
+    spec = figure_cache.OVERVIEW[data_type]
+    store = load_columnar_store()
+    if spec["table"] in store:
+        df = store[spec["table"]].group_sum(["state"], ["amount"], {"year": year, "quarter": quarter})
+        return df.rename(columns={"amount": "total_amount"})
+    return load_data(spec["query"], {"year": year, "quarter": quarter})
+
+@st.cache_resource
+def get_figure_cache():
+    return figure_cache.FigureCache()
+
+def overview_figures(df, data_type, year, quarter):
+    """Cached choropleth + bar for the sidebar selection at the current DB generation."""
+    generation = result_cache.get_generation(get_pool().connection())
+    return get_figure_cache().get(data_type, year, quarter, generation,
+                                  lambda: figure_cache.build_overview_figures(df, data_type, india_geo))
 
 # -------------------------------
-# GeoJSON for India Map
+# GeoJSON for India Map (local, pre-simplified, loaded once per process)
 # -------------------------------
-geojson_url = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
-india_geo = requests.get(geojson_url).json()
+india_geo = geo.load_india_geojson("medium")
 
 # -------------------------------
 # Helper Functions
 # -------------------------------
-def normalize_state_names(df, column="state"):
-    df[column] = df[column].str.replace("-", " ").str.title()
-    mapping = {
-        "Andaman & Nicobar Islands": "Andaman & Nicobar",
-        "Nct Of Delhi": "Delhi",
-        "Jammu & Kashmir": "Jammu And Kashmir",
-        "Dadra & Nagar Havelli & Daman & Diu": "Dadra And Nagar Haveli And Daman And Diu"
-    }
-    df[column] = df[column].replace(mapping)
-    return df
+normalize_state_names = utils.normalize_state_names
 
 def add_download_button(df, label):
     csv = df.to_csv(index=False).encode('utf-8')
@@ -56,6 +99,132 @@ def add_download_button(df, label):
         mime="text/csv"
     )
 
+# -------------------------------
+# CASE STUDY TABS
+# -------------------------------
+def add_period(df):
+    df["period"] = df["year"].astype(str) + '-Q' + df["quarter"].astype(str)
+    return df
+
+# case -> {tab: {query, header, figure(df), optional params / prepare(df) / download label / growth series}}
+CASE_TABS = {
+    "Case Study 1": {
+        "Q1": {"query": "case1.Q1", "header": "Top 10 States by Transaction Amount",
+               "figure": lambda df: px.bar(df, x="state", y="total_amount", text_auto=".2s")},
+        "Q2": {"query": "case1.Q2", "header": "Yearly Transaction Trend",
+               "figure": lambda df: px.line(df, x="year", y="yearly_amount", markers=True)},
+        "Q3": {"query": "case1.Q3", "header": "Quarterly Growth — Karnataka",
+               "figure": lambda df: px.line(df, x="quarter", y="total_amount", color="year", markers=True)},
+        "Q4": {"query": "case1.Q4", "header": "Category Growth & Share by Year",
+               "figure": lambda df: px.bar(df, x="category", y="total_amount_cr", color="year", barmode="group")},
+        "Q5": {"query": "case1.Q5", "growth": "transaction.category", "header": "Emerging Categories ({start} → {end})",
+               "figure": lambda df: px.bar(df, x="category", y="growth_percent", color="growth_percent")},
+    },
+    "Case Study 2": {
+        "Q1": {"query": "case2.Q1", "header": "Top 10 Device Brands (All Years)",
+               "figure": lambda df: px.bar(df, x="brand", y="total_users", color="total_users")},
+        "Q2": {"query": "case2.Q2", "header": "Yearly App Opens Across India",
+               "figure": lambda df: px.line(df, x="year", y="total_app_opens", markers=True)},
+        "Q3": {"query": "case2.Q3", "header": "Device Market Share in Top State (Latest Valid Year)",
+               "figure": lambda df: px.pie(df, names="brand", values="market_share_percent")},
+        "Q4": {"query": "case2.Q4", "header": "Top 5 States by Registered Users (Latest Year)",
+               "figure": lambda df: px.bar(df, x="state", y="total_users", color="total_users")},
+        "Q5": {"query": "case2.Q5", "header": "Xiaomi Quarterly User Growth (All India)", "prepare": add_period,
+               "figure": lambda df: px.line(df, x="period", y="xiaomi_users", markers=True)},
+    },
+    "Case Study 3": {
+        "Q1": {"query": "case3.Q1", "header": "Top 10 States by Insurance Amount",
+               "figure": lambda df: px.bar(df, x="state", y="total_insurance_amount", text_auto=".2s")},
+        "Q2": {"query": "case3.Q2", "header": "Yearly Insurance Growth",
+               "figure": lambda df: px.line(df, x="year", y="yearly_insurance_amount", markers=True)},
+        "Q3": {"query": "app.insurance_quarterly_state", "header": "Quarterly Growth — Karnataka",
+               "figure": lambda df: px.line(df, x="quarter", y="quarterly_amount", color="year", markers=True)},
+        "Q4": {"query": "case3.Q1", "params": {"limit": 5}, "header": "Top 5 States by Total Insurance",
+               "figure": lambda df: px.bar(df, x="state", y="total_insurance_amount", text_auto=".2s")},
+        "Q5": {"query": "case3.Q5", "header": "Insurance Penetration by State",
+               "figure": lambda df: px.bar(df, x="state", y="penetration_percent", color="penetration_percent")},
+    },
+    "Case Study 4": {
+        "Q1": {"query": "case4.Q1", "header": "Top 10 States by Registered Users",
+               "figure": lambda df: px.bar(df, x="state", y="total_users", text_auto=".2s")},
+        "Q2": {"query": "case4.Q2", "header": "Yearly User Growth",
+               "figure": lambda df: px.line(df, x="year", y="yearly_users", markers=True)},
+        "Q3": {"query": "app.app_opens_quarterly_state", "header": "App Opens — Karnataka",
+               "figure": lambda df: px.line(df, x="quarter", y="total_app_opens", color="year")},
+        "Q4": {"query": "case4.Q4", "header": "Top 10 Districts by Registered Users (Latest Year)",
+               "figure": lambda df: px.bar(df, x="district", y="total_users", text_auto=".2s")},
+        "Q5": {"query": "case4.Q5", "header": "Engagement Ratio by State (Latest Year)",
+               "figure": lambda df: px.bar(df, x="state", y="engagement_ratio", color="engagement_ratio")},
+    },
+    "Case Study 5": {
+        "Q1": {"query": "case5.Q1", "header": "Top 10 States by Transaction Value (Latest Year)", "download": "Top_States",
+               "figure": lambda df: px.bar(df, x="state", y="total_amount", text_auto=".2s", color="total_amount")},
+        "Q2": {"query": "case5.Q2", "header": "Top 10 Districts by Transaction Value", "download": "Top_Districts",
+               "figure": lambda df: px.bar(df, x="district", y="total_amount", text_auto=".2s", color="total_amount")},
+        "Q3": {"query": "case5.Q3", "growth": "transaction.state",
+               "header": "Fastest-Growing States by Transaction Value ({start} → {end})",
+               "download": "State_Growth_{start}_{end}",
+               "figure": lambda df: px.bar(df, x="state", y="growth_percent", color="growth_percent",
+                                           text_auto=".2f", title="Top 10 Fastest-Growing States (%)")},
+        "Q4": {"query": "case5.Q4", "header": "Yearly Transaction Growth Across India", "download": "Yearly_Transaction_Growth",
+               "figure": lambda df: px.line(df, x="year", y="yearly_amount", markers=True)},
+        "Q5": {"query": "case5.Q5", "header": "Top 10 States by National Contribution Share", "download": "State_Contribution_Share",
+               "figure": lambda df: px.bar(df, x="state", y="contribution_percent", color="contribution_percent",
+                                           text_auto=".2f", title="State Contribution to National Total (%)")},
+    },
+}
+
+def period_label(period):
+    return f"{period[0]}-Q{period[1]}" if isinstance(period, tuple) else str(period)
+
+def growth_window(case, tab):
+    """From / To pickers over the periods growth.ENGINE has for the tab's series -> (params, labels)."""
+    spec = CASE_TABS[case][tab]
+    defaults = queries.get(spec["query"]).defaults
+    level = st.radio("Compare", ["Years", "Quarters"], horizontal=True, key=f"growth_level:{case}:{tab}")
+    periods = growth.ENGINE.periods(get_pool().connection(), spec["growth"], "year" if level == "Years" else "quarter")
+    if not periods:
+        return {}, {"start": defaults["start_year"], "end": defaults["end_year"]}
+    labels = [period_label(p) for p in periods]
+    start_default = str(defaults["start_year"]) if level == "Years" else f"{defaults['start_year']}-Q4"
+    end_default = str(defaults["end_year"]) if level == "Years" else f"{defaults['end_year']}-Q4"
+    col1, col2 = st.columns(2)
+    start = col1.selectbox("From", labels, key=f"growth_start:{case}:{tab}:{level}",
+                           index=labels.index(start_default) if start_default in labels else max(len(labels) - 2, 0))
+    end = col2.selectbox("To", labels, key=f"growth_end:{case}:{tab}:{level}",
+                         index=labels.index(end_default) if end_default in labels else len(labels) - 1)
+    start, end = periods[labels.index(start)], periods[labels.index(end)]
+    if level == "Years":
+        params = {"start_year": start, "end_year": end}
+    else:
+        params = {"start_year": start[0], "start_quarter": start[1], "end_year": end[0], "end_quarter": end[1]}
+    return params, {"start": period_label(start), "end": period_label(end)}
+
+def tab_result(case, tab, params=None):
+    """(df, fig) for one tab, computed the first time it is shown and kept in session_state per DB generation."""
+    spec = CASE_TABS[case][tab]
+    params = params if params is not None else spec.get("params")
+    key = f"tab_result:{case}:{tab}"
+    generation = result_cache.get_generation(get_pool().connection())
+    cached = st.session_state.get(key)
+    if cached is None or cached[:2] != (generation, result_cache.params_key(params)):
+        df = load_data(spec["query"], params)
+        if "prepare" in spec:
+            df = spec["prepare"](df)
+        cached = (generation, result_cache.params_key(params), df, spec["figure"](df))
+        st.session_state[key] = cached
+    return cached[2], cached[3]
+
+def render_tab(case, tab):
+    spec = CASE_TABS[case][tab]
+    # growth tabs pick their window; every other pair is already cached for this generation
+    params, labels = growth_window(case, tab) if "growth" in spec else (None, {})
+    df, fig = tab_result(case, tab, params)
+    st.header(spec["header"].format(**labels))
+    st.plotly_chart(fig)
+    if "download" in spec:
+        add_download_button(df, spec["download"].format(**labels))
+
 # -------------------------------
 # PAGE CONFIG + STYLING
 # -------------------------------
@@ -91,6 +260,13 @@ h1 { font-size: 28px !important; color: #111827; margin-bottom: 0.5em; }
 # -------------------------------
 st.sidebar.title("📈 Dashboard Navigation")
 page = st.sidebar.radio("Select Section", ["Overview", "Case Studies"])
+with st.sidebar.expander("Result cache"):
+    st.json(get_result_cache().stats())
+with st.sidebar.expander("Query stats"):
+    # seconds per load_data call since the server started; rows/bytes are totals
+    summary = query_stats.STATS.summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary).T.sort_values("p95", ascending=False))
 
 # -------------------------------
 # OVERVIEW PAGE
@@ -101,26 +277,18 @@ if page == "Overview":
     st.markdown("---")
 
     data_type = st.sidebar.radio("Data Type", ["Transactions", "Insurance"])
-    year = st.sidebar.selectbox("Year", [2018, 2019, 2020, 2021, 2022, 2023, 2024])
-    quarter = st.sidebar.selectbox("Quarter", [1, 2, 3, 4])
+    year = st.sidebar.selectbox("Year", figure_cache.YEARS)
+    quarter = st.sidebar.selectbox("Quarter", figure_cache.QUARTERS)
 
     if data_type == "Transactions":
-        query = f'''SELECT state, SUM(amount) as total_amount
-FROM aggregated_transaction
-WHERE year = {year} AND quarter = {quarter}
-GROUP BY state
-ORDER BY total_amount DESC;'''
-        df = load_data(query)
+        df = state_totals(data_type, year, quarter)
         st.subheader(f"Transactions Overview — {year} Q{quarter}")
 
         if not df.empty:
             df = normalize_state_names(df)
+            fig_map, fig_bar = overview_figures(df, data_type, year, quarter)
             col1, col2 = st.columns([2, 1])
             with col1:
-                fig_map = px.choropleth(df, geojson=india_geo, featureidkey="properties.ST_NM",
-                                        locations="state", color="total_amount",
-                                        color_continuous_scale="blues", title="State-wise Transaction Values")
-                fig_map.update_geos(fitbounds="locations", visible=False)
                 st.plotly_chart(fig_map, use_container_width=True)
             with col2:
                 st.markdown("<div class='metric-dark'>", unsafe_allow_html=True)
@@ -128,28 +296,18 @@ ORDER BY total_amount DESC;'''
                 st.markdown(f"<h4>Total Value (₹)</h4><h2>{df['total_amount'].sum():,.0f}</h2>", unsafe_allow_html=True)
                 st.markdown("</div>", unsafe_allow_html=True)
             st.markdown("---")
-            fig_bar = px.bar(df, x="state", y="total_amount", text_auto=".2s", color="total_amount",
-                             title="Transaction Value by State")
             st.plotly_chart(fig_bar, use_container_width=True)
             add_download_button(df, "Transaction_Data")
 
     else:
-        query = f'''SELECT state, SUM(amount) as total_amount
-FROM aggregated_insurance
-WHERE year = {year} AND quarter = {quarter}
-GROUP BY state
-ORDER BY total_amount DESC;'''
-        df = load_data(query)
+        df = state_totals(data_type, year, quarter)
         st.subheader(f"Insurance Overview — {year} Q{quarter}")
 
         if not df.empty:
             df = normalize_state_names(df)
+            fig_map, fig_bar = overview_figures(df, data_type, year, quarter)
             col1, col2 = st.columns([2, 1])
             with col1:
-                fig_map = px.choropleth(df, geojson=india_geo, featureidkey="properties.ST_NM",
-                                        locations="state", color="total_amount",
-                                        color_continuous_scale="greens", title="State-wise Insurance Distribution")
-                fig_map.update_geos(fitbounds="locations", visible=False)
                 st.plotly_chart(fig_map, use_container_width=True)
             with col2:
                 st.markdown("<div class='metric-dark'>", unsafe_allow_html=True)
@@ -157,8 +315,6 @@ ORDER BY total_amount DESC;'''
                 st.markdown(f"<h4>Total Value (₹)</h4><h2>{df['total_amount'].sum():,.0f}</h2>", unsafe_allow_html=True)
                 st.markdown("</div>", unsafe_allow_html=True)
             st.markdown("---")
-            fig_bar = px.bar(df, x="state", y="total_amount", text_auto=".2s", color="total_amount",
-                             title="Insurance Amount by State")
             st.plotly_chart(fig_bar, use_container_width=True)
             add_download_button(df, "Insurance_Data")
 
@@ -181,265 +337,15 @@ elif page == "Case Studies":
         ]
     )
 
-    # -----------------------------------------------------
-    # ✅ CASE STUDY 1 — Transaction Dynamics (Updated Q4, Q5)
-    # -----------------------------------------------------
-    if "Case Study 1" in case_selected:
-        st.subheader("Case Study 1 — Transaction Dynamics")
-        tabs = st.tabs(["Q1", "Q2", "Q3", "Q4", "Q5"])
-
-        # Q1
-        with tabs[0]:
-            df = load_data("SELECT state, SUM(amount) AS total_amount FROM aggregated_transaction GROUP BY state ORDER BY total_amount DESC LIMIT 10;")
-            st.header("Top 10 States by Transaction Amount")
-            fig = px.bar(df, x="state", y="total_amount", text_auto=".2s")
-            st.plotly_chart(fig)
-
-        # Q2
-        with tabs[1]:
-            df = load_data("SELECT year, SUM(amount) AS yearly_amount FROM aggregated_transaction GROUP BY year;")
-            st.header("Yearly Transaction Trend")
-            fig = px.line(df, x="year", y="yearly_amount", markers=True)
-            st.plotly_chart(fig)
-
-        # Q3
-        with tabs[2]:
-            df = load_data("SELECT state, year, quarter, SUM(amount) AS total_amount FROM aggregated_transaction WHERE state='karnataka' GROUP BY state, year, quarter;")
-            st.header("Quarterly Growth — Karnataka")
-            fig = px.line(df, x="quarter", y="total_amount", color="year", markers=True)
-            st.plotly_chart(fig)
-
-        # Q4
-        with tabs[3]:
-            df = load_data("""SELECT category, year,
-                   ROUND(SUM(amount)/10000000, 2) AS total_amount_cr,
-                   ROUND(SUM(amount)*100.0/SUM(SUM(amount)) OVER(PARTITION BY year),2) AS category_share_percent
-            FROM aggregated_transaction
-            GROUP BY category, year
-            ORDER BY year, total_amount_cr DESC;""")
-            st.header("Category Growth & Share by Year")
-            fig = px.bar(df, x="category", y="total_amount_cr", color="year", barmode="group")
-            st.plotly_chart(fig)
-
-        # Q5
-        with tabs[4]:
-            df = load_data("""WITH yearly_data AS (
-                SELECT category, year, SUM(amount) AS total_amount
-                FROM aggregated_transaction
-                WHERE year IN (2022,2023)
-                GROUP BY category, year
-            ),
-            pivoted AS (
-                SELECT category,
-                       SUM(CASE WHEN year=2022 THEN total_amount ELSE 0 END) AS amt_2022,
-                       SUM(CASE WHEN year=2023 THEN total_amount ELSE 0 END) AS amt_2023
-                FROM yearly_data GROUP BY category
-            )
-            SELECT category,
-                   ROUND(amt_2022/10000000,2) AS amount_2022_cr,
-                   ROUND(amt_2023/10000000,2) AS amount_2023_cr,
-                   ROUND(((amt_2023-amt_2022)*100.0/NULLIF(amt_2022,0)),2) AS growth_percent
-            FROM pivoted ORDER BY growth_percent DESC LIMIT 10;""")
-            st.header("Emerging Categories (2022 → 2023)")
-            fig = px.bar(df, x="category", y="growth_percent", color="growth_percent")
-            st.plotly_chart(fig)
-
-    # -----------------------------------------------------
-    # ✅ CASE STUDY 2 — Device Dominance (Updated Q3)
-    # -----------------------------------------------------
-    elif "Case Study 2" in case_selected:
-        st.subheader("Case Study 2 — Device Dominance & User Engagement")
-        tabs = st.tabs(["Q1", "Q2", "Q3", "Q4", "Q5"])
-
-        # Q1 — Top Device Brands
-        with tabs[0]:
-            df = load_data("SELECT brand, SUM(count) AS total_users FROM aggregated_user WHERE brand != 'TOTAL' GROUP BY brand ORDER BY total_users DESC LIMIT 10;")
-            st.header("Top 10 Device Brands (All Years)")
-            st.plotly_chart(px.bar(df, x="brand", y="total_users", color="total_users"))
-
-        # Q2 — Yearly App Opens
-        with tabs[1]:
-            df = load_data("SELECT year, SUM(percentage) AS total_app_opens FROM aggregated_user WHERE brand='TOTAL' GROUP BY year ORDER BY year;")
-            st.header("Yearly App Opens Across India")
-            st.plotly_chart(px.line(df, x="year", y="total_app_opens", markers=True))
-
-        # Q3 — Device Market Share (Updated)
-        with tabs[2]:
-            df = load_data("""WITH valid_year AS (
-                SELECT MAX(year) AS yr FROM aggregated_user WHERE brand != 'TOTAL'
-            ),
-            top_state AS (
-                SELECT state FROM aggregated_user WHERE brand='TOTAL'
-                GROUP BY state ORDER BY SUM(count) DESC LIMIT 1
-            )
-            SELECT au.state, au.brand, SUM(au.count) AS total_users,
-                   ROUND(SUM(au.count)*100.0 / SUM(SUM(au.count)) OVER(), 2) AS market_share_percent
-            FROM aggregated_user au
-            JOIN top_state ts ON au.state = ts.state
-            JOIN valid_year vy ON au.year = vy.yr
-            WHERE au.brand != 'TOTAL'
-            GROUP BY au.state, au.brand
-            ORDER BY total_users DESC;""")
-            st.header("Device Market Share in Top State (Latest Valid Year)")
-            st.plotly_chart(px.pie(df, names="brand", values="market_share_percent"))
-
-        # Q4 — Top States by Registered Users
-        with tabs[3]:
-            df = load_data("SELECT state, SUM(count) AS total_users FROM aggregated_user WHERE brand='TOTAL' AND year=(SELECT MAX(year) FROM aggregated_user) GROUP BY state ORDER BY total_users DESC LIMIT 5;")
-            st.header("Top 5 States by Registered Users (Latest Year)")
-            st.plotly_chart(px.bar(df, x="state", y="total_users", color="total_users"))
-
-        # Q5 — Xiaomi Quarterly Trend
-        with tabs[4]:
-            df = load_data("SELECT year, quarter, SUM(count) AS xiaomi_users FROM aggregated_user WHERE brand='Xiaomi' GROUP BY year, quarter ORDER BY year, quarter;")
-            df["period"] = df["year"].astype(str) + '-Q' + df["quarter"].astype(str)
-            st.header("Xiaomi Quarterly User Growth (All India)")
-            st.plotly_chart(px.line(df, x="period", y="xiaomi_users", markers=True))
-
-
-    # -----------------------------------------------------
-    # ✅ CASE STUDY 3 — Insurance Growth
-    # -----------------------------------------------------
-    elif "Case Study 3" in case_selected:
-        st.subheader("Case Study 3 — Insurance Growth & Penetration")
-        tabs = st.tabs(["Q1", "Q2", "Q3", "Q4", "Q5"])
-        with tabs[0]:
-            df = load_data("SELECT state, SUM(amount) AS total_insurance_amount FROM aggregated_insurance GROUP BY state ORDER BY total_insurance_amount DESC LIMIT 10;")
-            st.header("Top 10 States by Insurance Amount")
-            fig = px.bar(df, x="state", y="total_insurance_amount", text_auto=".2s")
-            st.plotly_chart(fig)
-        with tabs[1]:
-            df = load_data("SELECT year, SUM(amount) AS yearly_insurance_amount FROM aggregated_insurance GROUP BY year;")
-            st.header("Yearly Insurance Growth")
-            fig = px.line(df, x="year", y="yearly_insurance_amount", markers=True)
-            st.plotly_chart(fig)
-        with tabs[2]:
-            df = load_data("SELECT year, quarter, SUM(amount) AS quarterly_amount FROM aggregated_insurance WHERE state='karnataka' GROUP BY year, quarter;")
-            st.header("Quarterly Growth — Karnataka")
-            fig = px.line(df, x="quarter", y="quarterly_amount", color="year", markers=True)
-            st.plotly_chart(fig)
-        with tabs[3]:
-            df = load_data("SELECT state, SUM(amount) AS total_amount FROM aggregated_insurance GROUP BY state ORDER BY total_amount DESC LIMIT 5;")
-            st.header("Top 5 States by Total Insurance")
-            fig = px.bar(df, x="state", y="total_amount", text_auto=".2s")
-            st.plotly_chart(fig)
-        with tabs[4]:
-            df = load_data("""SELECT t.state, ROUND(SUM(i.amount)/SUM(t.amount)*100,2) AS penetration_percent
-            FROM aggregated_transaction t JOIN aggregated_insurance i ON t.state=i.state
-            GROUP BY t.state ORDER BY penetration_percent DESC LIMIT 10;""")
-            st.header("Insurance Penetration by State")
-            fig = px.bar(df, x="state", y="penetration_percent", color="penetration_percent")
-            st.plotly_chart(fig)
-
-    # -----------------------------------------------------
-    # ✅ CASE STUDY 4 — User Growth
-    # -----------------------------------------------------
-    elif "Case Study 4" in case_selected:
-        st.subheader("Case Study 4 — User Growth & Engagement")
-        tabs = st.tabs(["Q1", "Q2", "Q3", "Q4", "Q5"])
-        with tabs[0]:
-            df = load_data("SELECT state, SUM(count) AS total_users FROM aggregated_user WHERE brand='TOTAL' AND year=(SELECT MAX(year) FROM aggregated_user) GROUP BY state ORDER BY total_users DESC LIMIT 10;")
-            st.header("Top 10 States by Registered Users")
-            fig = px.bar(df, x="state", y="total_users", text_auto=".2s")
-            st.plotly_chart(fig)
-        with tabs[1]:
-            df = load_data("SELECT year, SUM(count) AS yearly_users FROM aggregated_user WHERE brand='TOTAL' GROUP BY year;")
-            st.header("Yearly User Growth")
-            fig = px.line(df, x="year", y="yearly_users", markers=True)
-            st.plotly_chart(fig)
-        with tabs[2]:
-            df = load_data("SELECT year, quarter, SUM(percentage) AS total_app_opens FROM aggregated_user WHERE brand='TOTAL' AND state='karnataka' GROUP BY year, quarter;")
-            st.header("App Opens — Karnataka")
-            fig = px.line(df, x="quarter", y="total_app_opens", color="year")
-  # -----------------------------------------------------
-    # ✅ CASE STUDY 5 — Geo-based Transaction Insights (Updated Q3)
-    # -----------------------------------------------------
-    elif "Case Study 5" in case_selected:
-        st.subheader("Case Study 5 — Geo-based Transaction Insights")
-        tabs = st.tabs(["Q1", "Q2", "Q3", "Q4", "Q5"])
-
-        # Q1 — Top States
-        with tabs[0]:
-            df = load_data("""SELECT state, SUM(amount) AS total_amount
-                               FROM aggregated_transaction
-                               WHERE year=(SELECT MAX(year) FROM aggregated_transaction)
-                               GROUP BY state
-                               ORDER BY total_amount DESC
-                               LIMIT 10;""")
-            st.header("Top 10 States by Transaction Value (Latest Year)")
-            fig = px.bar(df, x="state", y="total_amount", text_auto=".2s", color="total_amount")
-            st.plotly_chart(fig)
-            add_download_button(df, "Top_States")
-
-        # Q2 — Top Districts
-        with tabs[1]:
-            df = load_data("""SELECT entityName AS district, SUM(amount) AS total_amount
-                               FROM top_transaction
-                               WHERE level='districts'
-                               GROUP BY entityName
-                               ORDER BY total_amount DESC
-                               LIMIT 10;""")
-            st.header("Top 10 Districts by Transaction Value")
-            fig = px.bar(df, x="district", y="total_amount", text_auto=".2s", color="total_amount")
-            st.plotly_chart(fig)
-            add_download_button(df, "Top_Districts")
-
-        # Q3 — UPDATED: Fastest-Growing States (2022 → 2023)
-        with tabs[2]:
-            df = load_data("""WITH yearly_data AS (
-                                SELECT state, year, SUM(amount) AS total_amount
-                                FROM aggregated_transaction
-                                WHERE year IN (2022, 2023)
-                                GROUP BY state, year
-                             ),
-                             pivoted AS (
-                                SELECT state,
-                                       SUM(CASE WHEN year=2022 THEN total_amount ELSE 0 END) AS amt_2022,
-                                       SUM(CASE WHEN year=2023 THEN total_amount ELSE 0 END) AS amt_2023
-                                FROM yearly_data GROUP BY state
-                             )
-                             SELECT state,
-                                    ROUND(amt_2022/10000000,2) AS amount_2022_cr,
-                                    ROUND(amt_2023/10000000,2) AS amount_2023_cr,
-                                    ROUND(((amt_2023-amt_2022)*100.0/NULLIF(amt_2022,0)),2) AS growth_percent
-                             FROM pivoted
-                             ORDER BY growth_percent DESC
-                             LIMIT 10;""")
-            st.header("Fastest-Growing States by Transaction Value (2022 → 2023)")
-            fig = px.bar(df, x="state", y="growth_percent", color="growth_percent",
-                         text_auto=".2f", title="Top 10 Fastest-Growing States (%)")
-            st.plotly_chart(fig)
-            add_download_button(df, "State_Growth_2022_2023")
-
-        # Q4 — Yearly Transaction Growth
-        with tabs[3]:
-            df = load_data("""SELECT year, SUM(amount) AS yearly_amount
-                               FROM aggregated_transaction
-                               GROUP BY year
-                               ORDER BY year;""")
-            st.header("Yearly Transaction Growth Across India")
-            fig = px.line(df, x="year", y="yearly_amount", markers=True)
-            st.plotly_chart(fig)
-            add_download_button(df, "Yearly_Transaction_Growth")
-
-        # Q5 — State Contribution Share (Latest Year)
-        with tabs[4]:
-            df = load_data("""WITH total AS (
-                                SELECT SUM(amount) AS national_total
-                                FROM aggregated_transaction
-                                WHERE year=(SELECT MAX(year) FROM aggregated_transaction)
-                             )
-                             SELECT state,
-                                    SUM(amount) AS state_total,
-                                    ROUND(SUM(amount)*100.0/(SELECT national_total FROM total),2) AS contribution_percent
-                             FROM aggregated_transaction
-                             WHERE year=(SELECT MAX(year) FROM aggregated_transaction)
-                             GROUP BY state
-                             ORDER BY state_total DESC
-                             LIMIT 10;""")
-            st.header("Top 10 States by National Contribution Share")
-            fig = px.bar(df, x="state", y="contribution_percent", color="contribution_percent",
-                         text_auto=".2f", title="State Contribution to National Total (%)")
-            st.plotly_chart(fig)
-            add_download_button(df, "State_Contribution_Share")
+    case = case_selected.split(":")[0]
+    st.subheader(case_selected.replace(":", " —"))
+    tab_names = list(CASE_TABS[case])
 
+    if st.sidebar.checkbox("Lazy tabs", value=True, help="Only run the query of the question being viewed"):
+        # st.tabs runs every tab body on each rerun; a radio renders just the selected question
+        tab = st.radio("Question", tab_names, horizontal=True, key=f"tab:{case}")
+        render_tab(case, tab)
+    else:
+        for tab, container in zip(tab_names, st.tabs(tab_names)):
+            with container:
+                render_tab(case, tab)
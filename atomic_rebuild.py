@@ -0,0 +1,204 @@
+"""
+Blue-green rebuild of the dashboard DB
+--------------------------------------
+The live DB path (phonepe_pulse.db) is a symlink to one build file under
+BUILDS_DIR. A rebuild:
+1. Builds a fresh side file, continuing the live ingest count: a full ingest, or a
+   copy of the live build that is refreshed incrementally or has just the selected
+   tables rebuilt (so the other tables carry over)
+2. Validates it: required tables present and non-empty, no table shrunk by more
+   than MAX_SHRINK against the live build, every registered index, quick_check
+3. Writes the columnar store from the validated build (swapped in whole; readers
+   ignore it until the DB generation matches)
+4. Atomically repoints the symlink (rename over it), so readers see either the
+   old or the new build, never a half-loaded one
+5. Prebuilds the Overview figures for the new live build (optional)
+db_pool connections notice the new target on their next query and reopen on it.
+Older builds beyond KEEP_BUILDS are removed (open readers keep their inode).
+
+Usage: python atomic_rebuild.py [--refresh] [--columnar] [--prebuild-figures] [--profile] [--max-memory-mb N]
+"""
+
+import os, sys, time, fcntl, sqlite3, tempfile
+import ingest, schema, columnar, result_cache, bulk_loader
+
+DB_PATH = "/content/project_files/phonepe_pulse.db"
+BUILDS_DIR = "/content/project_files/builds"
+KEEP_BUILDS = 2          # the live build plus one to fall back to
+MAX_SHRINK = 0.10        # a table losing more than 10% of its rows fails validation
+
+
+# -------------------------------
+# Build Files
+# -------------------------------
+def live_build(db_path=DB_PATH):
+    """The build file readers currently see, or None before the first build."""
+    return os.path.realpath(db_path) if os.path.exists(db_path) else None
+
+def new_build_path(db_path=DB_PATH, builds_dir=BUILDS_DIR):
+    """A new, empty and never-used build file (SQLite treats an empty file as an empty DB)."""
+    os.makedirs(builds_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    prefix = f"{stem}.{time.strftime('%Y%m%d_%H%M%S')}."
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".db", dir=builds_dir)
+    os.close(fd)
+    return path
+
+def _remove_build(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def prepare_build(build_path, live=None, copy=False):
+    """
+    Create the side file: a copy of the live build (refresh / partial rebuild), else an empty
+    DB continuing its ingest count. Returns the copied generation (None for an empty side file).
+    """
+    conn = sqlite3.connect(build_path)
+    generation = None
+    if live:
+        source = sqlite3.connect(f"file:{live}?mode=ro", uri=True)
+        if copy:
+            source.backup(conn)
+            generation = result_cache.get_generation(conn)
+        else:
+            # keep counting ingests across builds (the build token itself is new for every build)
+            conn.execute(f"PRAGMA user_version = {result_cache.ingest_count(source)}")
+        source.close()
+    conn.close()
+    return generation
+
+
+# -------------------------------
+# Validation
+# -------------------------------
+def table_counts(path, tables=None):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    counts = {}
+    for table in tables or schema.TABLES:
+        if schema.object_type(conn, table):
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return counts
+
+def validate(build_path, live=None, tables=None, max_shrink=MAX_SHRINK):
+    """Return the list of problems with build_path (empty when it may go live)."""
+    tables = list(tables or schema.TABLES)
+    problems = []
+    counts = table_counts(build_path, tables)
+    for table in tables:
+        if not counts.get(table):
+            problems.append(f"{table}: missing or empty")
+    if live:
+        for table, before in table_counts(live, tables).items():
+            after = counts.get(table, 0)
+            if after and after < before * (1 - max_shrink):
+                problems.append(f"{table}: {before} -> {after} rows")
+
+    conn = sqlite3.connect(f"file:{build_path}?mode=ro", uri=True)
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for table in tables:
+        problems += [f"{table}: index {name} missing" for name, *_ in schema.index_specs(table)
+                     if name not in indexes and counts.get(table)]
+    check = conn.execute("PRAGMA quick_check").fetchone()[0]
+    if check != "ok":
+        problems.append(f"quick_check: {check}")
+    conn.close()
+    return problems
+
+
+# -------------------------------
+# Swap
+# -------------------------------
+def swap(db_path, build_path):
+    """Atomically point db_path at build_path (rename of a fresh symlink over the old one or a plain file)."""
+    link = f"{db_path}.swap.{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.relpath(build_path, os.path.dirname(os.path.abspath(db_path))), link)
+    os.replace(link, db_path)
+
+def prune_builds(db_path=DB_PATH, builds_dir=BUILDS_DIR, keep=KEEP_BUILDS):
+    """Delete all but the newest `keep` builds, never the live one."""
+    live = live_build(db_path)
+    builds = sorted((os.path.join(builds_dir, f) for f in os.listdir(builds_dir) if f.endswith(".db")),
+                    key=os.path.getmtime, reverse=True)
+    for path in builds[keep:]:
+        if path != live:
+            _remove_build(path)
+
+def manifest_digest(path):
+    """{table: frozenset of (file, sha1)} from a build's ingest manifest."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    digest = {}
+    if schema.object_type(conn, ingest.MANIFEST_TABLE):
+        for table, file, sha1 in conn.execute(f"SELECT table_name, path, sha1 FROM {ingest.MANIFEST_TABLE}"):
+            digest.setdefault(table, set()).add((file, sha1))
+    conn.close()
+    return {table: frozenset(files) for table, files in digest.items()}
+
+def rebuild(db_path=DB_PATH, base_path=ingest.BASE_PATH, incremental=False, tables=None, workers=None,
+            columnar_dir=None, prebuild=False, profiler=None, builds_dir=BUILDS_DIR,
+            batch_size=bulk_loader.BATCH_SIZE, max_memory_mb=ingest.MAX_MEMORY_MB):
+    """
+    Build into a side file, validate it and swap it live. Returns a connection to
+    the new live build; raises RuntimeError (live DB untouched) if validation fails.
+    tables without incremental rebuilds just those tables on a copy of the live build.
+    batch_size / max_memory_mb are passed on to the ingest.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    with open(db_path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)   # one rebuild at a time
+        live = live_build(db_path)
+        copy = live is not None and (incremental or tables is not None)
+        build_path = new_build_path(db_path, builds_dir)
+        build = ingest.refresh_db if incremental and live else ingest.build_db
+        try:
+            base_generation = prepare_build(build_path, live, copy)
+            before = manifest_digest(build_path)
+            # figures are prebuilt after the swap: prebuilding prunes every other generation's figures,
+            # including the ones the live dashboard still serves if this build never goes live
+            conn = build(build_path, base_path, tables=tables, workers=workers, prebuild=False, profiler=profiler,
+                         side_file=True, batch_size=batch_size, max_memory_mb=max_memory_mb)
+            conn.close()
+        except BaseException:
+            _remove_build(build_path)
+            raise
+
+        # a first build of a few tables has nothing to carry the others over from
+        problems = validate(build_path, live, None if live else tables)
+        if problems:
+            _remove_build(build_path)
+            for problem in problems:
+                print("❌", problem)
+            raise RuntimeError(f"rebuild failed validation ({len(problems)} problems); {db_path} unchanged")
+
+        if columnar_dir:
+            # written before the swap: until then its generation is not the live one, so readers use SQL
+            after = manifest_digest(build_path)
+            changed = [t for t in after.keys() | before.keys() if after.get(t) != before.get(t)] if incremental \
+                else tables
+            conn = sqlite3.connect(build_path)
+            try:
+                columnar.write_store(conn, columnar_dir, changed, base_generation=base_generation)
+            except BaseException:
+                _remove_build(build_path)
+                raise
+            finally:
+                conn.close()
+        if live and not os.path.islink(db_path):
+            print(f"🔄 Replacing the plain DB file {db_path} by a symlink into {builds_dir}")
+        swap(db_path, build_path)
+        prune_builds(db_path, builds_dir)
+        print(f"✅ {db_path} -> {build_path}")
+    conn = sqlite3.connect(db_path)
+    if prebuild:
+        ingest.prebuild_figures(conn)
+    return conn
+
+if __name__ == "__main__":
+    options = {"incremental": "--refresh" in sys.argv,
+               "columnar_dir": columnar.COLUMNAR_DIR if "--columnar" in sys.argv else None,
+               "prebuild": "--prebuild-figures" in sys.argv}
+    conn = ingest.main(lambda **kw: rebuild(**options, **kw), sys.argv)
+    print("Tables in DB:", conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall())
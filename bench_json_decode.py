@@ -0,0 +1,75 @@
+"""
+Micro-benchmark: JSON decoding backends over a sample of the pulse tree
+-----------------------------------------------------------------------
+For every installed backend reports files/sec and MB/sec for decoding alone,
+plus how decoding compares with file reads and row extraction, so we can see
+what decoding costs inside total ingest time.
+
+Usage: python bench_json_decode.py [base_path] [--sample N] [--repeat R]
+"""
+
+import time, random, argparse
+import fast_json, ingest
+
+
+def sample_files(base_path, n, seed=0):
+    """Random sample of up to n (table, file) pairs across all nine datasets."""
+    entries = [(table, file) for table, file, *_ in ingest.scan_files(base_path)]
+    random.Random(seed).shuffle(entries)
+    return entries[:n]
+
+def run_benchmark(base_path=ingest.BASE_PATH, sample=2000, repeat=3):
+    files = sample_files(base_path, sample)
+    if not files:
+        print("⚠️ No pulse files found under", base_path)
+        return []
+
+    # file I/O, measured once (warm page cache after the first pass)
+    t0 = time.perf_counter()
+    blobs = []
+    for _ in range(repeat):
+        blobs = []
+        for _, file in files:
+            with open(file, "rb") as f:
+                blobs.append(f.read())
+    read_s = (time.perf_counter() - t0) / repeat
+    total_mb = sum(len(b) for b in blobs) / (1024 * 1024)
+
+    # row extraction, measured on stdlib-decoded objects
+    docs = [fast_json.get_decoder("json")[1](b) for b in blobs]
+    t0 = time.perf_counter()
+    for (table, file), data in zip(files, docs):
+        for _ in ingest.DATASETS[table]["parser"](data, *ingest.file_key(file)):
+            pass
+    rows_s = time.perf_counter() - t0
+
+    results = []
+    for name, decode in fast_json.available_backends().items():
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for b in blobs:
+                decode(b)
+        decode_s = (time.perf_counter() - t0) / repeat
+        results.append({
+            "backend": name,
+            "files": len(blobs),
+            "mb": round(total_mb, 2),
+            "decode_seconds": round(decode_s, 4),
+            "files_per_sec": round(len(blobs) / decode_s, 1),
+            "mb_per_sec": round(total_mb / decode_s, 1),
+            "decode_share_percent": round(decode_s * 100 / (read_s + decode_s + rows_s), 1),
+        })
+
+    print(f"📊 {len(blobs)} files, {total_mb:.2f} MB | read {read_s:.3f}s | rows {rows_s:.3f}s")
+    for r in results:
+        print(f"  {r['backend']:<9} {r['files_per_sec']:>10} files/s {r['mb_per_sec']:>8} MB/s "
+              f"decode {r['decode_seconds']}s ({r['decode_share_percent']}% of read+decode+rows)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base_path", nargs="?", default=ingest.BASE_PATH)
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.base_path, args.sample, args.repeat)
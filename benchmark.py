@@ -0,0 +1,173 @@
+"""
+End-to-end benchmark: extractors, case-study queries and the dashboard query set
+--------------------------------------------------------------------------------
+Builds a fresh DB from a pulse tree (a synthetic one from synthetic_pulse.py by
+default), timing every extract_* script, then times each caseN query, the whole
+run_all_cases batch and the queries the dashboard issues. Computed queries (the
+top-k and growth engines) are timed cold, engines reset before every run, and
+warm as "<name>.warm". Results are written as JSON; `compare` diffs two result
+files and flags regressions.
+
+Usage: python benchmark.py run --out results.json [--data DIR] [--workers N] [scale options]
+       python benchmark.py compare old.json new.json [--threshold 0.10]
+"""
+
+import os, sys, json, time, shutil, sqlite3, tempfile, platform, argparse, statistics, importlib
+import ingest, schema, queries, utils, db_pool, fast_json, figure_cache, synthetic_pulse, run_all_cases, growth, topk
+
+REPEAT = 3
+MIN_SECONDS = 0.001   # timings below this are noise, never flagged in compare
+
+
+def _median_time(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def reset_engines():
+    """Drop the in-memory top-k cubes and growth tables so the next computed query rebuilds them."""
+    topk.ENGINE.reset()
+    growth.ENGINE.reset()
+
+
+# -------------------------------
+# Benchmark Run
+# -------------------------------
+def bench_extractors(base_path, db_path, workers=None):
+    """Run every extract_<table>.parse_<table> into a fresh DB; {table: seconds/rows/rows_per_sec}."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    db_pool.enable_wal(conn)
+    out = {}
+    for table in ingest.DATASETS:
+        module = importlib.import_module(f"extract_{table}")
+        start = time.perf_counter()
+        getattr(module, f"parse_{table}")(base_path, conn, workers=workers)
+        seconds = time.perf_counter() - start
+        rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if schema.object_type(conn, table) else 0
+        out[table] = {"seconds": seconds, "rows": rows, "rows_per_sec": rows / seconds if seconds else 0}
+    conn.close()
+    return out
+
+def bench_case_queries(db_path, repeat=REPEAT):
+    """
+    Median wall time of each registered caseN.Qk query on a pooled read-only connection.
+    Computed queries are timed cold (engines reset before each run, so building the cubes /
+    growth tables counts) and warm, as "<name>.warm", once the engine holds the DB.
+    """
+    conn = db_pool.connect_read_only(db_path)
+    names = [n for n in queries.QUERIES if n.startswith("case")]
+    out = {}
+    for name in names:
+        run_one = lambda: utils.run_query(conn, name)
+        if queries.get(name).compute:
+            out[name] = _median_time(run_one, repeat, setup=reset_engines)
+            out[f"{name}.warm"] = _median_time(run_one, repeat)
+        else:
+            out[name] = _median_time(run_one, repeat)
+    conn.close()
+    return out
+
+def bench_dashboard(db_path, repeat=REPEAT):
+    """Every Overview (data type, year, quarter) query plus the other dashboard-only queries."""
+    conn = db_pool.connect_read_only(db_path)
+    calls = [(spec["query"], {"year": y, "quarter": q})
+             for spec in figure_cache.OVERVIEW.values() for y in figure_cache.YEARS for q in figure_cache.QUARTERS]
+    calls += [(n, None) for n in queries.QUERIES if n.startswith("app.")]
+    out = {}
+    for name, params in calls:
+        seconds = _median_time(lambda: utils.run_query(conn, name, params=params), repeat)
+        out[name] = out.get(name, 0) + seconds
+    out["total"] = sum(out.values())
+    conn.close()
+    return out
+
+def run(out_path, base_path=None, db_path=None, workers=None, repeat=REPEAT, scale=None):
+    scale = {**synthetic_pulse.DEFAULT_SCALE, "seed": 0, **(scale or {})}
+    tmp = tempfile.mkdtemp(prefix="pulse_bench_")
+    if base_path is None:
+        base_path = os.path.join(tmp, "data")
+        synthetic_pulse.generate(base_path, **scale)
+    db_path = db_path or os.path.join(tmp, "bench.db")
+
+    result = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                       "sqlite": sqlite3.sqlite_version, "json_backend": fast_json.BACKEND,
+                       "cpus": os.cpu_count(), "workers": workers, "repeat": repeat,
+                       "data": "synthetic" if base_path.startswith(tmp) else base_path,
+                       "scale": scale if base_path.startswith(tmp) else None}}
+    result["extract"] = bench_extractors(base_path, db_path, workers)
+    result["queries"] = bench_case_queries(db_path, repeat)
+    result["dashboard"] = bench_dashboard(db_path, repeat)
+    reset_engines()   # the batch pays for its engines like a freshly started dashboard
+    start = time.perf_counter()
+    run_all_cases.run_all_cases(db_path, verbose=False)
+    result["batch"] = {"run_all_cases": time.perf_counter() - start}
+
+    db_pool.get_pool(db_path).close_all()
+    shutil.rmtree(tmp, ignore_errors=True)   # generated tree and default DB
+
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+    extract_total = sum(e["seconds"] for e in result["extract"].values())
+    cold = sum(v for k, v in result["queries"].items() if not k.endswith(".warm"))
+    print(f"✅ extract {extract_total:.2f}s | case queries {cold:.3f}s | "
+          f"dashboard {result['dashboard']['total']:.3f}s | batch {result['batch']['run_all_cases']:.3f}s")
+    print("📊 Results written to", out_path)
+    return result
+
+
+# -------------------------------
+# Comparison
+# -------------------------------
+def timings(result):
+    """Flatten a result file to {"extract.<table>": s, "queries.<name>": s, ...}."""
+    flat = {f"extract.{t}": e["seconds"] for t, e in result.get("extract", {}).items()}
+    for section in ("queries", "dashboard", "batch"):
+        flat.update({f"{section}.{k}": v for k, v in result.get(section, {}).items()})
+    return flat
+
+def compare(old, new, threshold=0.10, verbose=True):
+    """Return {metric: (old_s, new_s, ratio)} for metrics more than threshold slower in new."""
+    old_t, new_t = timings(old), timings(new)
+    regressions = {}
+    for metric in sorted(old_t.keys() & new_t.keys()):
+        before, after = old_t[metric], new_t[metric]
+        ratio = after / before if before else float("inf")
+        slower = ratio > 1 + threshold and max(before, after) >= MIN_SECONDS
+        if slower:
+            regressions[metric] = (before, after, ratio)
+        if verbose:
+            mark = "⚠️" if slower else ("✅" if ratio < 1 - threshold else "  ")
+            print(f"{mark} {metric:<45} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  ({ratio:5.2f}x)")
+    if verbose:
+        print(f"{'❌' if regressions else '✅'} {len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--out", default="benchmark.json")
+    p_run.add_argument("--data", default=None, help="existing pulse data dir (default: generate one)")
+    p_run.add_argument("--db", default=None)
+    p_run.add_argument("--workers", type=int, default=None)
+    p_run.add_argument("--repeat", type=int, default=REPEAT)
+    synthetic_pulse.add_scale_arguments(p_run)
+    p_cmp = sub.add_parser("compare")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        scale = {k: getattr(args, k) for k in list(synthetic_pulse.DEFAULT_SCALE) + ["seed"]}
+        run(args.out, args.data, args.db, args.workers, args.repeat, scale)
+    else:
+        with open(args.old) as f_old, open(args.new) as f_new:
+            sys.exit(1 if compare(json.load(f_old), json.load(f_new), args.threshold) else 0)
@@ -0,0 +1,180 @@
+"""
+Bulk loader for the typed pulse tables
+--------------------------------------
+1. TableWriter: one buffered writer per table, large executemany batches into
+   the typed (schema.TABLES) storage tables, all inside one transaction
+2. bulk_session(): enlarges the page cache while a build runs and, for a side
+   file nobody reads yet, relaxes journal_mode / synchronous, then restores WAL;
+   analyze() refreshes the planner statistics once the indexes exist
+3. write_dataframe(): typed executemany replacement for DataFrame.to_sql
+Every load reports rows/sec so the paths can be compared.
+"""
+
+import sys, json, math, time, sqlite3
+from contextlib import contextmanager
+import schema, db_pool
+
+BATCH_SIZE = 50_000
+BULK_CACHE_KB = 512 * 1024      # page cache while loading (the read side uses db_pool.CACHE_SIZE_KB)
+
+
+# -------------------------------
+# Build-time PRAGMAs
+# -------------------------------
+def relax(conn, journal=True):
+    """
+    Loosen durability for a bulk load; returns the settings to restore.
+    journal=False keeps the journal mode and synchronous, so a load into a DB the dashboard
+    is serving stays crash-safe; only the cache and temp store are enlarged.
+    """
+    previous = {"synchronous": conn.execute("PRAGMA synchronous").fetchone()[0],
+                "cache_size": conn.execute("PRAGMA cache_size").fetchone()[0],
+                "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0]}
+    conn.execute(f"PRAGMA cache_size = -{BULK_CACHE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if journal:
+        conn.execute("PRAGMA synchronous = OFF")
+        try:
+            # rollback journal kept in memory: no journal file writes, but a failed load still rolls back
+            conn.execute("PRAGMA journal_mode = MEMORY")
+        except sqlite3.OperationalError as e:
+            print("⚠️ Keeping journal mode, another connection holds the DB:", e)
+    return previous
+
+def restore(conn, previous):
+    if conn.in_transaction:
+        conn.rollback()   # only reached when the load failed before its commit
+    if previous["journal_mode"].lower() == "wal":
+        db_pool.enable_wal(conn)
+    else:
+        conn.execute(f"PRAGMA journal_mode = {previous['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {previous['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {previous['cache_size']}")
+
+def analyze(conn, tables=None):
+    """Refresh the planner statistics for the loaded tables (default: the whole DB)."""
+    if tables is None:
+        conn.execute("ANALYZE")
+        return
+    for table in tables:
+        if schema.object_type(conn, schema.storage_table(table)) == "table":
+            conn.execute(f"ANALYZE {schema.storage_table(table)}")
+
+@contextmanager
+def bulk_session(conn, journal=True):
+    """Relaxed PRAGMAs for the duration of a load; the caller commits before leaving the block."""
+    previous = relax(conn, journal)
+    try:
+        yield conn
+    finally:
+        restore(conn, previous)
+
+
+# -------------------------------
+# Table Writer
+# -------------------------------
+def rate(rows, seconds):
+    return f"{rows / seconds:,.0f} rows/s" if seconds else "n/a"
+
+
+class TableWriter:
+    """
+    Single writer per table: buffers rows and flushes them with executemany.
+    A flush happens every `batch_size` rows or once the buffer reaches
+    `max_buffer_bytes`, whichever comes first. The caller commits once at the end.
+    """
+
+    def __init__(self, conn, table, incremental=False, batch_size=BATCH_SIZE, max_buffer_bytes=None,
+                 encoder=None):
+        self.conn = conn
+        self.table = table
+        self.encoder = encoder or schema.DimensionEncoder(conn)
+        self.columns = schema.column_names(table)
+        self.incremental = incremental
+        self.batch_size = batch_size
+        self.max_buffer_bytes = max_buffer_bytes
+        self.buffer = []
+        self.created = False
+        self.rows_written = 0
+        self.seconds = 0.0      # time spent inside executemany
+        self.insert_sql = (f"INSERT INTO {schema.storage_table(table)} "
+                           f"VALUES ({', '.join('?' * len(self.columns))})")
+
+    def _create_table(self):
+        schema.ensure_table(self.conn, self.table, replace=not self.incremental)
+        self.created = True
+
+    def _fit_batch(self, row):
+        # size the batch from the first row so a full buffer stays under the memory budget
+        row_bytes = sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+        if self.max_buffer_bytes:
+            self.batch_size = max(1, min(self.batch_size, self.max_buffer_bytes // row_bytes))
+
+    def add(self, rows):
+        for row in rows:
+            if not self.buffer and not self.rows_written:
+                self._fit_batch(row)
+            self.buffer.append(row)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if not self.created:
+            self._create_table()
+        start = time.perf_counter()
+        self.conn.executemany(self.insert_sql, self.encoder.encode_rows(self.table, self.buffer))
+        self.seconds += time.perf_counter() - start
+        self.rows_written += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self.rows_written:
+            print(f"✅ {self.table} loaded:", self.rows_written,
+                  f"rows ({rate(self.rows_written, self.seconds)} insert)")
+        elif not self.incremental:
+            print(f"⚠️ No data found for {self.table}")
+
+def report(written, seconds):
+    """One summary line for a whole load: {table: rows} over its wall time."""
+    rows = sum(written.values())
+    print(f"📊 Bulk load: {rows} rows into {len(written)} tables in {seconds:.2f}s ({rate(rows, seconds)})")
+
+
+# -------------------------------
+# DataFrame Loader (to_sql replacement)
+# -------------------------------
+def _sql_type(dtype):
+    if dtype.kind in "iub":
+        return "INTEGER"
+    if dtype.kind == "f":
+        return "REAL"
+    return "TEXT"
+
+def _column_values(col):
+    """A DataFrame column as a list of SQLite-bindable Python values (NaN -> NULL, lists/dicts -> JSON)."""
+    values = col.tolist()   # numpy scalars -> Python ints / floats in one C loop
+    if col.dtype.kind == "f" and col.isna().any():
+        return [None if v != v else v for v in values]
+    if col.dtype.kind == "O":
+        return [None if isinstance(v, float) and math.isnan(v) else
+                json.dumps(v) if isinstance(v, (list, dict)) else v for v in values]
+    return values
+
+def write_dataframe(conn, table, df, batch_size=BATCH_SIZE):
+    """
+    Replace `table` with df: typed DDL from the dtypes, then executemany in
+    batch_size slices. Runs inside the caller's transaction; returns rows written.
+    """
+    start = time.perf_counter()
+    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    cols = ", ".join(f'"{name}" {_sql_type(dtype)}' for name, dtype in df.dtypes.items())
+    conn.execute(f'CREATE TABLE "{table}" ({cols})')
+    insert_sql = f'INSERT INTO "{table}" VALUES ({", ".join("?" * len(df.columns))})'
+    for pos in range(0, len(df), batch_size):
+        chunk = df.iloc[pos:pos + batch_size]
+        conn.executemany(insert_sql, zip(*(_column_values(chunk[c]) for c in chunk.columns)))
+    print(f"✅ {table} loaded:", len(df), f"rows ({rate(len(df), time.perf_counter() - start)})")
+    return len(df)
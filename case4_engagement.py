@@ -10,78 +10,34 @@ This case study analyzes:
 5. Engagement ratio (app opens vs registered users)
 """
 
-import utils
+import queries
+import case_runner
 
 # 1️⃣ Top states by registered users (latest year)
-Q1 = """
-SELECT state, year, SUM(count) AS total_users
-FROM aggregated_user
-WHERE brand = 'TOTAL'
-  AND year = (SELECT MAX(year) FROM aggregated_user)
-GROUP BY state, year
-ORDER BY total_users DESC
-LIMIT 10;
-"""
+Q1 = queries.get("case4.Q1").sql
 
 # 2️⃣ Yearly growth of registered users nationwide
-Q2 = """
-SELECT year, SUM(count) AS yearly_users
-FROM aggregated_user
-WHERE brand = 'TOTAL'
-GROUP BY year
-ORDER BY year;
-"""
+Q2 = queries.get("case4.Q2").sql
 
 # 3️⃣ Quarterly trend of app opens in the top state
-Q3 = """
-WITH top_state AS (
-    SELECT state
-    FROM aggregated_user
-    WHERE brand = 'TOTAL'
-    GROUP BY state
-    ORDER BY SUM(count) DESC
-    LIMIT 1
-)
-SELECT au.state, au.year, au.quarter, SUM(au.percentage) AS total_app_opens
-FROM aggregated_user au
-JOIN top_state ts ON au.state = ts.state
-WHERE au.brand = 'TOTAL'
-GROUP BY au.state, au.year, au.quarter
-ORDER BY au.year, au.quarter;
-"""
+Q3 = queries.get("case4.Q3").sql
 
 # 4️⃣ Top districts by registered users (latest year)
-Q4 = """
-SELECT district, year, SUM(registeredUsers) AS total_users
-FROM map_user
-WHERE year = (SELECT MAX(year) FROM map_user)
-GROUP BY district, year
-ORDER BY total_users DESC
-LIMIT 10;
-"""
+Q4 = queries.get("case4.Q4").sql
 
 # 5️⃣ Engagement ratio: App Opens / Registered Users (latest year, per state)
-Q5 = """
-SELECT state,
-       SUM(count) AS total_registered_users,
-       SUM(percentage) AS total_app_opens,
-       ROUND(CAST(SUM(percentage) AS FLOAT)/SUM(count),2) AS engagement_ratio
-FROM aggregated_user
-WHERE brand = 'TOTAL'
-  AND year = (SELECT MAX(year) FROM aggregated_user)
-GROUP BY state
-ORDER BY engagement_ratio DESC
-LIMIT 10;
-"""
+Q5 = queries.get("case4.Q5").sql
+
+TITLES = {
+    "Top States by Registered Users (Latest Year)": "case4.Q1",
+    "Yearly Growth of Registered Users": "case4.Q2",
+    "Quarterly App Opens in Top State": "case4.Q3",
+    "Top Districts by Registered Users": "case4.Q4",
+    "Engagement Ratio by State (Latest Year)": "case4.Q5",
+}
 
 def run_all(conn):
     """
     Runs all 5 queries and returns a dictionary of DataFrames
     """
-    results = {}
-    results["Top States by Registered Users (Latest Year)"] = utils.run_query(conn, Q1)
-    results["Yearly Growth of Registered Users"] = utils.run_query(conn, Q2)
-    results["Quarterly App Opens in Top State"] = utils.run_query(conn, Q3)
-    results["Top Districts by Registered Users"] = utils.run_query(conn, Q4)
-    results["Engagement Ratio by State (Latest Year)"] = utils.run_query(conn, Q5)
-    return results
+    return case_runner.run_titled(conn, TITLES)
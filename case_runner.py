@@ -0,0 +1,255 @@
+"""
+Shared-work runner for the case-study queries
+---------------------------------------------
+Run one after another, the case studies repeat work: case1.Q2 and case5.Q4 are
+the same yearly totals, several queries re-derive MAX(year) of the same table,
+and case2.Q3 / case4.Q3 build the same "top state" CTE. run_batch() looks at a
+batch of registered queries together and
+  - evaluates each (SELECT MAX(year) FROM <table>) used more than once a single
+    time and binds the value as a parameter,
+  - evaluates each CTE body used by more than one query a single time and inlines
+    its (small) result as bound rows,
+  - runs queries that differ only in their LIMIT once, with the largest LIMIT,
+    and derives the others with head(n).
+"""
+
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import utils
+import queries
+
+MAX_SHARED_ROWS = 1000   # bigger CTE results stay in SQL for SQLite to compute in place
+
+_MAX_YEAR = re.compile(r"\(\s*SELECT\s+MAX\(year\)\s+FROM\s+(\w+)\s*\)", re.I)
+_LIMIT = re.compile(r"\s*\bLIMIT\s+(:\w+|\d+)\s*;?\s*$", re.I)
+_CTE = re.compile(r"(\w+)\s+AS\s*\(", re.I)
+
+
+# -------------------------------
+# SQL Helpers
+# -------------------------------
+def canonical(sql):
+    """Whitespace- and spacing-insensitive form of sql (string literals untouched)."""
+    parts = re.split(r"('(?:[^']|'')*')", sql.strip().rstrip(";"))
+    for i in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[i])
+        parts[i] = re.sub(r"\s*([=<>!(),*/+-]+)\s*", r"\1", part)
+    return "".join(parts).strip()
+
+def parse_ctes(sql):
+    """Return [(name, body_start, body_end)] for the CTEs of a leading WITH clause."""
+    m = re.match(r"\s*WITH\s+", sql, re.I)
+    if not m:
+        return []
+    ctes, pos = [], m.end()
+    while True:
+        m = _CTE.match(sql, pos)
+        if not m:
+            break
+        depth, i = 1, m.end()
+        while depth and i < len(sql):
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            i += 1
+        ctes.append((m.group(1), m.end(), i - 1))
+        m = re.compile(r"\s*,\s*").match(sql, i)
+        if not m:
+            break
+        pos = m.end()
+    return ctes
+
+def _used_params(sql, params):
+    return tuple(sorted((k, v) for k, v in params.items() if re.search(rf":{k}\b", sql)))
+
+def _python(value):
+    return value.item() if hasattr(value, "item") else value
+
+def _rows_sql(df, prefix):
+    """Rebuild a small result as a bound SELECT ... UNION ALL SELECT ... (column names kept)."""
+    params, selects = {}, []
+    for r, row in enumerate(df.itertuples(index=False)):
+        cols = []
+        for c, (column, value) in enumerate(zip(df.columns, row)):
+            params[f"{prefix}_{r}_{c}"] = _python(value)
+            cols.append(f":{prefix}_{r}_{c} AS {column}")
+        selects.append("SELECT " + ", ".join(cols))
+    if not selects:
+        selects = ["SELECT " + ", ".join(f"NULL AS {c}" for c in df.columns) + " LIMIT 0"]
+    return " UNION ALL ".join(selects), params
+
+
+# -------------------------------
+# Batch Runner
+# -------------------------------
+class PooledExecutor:
+    """
+    Worker threads for run_batch, each querying on its own db_pool connection.
+    Reuse one for every batch of a run; close() joins the workers and closes the
+    connections they opened.
+    """
+
+    def __init__(self, pool, workers):
+        self.pool = pool
+        self._executor = ThreadPoolExecutor(workers)
+        self._opened = set()
+        self._lock = threading.Lock()
+
+    def connection(self):
+        conn = self.pool.connection()
+        with self._lock:
+            self._opened.add(conn)
+        return conn
+
+    def map(self, fn, jobs):
+        return self._executor.map(fn, jobs)
+
+    def close(self):
+        self._executor.shutdown()
+        with self._lock:
+            for conn in self._opened:
+                self.pool.release(conn)
+            self._opened.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_batch(conn, names, params=None, verbose=False, pool=None, workers=1, executor=None):
+    """
+    Run the registered queries in names sharing common subresults.
+    params: {name: overrides}. With a PooledExecutor (or a db_pool.ConnectionPool and
+    workers > 1, for a one-batch executor) the statements of each phase run
+    concurrently, one pooled connection per worker thread.
+    Returns ({name: DataFrame}, stats); stats["timings"] is {name: seconds}.
+    """
+    params = params or {}
+    stats = {"queries": len(names), "executed": 0, "shared_scalars": 0, "shared_ctes": 0,
+             "deduplicated": 0, "computed": 0, "timings": {}}
+    own = executor is None and pool is not None and workers > 1
+    if own:
+        executor = PooledExecutor(pool, workers)
+
+    def timed(job):
+        start = time.perf_counter()
+        target = executor.connection() if executor else pool.connection() if pool is not None else conn
+        df = utils.run_query(target, job[0], params=job[1])
+        return df, time.perf_counter() - start
+
+    def execute_all(jobs):
+        """[(sql, params)] -> [(DataFrame, seconds)], concurrently when an executor is set."""
+        stats["executed"] += len(jobs)
+        return list(executor.map(timed, jobs) if executor else map(timed, jobs))
+
+    try:
+        return _run_batch(names, params, stats, execute_all, verbose)
+    finally:
+        if own:
+            executor.close()
+
+def _run_batch(names, params, stats, execute_all, verbose):
+    # 0. computed queries (no SQL to share) run as they are
+    computed = [name for name in names if queries.get(name).compute]
+    results = {}
+    for name, (df, seconds) in zip(computed, execute_all([(name, params.get(name)) for name in computed])):
+        results[name] = df
+        stats["timings"][name] = seconds
+    stats["computed"] = len(computed)
+    bound = {name: queries.bind(name, params.get(name)) for name in names if name not in computed}
+
+    # 1. (SELECT MAX(year) FROM t) -> one lookup per table
+    tables = [t for sql, _ in bound.values() for t in _MAX_YEAR.findall(sql)]
+    shared = sorted({t for t in tables if tables.count(t) > 1})
+    lookups = execute_all([(f"SELECT MAX(year) AS max_year FROM {t}", None) for t in shared])
+    for table, (df, _) in zip(shared, lookups):
+        if df.empty:
+            continue   # missing table: leave the subquery so the query reports its own error
+        stats["shared_scalars"] += 1
+        pattern = re.compile(rf"\(\s*SELECT\s+MAX\(year\)\s+FROM\s+{table}\s*\)", re.I)
+        for name, (sql, p) in bound.items():
+            if pattern.search(sql):
+                bound[name] = (pattern.sub(f":max_year_{table}", sql), {**p, f"max_year_{table}": _python(df.iloc[0, 0])})
+
+    # 2. CTE bodies shared by several queries -> evaluated once, inlined as rows
+    users = {}
+    for name, (sql, p) in bound.items():
+        ctes = parse_ctes(sql)
+        cte_names = [c[0] for c in ctes]
+        for cte, start, end in ctes:
+            body = sql[start:end]
+            if any(re.search(rf"\b{other}\b", body) for other in cte_names if other != cte):
+                continue   # depends on a sibling CTE, not standalone
+            key = (canonical(body), _used_params(body, p))
+            users.setdefault(key, []).append((name, start, end))
+    common = [(key, uses) for key, uses in users.items() if len({u[0] for u in uses}) > 1]
+    evaluated = execute_all([(body, dict(used)) for (body, used), _ in common])
+    replacements = {}
+    for i, ((_, uses), (df, _)) in enumerate(zip(common, evaluated)):
+        if len(df) > MAX_SHARED_ROWS or len(df.columns) == 0:
+            continue
+        stats["shared_ctes"] += 1
+        rows_sql, rows_params = _rows_sql(df, f"cte{i}")
+        for name, start, end in uses:
+            replacements.setdefault(name, []).append((start, end, rows_sql, rows_params))
+    for name, spans in replacements.items():
+        sql, p = bound[name]
+        for start, end, rows_sql, rows_params in sorted(spans, reverse=True):
+            sql = sql[:start] + rows_sql + sql[end:]
+            p = {**p, **rows_params}
+        bound[name] = (sql, p)
+
+    # 3. identical queries (up to LIMIT) -> one execution, head(n) for the rest
+    groups = {}
+    for name, (sql, p) in bound.items():
+        m = _LIMIT.search(sql)
+        limit = None
+        if m:
+            limit = int(p[m.group(1)[1:]]) if m.group(1).startswith(":") else int(m.group(1))
+            sql = sql[:m.start()]
+        key = (canonical(sql), _used_params(sql, p))
+        groups.setdefault(key, []).append((name, sql, p, limit))
+    jobs = []
+    for members in groups.values():
+        _, sql, p, _ = members[0]
+        limits = [m[3] for m in members]
+        if None not in limits:
+            sql = f"{sql}\nLIMIT {max(limits)}"
+        jobs.append((sql, p))
+    for members, (df, seconds) in zip(groups.values(), execute_all(jobs)):
+        stats["deduplicated"] += len(members) - 1
+        for name, _, _, limit in members:
+            results[name] = (df if limit is None else df.head(limit)).reset_index(drop=True).copy()
+            stats["timings"][name] = seconds
+
+    if verbose:
+        print(f"📊 {stats['queries']} queries answered with {stats['executed']} statements "
+              f"({stats['shared_scalars']} shared scalars, {stats['shared_ctes']} shared CTEs, "
+              f"{stats['deduplicated']} duplicates, {stats['computed']} computed)")
+    return results, stats
+
+def run_titled(conn, titles):
+    """{title: query name} -> {title: DataFrame}, sharing work inside the batch."""
+    results, _ = run_batch(conn, list(titles.values()))
+    return {title: results[name] for title, name in titles.items()}
+
+
+# -------------------------------
+# All Case Studies
+# -------------------------------
+def case_modules():
+    import case1_transactions, case2_devices, case3_insurance, case4_engagement, case5_geo_transactions
+    return [case1_transactions, case2_devices, case3_insurance, case4_engagement, case5_geo_transactions]
+
+def run_all_cases(conn, verbose=True, pool=None, workers=1, executor=None):
+    """
+    Every case study's run_all() output as one shared batch.
+    Returns ({module name: {title: DataFrame}}, stats) -- see run_batch() for pool/workers/executor.
+    """
+    modules = case_modules()
+    names = list(dict.fromkeys(n for module in modules for n in module.TITLES.values()))
+    results, stats = run_batch(conn, names, verbose=verbose, pool=pool, workers=workers, executor=executor)
+    return {module.__name__: {title: results[name] for title, name in module.TITLES.items()}
+            for module in modules}, stats
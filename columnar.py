@@ -0,0 +1,286 @@
+"""
+Columnar, memory-mapped fact store
+----------------------------------
+Optional copy of the fact tables written at ingest:
+  <store>/store.json             the DB generation the store was written from
+  <store>/<table>/<column>.npy   one NumPy array per column
+  <store>/<table>/meta.json      row count, dtypes and string dictionaries
+Text columns (state, category, type, brand, ...) are dictionary-encoded to small
+integer codes. Readers map the arrays zero-copy (mmap_mode="r") and answer
+filter / group-by / sum / top-k queries with vectorized NumPy, without going
+through SQL result rows.
+
+COLUMNAR_DIR is a symlink to one complete store directory. A new store is
+written into a fresh sibling directory and swapped in by renaming a new symlink
+over the old one, so a reader never mixes columns of two builds. Readers reopen
+when the link moves and ignore a store whose generation is not the DB's.
+"""
+
+import os, json, shutil, operator, tempfile, threading
+import numpy as np
+import pandas as pd
+import result_cache
+import schema
+
+COLUMNAR_DIR = "/content/project_files/columnar"
+FETCH_SIZE = 50_000
+KEEP_STORES = 2          # the live store plus the previous one (readers may still be opening it)
+
+_INT_DTYPES = {"year": np.int16, "quarter": np.int8}
+_OPS = {"==": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge,
+        "<": operator.lt, "<=": operator.le}
+
+
+# -------------------------------
+# Writer (SQLite -> .npy columns)
+# -------------------------------
+def _code_dtype(n):
+    return np.uint8 if n < 2**8 else np.uint16 if n < 2**16 else np.int32
+
+def write_table(conn, table, out_dir):
+    """Stream one table into per-column .npy files; returns the row count."""
+    cols = ", ".join(f'"{c}"' for c in schema.column_names(table))   # not the views' id columns
+    cursor = conn.execute(f"SELECT {cols} FROM {table}")
+    names = [d[0] for d in cursor.description]
+    rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    values = {c: np.empty(rows, dtype=object) for c in names}
+
+    pos = 0
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            break
+        for i, col in enumerate(zip(*batch)):
+            values[names[i]][pos:pos + len(batch)] = col
+        pos += len(batch)
+
+    path = os.path.join(out_dir, table)
+    os.makedirs(path, exist_ok=True)
+    meta = {"rows": rows, "columns": {}}
+    for name in names:
+        col = values.pop(name)
+        kinds = {type(v) for v in col}
+        if str in kinds:
+            dictionary = sorted({v for v in col if v is not None})
+            lookup = {v: i for i, v in enumerate(dictionary)}
+            lookup[None] = len(dictionary)
+            arr = np.fromiter((lookup[v] for v in col), dtype=_code_dtype(len(dictionary) + 1), count=rows)
+            meta["columns"][name] = {"dtype": str(arr.dtype), "dictionary": dictionary}
+        elif float in kinds or type(None) in kinds:
+            arr = np.array([np.nan if v is None else v for v in col], dtype=np.float64)
+            meta["columns"][name] = {"dtype": "float64"}
+        else:
+            arr = col.astype(_INT_DTYPES.get(name, np.int64))
+            meta["columns"][name] = {"dtype": str(arr.dtype)}
+        np.save(os.path.join(path, f"{name}.npy"), arr)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return rows
+
+def store_generation(path=COLUMNAR_DIR):
+    """The DB generation the store at path was written from (None when there is no complete store)."""
+    try:
+        with open(os.path.join(path, "store.json")) as f:
+            return json.load(f)["generation"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _carry_over(live, new_dir, table):
+    """Hard-link (or copy) an unchanged table's files from the live store into the new one."""
+    os.makedirs(os.path.join(new_dir, table))
+    for name in os.listdir(os.path.join(live, table)):
+        src, dst = os.path.join(live, table, name), os.path.join(new_dir, table, name)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+def _swap(out_dir, new_dir):
+    """Atomically point out_dir at new_dir (a fresh symlink renamed over the old one)."""
+    if os.path.isdir(out_dir) and not os.path.islink(out_dir):
+        # a store from before the symlink layout: move it aside once
+        print(f"🔄 Replacing the plain store directory {out_dir} by a symlink")
+        os.rename(out_dir, tempfile.mkdtemp(prefix=os.path.basename(out_dir) + ".old.",
+                                            dir=os.path.dirname(os.path.abspath(out_dir))))
+    link = f"{out_dir}.swap.{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(new_dir), link)
+    os.replace(link, out_dir)
+
+def prune_stores(out_dir=COLUMNAR_DIR, keep=KEEP_STORES):
+    """Delete all but the newest `keep` store directories, never the live one (mapped files stay readable)."""
+    parent, base = os.path.split(os.path.abspath(out_dir))
+    live = os.path.realpath(out_dir)
+    stores = sorted((os.path.join(parent, d) for d in os.listdir(parent)
+                     if d.startswith(base + ".") and os.path.isdir(os.path.join(parent, d))
+                     and not os.path.islink(os.path.join(parent, d))),
+                    key=os.path.getmtime, reverse=True)
+    for path in stores[keep:]:
+        if path != live:
+            shutil.rmtree(path, ignore_errors=True)
+
+def write_store(conn, out_dir=COLUMNAR_DIR, tables=None, base_generation=None):
+    """
+    Write the selected tables (default: every pulse table present in conn) as a new store and
+    swap it in. With base_generation (the DB's generation before an incremental refresh), the
+    other tables are carried over from the live store if it was written from that generation;
+    otherwise every table is rewritten, so the store always matches one DB generation.
+    """
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    generation = result_cache.get_generation(conn)
+    live = os.path.realpath(out_dir) if os.path.isdir(out_dir) else None
+    reuse = live is not None and base_generation is not None and store_generation(out_dir) == base_generation
+    selected = set(schema.TABLES if tables is None else tables)
+
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    new_dir = tempfile.mkdtemp(prefix=f"{os.path.basename(out_dir)}.{generation}.", dir=parent)
+    written, carried = {}, []
+    try:
+        for table in schema.TABLES:
+            if table not in existing:
+                continue
+            if table in selected or not reuse or not os.path.isdir(os.path.join(live, table)):
+                written[table] = write_table(conn, table, new_dir)
+            else:
+                _carry_over(live, new_dir, table)
+                carried.append(table)
+        with open(os.path.join(new_dir, "store.json"), "w") as f:
+            json.dump({"generation": generation}, f)
+        os.chmod(new_dir, 0o755)   # mkdtemp creates it private
+        _swap(out_dir, new_dir)
+    except BaseException:
+        shutil.rmtree(new_dir, ignore_errors=True)
+        raise
+    prune_stores(out_dir)
+    linked = f" ({len(carried)} unchanged tables linked)" if carried else ""
+    print(f"✅ columnar store written to {out_dir} -> {os.path.basename(new_dir)}: {written}{linked}")
+    return written
+
+
+# -------------------------------
+# Reader + Vectorized Engine
+# -------------------------------
+class ColumnarTable:
+    """One memory-mapped table with a small filter / group-by / sum / top-k engine."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.columns = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r") for c in meta["columns"]}
+        self.dictionaries = {c: info["dictionary"] for c, info in meta["columns"].items() if "dictionary" in info}
+        self._codes = {c: {v: i for i, v in enumerate(d)} for c, d in self.dictionaries.items()}
+
+    def encode(self, column, value):
+        """Literal -> code for dictionary columns (unknown values get a code that matches nothing)."""
+        if column not in self._codes:
+            return value
+        return self._codes[column].get(value, -1)
+
+    def decode(self, column, codes):
+        if column not in self.dictionaries:
+            return np.asarray(codes)
+        lookup = np.array(self.dictionaries[column] + [None], dtype=object)
+        return lookup[np.asarray(codes)]
+
+    def mask(self, filters=None):
+        """
+        Boolean row mask. filters = {column: value | (op, value)} with op in
+        ==, !=, >, >=, <, <=, in, not in.
+        """
+        m = np.ones(self.rows, dtype=bool)
+        for col, cond in (filters or {}).items():
+            op, value = cond if isinstance(cond, tuple) else ("==", cond)
+            arr = self.columns[col]
+            if op in ("in", "not in"):
+                hit = np.isin(arr, [self.encode(col, v) for v in value])
+                m &= hit if op == "in" else ~hit
+            else:
+                m &= _OPS[op](arr, self.encode(col, value))
+        return m
+
+    def max(self, column, filters=None):
+        values = np.asarray(self.columns[column])[self.mask(filters)]
+        if not len(values):
+            return None
+        value = self.decode(column, [values.max()])[0]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def _group_index(self, by, m):
+        """Dense group id per selected row + the decoded key columns of each group."""
+        parts, cards, offsets = [], [], []
+        for col in by:
+            arr = np.asarray(self.columns[col])[m].astype(np.int64)
+            lo = int(arr.min()) if len(arr) else 0
+            parts.append(arr - lo)
+            cards.append(int(arr.max()) - lo + 1 if len(arr) else 1)
+            offsets.append(lo)
+        combined = np.ravel_multi_index(parts, cards) if len(by) > 1 else parts[0]
+        if np.prod(cards, dtype=np.float64) <= 1e7:
+            present = np.flatnonzero(np.bincount(combined, minlength=int(np.prod(cards))))
+            group = np.searchsorted(present, combined)
+        else:
+            present, group = np.unique(combined, return_inverse=True)
+        keys = np.unravel_index(present, cards) if len(by) > 1 else (present,)
+        return group, len(present), {c: self.decode(c, k + lo) for c, k, lo in zip(by, keys, offsets)}
+
+    def group_sum(self, by, measures=("amount",), filters=None, top=None, ascending=False, sort=True):
+        """
+        SUM(measures) GROUP BY `by` over the rows matching filters, as a DataFrame.
+        sort orders by the first measure (descending unless ascending=True); top keeps only the
+        first `top` groups, picked with a partial selection instead of a full sort.
+        """
+        m = self.mask(filters)
+        sums = {}
+        if by:
+            group, n_groups, out = self._group_index(list(by), m)
+        else:
+            group, n_groups, out = np.zeros(int(m.sum()), dtype=np.int64), 1, {}
+        for name in measures:
+            weights = np.asarray(self.columns[name])[m].astype(np.float64)
+            sums[name] = np.bincount(group, weights=np.nan_to_num(weights), minlength=n_groups)
+        out.update(sums)
+
+        order = None
+        if sort and measures and n_groups:
+            key = sums[measures[0]] if ascending else -sums[measures[0]]
+            if top and top < n_groups:
+                order = np.argpartition(key, top - 1)[:top]
+                order = order[np.argsort(key[order], kind="stable")]
+            else:
+                order = np.argsort(key, kind="stable")
+        elif top:
+            order = np.arange(min(top, n_groups))
+        df = pd.DataFrame(out)
+        return df.iloc[order].reset_index(drop=True) if order is not None else df
+
+
+_OPEN = {}               # path -> (store directory, generation, {table: ColumnarTable})
+_open_lock = threading.Lock()
+
+def _map_tables(directory):
+    return {name: ColumnarTable(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+            if os.path.isfile(os.path.join(directory, name, "meta.json"))}
+
+def open_store(path=COLUMNAR_DIR, generation=None):
+    """
+    {table: ColumnarTable} for the store at path, mapped once per store directory and
+    reopened when path is swapped to a new one. With generation (the DB's), a store written
+    from any other generation is ignored ({}), so callers fall back to SQL.
+    """
+    directory = os.path.realpath(path)
+    with _open_lock:
+        cached = _OPEN.get(path)
+        if cached is None or cached[0] != directory:
+            if not os.path.isdir(directory):
+                return {}
+            try:
+                cached = (directory, store_generation(directory), _map_tables(directory))
+            except FileNotFoundError:
+                return {}   # pruned while opening; the next call sees the new store
+            _OPEN[path] = cached
+    if generation is not None and cached[1] != generation:
+        return {}
+    return cached[2]
@@ -1,5 +1,8 @@
 
-import os, json, sqlite3, glob, pandas as pd
+import os, sqlite3, glob, time, pandas as pd
+import fast_json
+import ingest_profile
+import bulk_loader
 
 def find_repo_path(base_path=None):
     if base_path and os.path.exists(base_path):
@@ -9,39 +12,70 @@ def find_repo_path(base_path=None):
         return fallback
     raise FileNotFoundError(f"Could not find PhonePe pulse data at {base_path or fallback}. Please clone the repo.")
 
-def build_sqlite_db(base_path=None, db_path=':memory:', verbose=True):
+def build_sqlite_db(base_path=None, db_path=':memory:', verbose=True, profiler=None):
     repo_path = find_repo_path(base_path)
     conn = sqlite3.connect(db_path)
+    phases = profiler or ingest_profile.NullProfiler()
+    table = 'aggregated_transaction'
 
     # Helper loader
     def load_json_files(glob_pattern):
         rows = []
-        for fp in glob.glob(glob_pattern, recursive=True):
+        with phases.phase(table, 'glob') as counters:
+            files = glob.glob(glob_pattern, recursive=True)
+            counters['files'] = len(files)
+        for fp in files:
             try:
-                with open(fp, 'r') as f:
-                    data = json.load(f)
+                start = time.perf_counter()
+                with open(fp, 'rb') as f:
+                    raw = f.read()
+                read = time.perf_counter()
+                data = fast_json.decode(raw)
+                decoded = time.perf_counter()
+                before = len(rows)
                 if isinstance(data, dict) and 'data' in data and isinstance(data['data'], list):
                     for item in data['data']:
                         rows.append(item)
                 elif isinstance(data, list):
                     rows.extend(data)
+                built = time.perf_counter()
+                phases.add(table, 'io', read - start, files=1, nbytes=len(raw))
+                phases.add(table, 'decode', decoded - read, files=1, nbytes=len(raw))
+                phases.add(table, 'rows', built - decoded, rows=len(rows) - before)
             except Exception as e:
                 if verbose: print('skip', fp, e)
+        phases.sample_rss(table, ('io', 'decode', 'rows'))
         if rows:
-            return pd.json_normalize(rows, sep='_')
+            with phases.phase(table, 'dataframe') as counters:
+                df = pd.json_normalize(rows, sep='_')
+                counters['rows'] = len(df)
+                counters['nbytes'] = int(df.memory_usage(deep=True).sum())
+            return df
         return pd.DataFrame()
 
     tx_df = load_json_files(os.path.join(repo_path, '**', '*.json'))
     if not tx_df.empty:
-        tx_df.to_sql('aggregated_transaction', conn, if_exists='replace', index=False)
+        with phases.phase(table, 'write') as counters:
+            with bulk_loader.bulk_session(conn):
+                counters['rows'] = bulk_loader.write_dataframe(conn, table, tx_df)
+                bulk_loader.analyze(conn)
+                conn.commit()
         if verbose: print('Wrote aggregated_transaction:', tx_df.shape)
 
     # Placeholder tables
-    conn.execute('CREATE TABLE IF NOT EXISTS map_user (state TEXT, year INTEGER, quarter INTEGER, registeredUsers INTEGER, appOpens INTEGER, device_brand TEXT)')
+    conn.execute('CREATE TABLE IF NOT EXISTS map_user (state TEXT, year INTEGER, quarter INTEGER, district TEXT, registeredUsers INTEGER, appOpens INTEGER)')
     conn.execute('CREATE TABLE IF NOT EXISTS aggregated_insurance (state TEXT, year INTEGER, quarter INTEGER, insuranceValue REAL, insuranceCount INTEGER)')
     conn.commit()
     return conn
 
 if __name__ == "__main__":
-    conn = build_sqlite_db()
+    import sys
+    profiler = ingest_profile.PhaseProfiler() if "--profile" in sys.argv or "--cprofile" in sys.argv else None
+    if "--cprofile" in sys.argv:
+        conn = ingest_profile.run_cprofile(build_sqlite_db, sys.argv[sys.argv.index("--cprofile") + 1],
+                                           profiler=profiler)
+    else:
+        conn = build_sqlite_db(profiler=profiler)
+    if profiler:
+        profiler.report()
     print("Database built")
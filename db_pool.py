@@ -0,0 +1,96 @@
+"""
+Read-only SQLite connection pool for the dashboard
+--------------------------------------------------
+One tuned, read-only connection per thread, reused for every query the thread
+runs, so the page cache, mmap and prepared statements survive between queries.
+A connection is closed as soon as its thread is gone: Streamlit runs every rerun
+on a fresh script thread, so the pool holds at most one connection per live thread.
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+
+DB_PATH = "/content/project_files/phonepe_pulse.db"
+
+MMAP_SIZE = 256 * 1024 * 1024     # bytes mapped straight from the DB file
+CACHE_SIZE_KB = 64 * 1024         # page cache per connection
+BUSY_TIMEOUT_MS = 5000            # wait this long instead of failing while a rebuild holds a lock
+CACHED_STATEMENTS = 256           # prepared statements kept per connection
+
+
+def connect_read_only(db_path=DB_PATH):
+    """Open a read-only URI connection with the read-side PRAGMAs applied."""
+    # check_same_thread=False only so close_all() can close it; queries stay on the owning thread
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False,
+                           timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=CACHED_STATEMENTS)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+def enable_wal(conn):
+    """Switch a DB to WAL so readers never block on (or block) a writer. Needs a writable connection."""
+    return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+
+class ConnectionPool:
+    """
+    Hands out one read-only connection per thread for a single DB file.
+    db_path may be the symlink atomic_rebuild swaps: each connection is opened on
+    the file it resolves to, and reopened on the next call once the link moves.
+    A finalizer on the owning thread closes its connection when the thread object goes away.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        target = os.path.realpath(self.db_path)
+        if conn is not None and self._local.target != target:
+            self._local.finalizer()   # the old build stays readable for other threads until they move too
+            conn = None
+        if conn is None:
+            conn = connect_read_only(target)
+            self._local.conn = conn
+            self._local.target = target
+            self._local.finalizer = weakref.finalize(threading.current_thread(), self.release, conn)
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def release(self, conn):
+        """Close conn and drop it from the pool (its thread must be done with it)."""
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        conn.close()
+
+    def open_connections(self):
+        with self._lock:
+            return len(self._all)
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path=DB_PATH):
+    """Process-wide pool per DB file."""
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
@@ -0,0 +1,57 @@
+"""
+Pluggable JSON decoding for the pulse files
+-------------------------------------------
+Files are always read as bytes and handed to the fastest decoder that is
+installed (orjson > simdjson > ujson), falling back to the stdlib json module.
+Set PULSE_JSON_BACKEND=<name> to force a backend.
+"""
+
+import os, json
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+def _simdjson():
+    import simdjson
+    return simdjson.loads
+
+def _ujson():
+    import ujson
+    return ujson.loads
+
+def _stdlib():
+    return json.loads
+
+# fastest first
+BACKENDS = {"orjson": _orjson, "simdjson": _simdjson, "ujson": _ujson, "json": _stdlib}
+
+
+def available_backends():
+    """Return {name: decode(bytes) -> object} for every backend that imports here."""
+    found = {}
+    for name, factory in BACKENDS.items():
+        try:
+            found[name] = factory()
+        except ImportError:
+            continue
+    return found
+
+def get_decoder(name=None):
+    """Return (name, decode) for the requested backend, or the fastest available one."""
+    name = name or os.environ.get("PULSE_JSON_BACKEND")
+    backends = available_backends()
+    if name:
+        if name not in backends:
+            raise ValueError(f"JSON backend '{name}' is not available (have: {', '.join(backends)})")
+        return name, backends[name]
+    return next(iter(backends.items()))
+
+
+BACKEND, decode = get_decoder()
+
+def load_file(path):
+    """Read a JSON file as bytes and decode it with the active backend."""
+    with open(path, "rb") as f:
+        return decode(f.read())
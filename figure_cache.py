@@ -0,0 +1,106 @@
+"""
+Figure cache for the Overview page
+----------------------------------
+The choropleth + bar pair for each (data type, year, quarter) is built once per
+DB generation and kept as serialized Plotly JSON, in memory and on disk under
+<FIGURE_DIR>/<generation>/. prebuild_overview() renders all 56 sidebar
+combinations right after an ingest, so changing the sidebar only pays the
+browser-side rendering cost.
+"""
+
+import os, json, threading
+import plotly.express as px
+import plotly.io as pio
+import utils
+
+FIGURE_DIR = "/content/project_files/figures"
+
+YEARS = [2018, 2019, 2020, 2021, 2022, 2023, 2024]
+QUARTERS = [1, 2, 3, 4]
+
+OVERVIEW = {
+    "Transactions": {"table": "aggregated_transaction", "query": "overview.transactions", "scale": "blues",
+                     "map_title": "State-wise Transaction Values", "bar_title": "Transaction Value by State"},
+    "Insurance": {"table": "aggregated_insurance", "query": "overview.insurance", "scale": "greens",
+                  "map_title": "State-wise Insurance Distribution", "bar_title": "Insurance Amount by State"},
+}
+
+
+def build_overview_figures(df, data_type, geojson):
+    """Choropleth + bar for one quarter of state totals (state names already normalized)."""
+    spec = OVERVIEW[data_type]
+    fig_map = px.choropleth(df, geojson=geojson, featureidkey="properties.ST_NM",
+                            locations="state", color="total_amount",
+                            color_continuous_scale=spec["scale"], title=spec["map_title"])
+    fig_map.update_geos(fitbounds="locations", visible=False)
+    fig_bar = px.bar(df, x="state", y="total_amount", text_auto=".2s", color="total_amount",
+                     title=spec["bar_title"])
+    return fig_map, fig_bar
+
+
+class FigureCache:
+    """(data_type, year, quarter, generation) -> serialized (map, bar) figures, memory first, then disk."""
+
+    def __init__(self, figure_dir=FIGURE_DIR):
+        self.figure_dir = figure_dir
+        self.memory = {}
+        self._lock = threading.Lock()
+
+    def _path(self, data_type, year, quarter, generation):
+        return os.path.join(self.figure_dir, str(generation), f"{data_type.lower()}_{year}_q{quarter}.json")
+
+    def get(self, data_type, year, quarter, generation, build):
+        """Return (fig_map, fig_bar); build() -> (fig_map, fig_bar) runs only on a miss."""
+        key = (data_type, year, quarter, generation)
+        with self._lock:
+            if any(k[3] != generation for k in self.memory):
+                self.memory = {k: v for k, v in self.memory.items() if k[3] == generation}
+            payload = self.memory.get(key)
+        if payload is None:
+            path = self._path(*key)
+            if os.path.exists(path):
+                with open(path) as f:
+                    payload = json.load(f)
+            else:
+                payload = [fig.to_json() for fig in build()]
+                self.save(path, payload)
+            with self._lock:
+                self.memory[key] = payload
+        return tuple(pio.from_json(p, skip_invalid=True) for p in payload)
+
+    @staticmethod
+    def save(path, payload):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+
+def prebuild_overview(conn, figure_dir=FIGURE_DIR, geojson=None):
+    """Render every (data type, year, quarter) Overview figure pair for conn's current generation."""
+    import geo, result_cache
+    generation = result_cache.get_generation(conn)
+    geojson = geojson or geo.load_india_geojson("medium")
+    cache = FigureCache(figure_dir)
+    built = 0
+    for data_type, spec in OVERVIEW.items():
+        for year in YEARS:
+            for quarter in QUARTERS:
+                df = utils.run_query(conn, spec["query"], params={"year": year, "quarter": quarter})
+                if df.empty:
+                    continue
+                df = utils.normalize_state_names(df)
+                cache.get(data_type, year, quarter, generation,
+                          lambda: build_overview_figures(df, data_type, geojson))
+                built += 1
+
+    # figures of older generations can never be served again
+    if os.path.isdir(figure_dir):
+        for name in os.listdir(figure_dir):
+            if name != str(generation) and os.path.isdir(os.path.join(figure_dir, name)):
+                for file in os.listdir(os.path.join(figure_dir, name)):
+                    os.remove(os.path.join(figure_dir, name, file))
+                os.rmdir(os.path.join(figure_dir, name))
+    print(f"✅ Prebuilt {built} Overview figure pairs for generation {generation}")
+    return built
@@ -0,0 +1,149 @@
+"""
+Local India state boundaries for the choropleths
+------------------------------------------------
+The state GeoJSON is fetched at most once (or taken from a bundled
+India_States.geojson), simplified with Douglas-Peucker at a few tolerance
+levels, and stored as one compressed .npz of quantized int32 coordinates.
+Each process then loads the level it needs once, offline, with only the
+ST_NM property kept, so the payload sent to the browser stays small.
+Without a cache, a bundled file or the network, the loader returns an empty
+FeatureCollection (maps render without boundaries) and retries on the next call.
+"""
+
+import os, json
+import urllib.error, urllib.request
+from functools import lru_cache
+import numpy as np
+
+GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+BUNDLED_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "India_States.geojson")
+CACHE_PATH = "/content/project_files/geo/india_states.npz"
+
+# simplification tolerance in degrees (0 keeps every vertex)
+LEVELS = {"full": 0.0, "medium": 0.005, "low": 0.02}
+SCALE = 10_000          # coordinates are stored as int32 multiples of 1e-4 degrees (~11 m)
+NAME_KEY = "ST_NM"
+
+
+# -------------------------------
+# Simplification
+# -------------------------------
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker on one closed ring (N x 2 array); never returns fewer than 4 points."""
+    if tolerance <= 0 or len(points) <= 4:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        seg = points[end] - points[start]
+        rel = points[start + 1:end] - points[start]
+        norm = np.hypot(seg[0], seg[1])
+        if norm == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            k = start + 1 + i
+            keep[k] = True
+            stack.append((start, k))
+            stack.append((k, end))
+    out = points[keep]
+    return out if len(out) >= 4 else points
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+# -------------------------------
+# Cache Build (GeoJSON -> .npz)
+# -------------------------------
+def fetch_geojson(url=GEOJSON_URL):
+    """The bundled GeoJSON, else the one at url; None (with a warning) when neither can be read."""
+    if os.path.exists(BUNDLED_GEOJSON):
+        with open(BUNDLED_GEOJSON, "rb") as f:
+            return json.loads(f.read())
+    try:
+        with urllib.request.urlopen(url, timeout=30) as r:
+            return json.loads(r.read())
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        print("⚠️ India GeoJSON unavailable:", e)
+        return None
+
+def build_cache(geojson=None, path=CACHE_PATH):
+    """Simplify every level and write the compact binary cache; returns the path (None if there is no GeoJSON)."""
+    geojson = geojson or fetch_geojson()
+    if geojson is None:
+        return None
+    features = geojson["features"]
+    arrays = {"names": np.array([f["properties"].get(NAME_KEY, "") for f in features])}
+    for level, tolerance in LEVELS.items():
+        coords, ring_ends, poly_ends, feature_ends = [], [], [], []
+        n_points = n_rings = 0
+        for feature in features:
+            for polygon in _polygons(feature["geometry"]):
+                for ring in polygon:
+                    pts = simplify_ring(np.asarray(ring, dtype=np.float64)[:, :2], tolerance)
+                    coords.append(np.round(pts * SCALE).astype(np.int32))
+                    n_points += len(pts)
+                    ring_ends.append(n_points)
+                n_rings = len(ring_ends)
+                poly_ends.append(n_rings)
+            feature_ends.append(len(poly_ends))
+        arrays[f"{level}_coords"] = np.concatenate(coords) if coords else np.zeros((0, 2), np.int32)
+        arrays[f"{level}_rings"] = np.array(ring_ends, dtype=np.int64)
+        arrays[f"{level}_polys"] = np.array(poly_ends, dtype=np.int64)
+        arrays[f"{level}_features"] = np.array(feature_ends, dtype=np.int64)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+# -------------------------------
+# Loader (.npz -> GeoJSON dict, once per process)
+# -------------------------------
+def load_india_geojson(level="medium", path=CACHE_PATH):
+    """Return the state boundaries at one simplification level, building the cache on first use."""
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level '{level}' (choose from {', '.join(LEVELS)})")
+    if not os.path.exists(path) and build_cache(path=path) is None:
+        return {"type": "FeatureCollection", "features": []}
+    return _load_level(level, path)
+
+@lru_cache(maxsize=None)
+def _load_level(level, path):
+    data = np.load(path)
+    coords = (data[f"{level}_coords"] / SCALE).round(4).tolist()
+    ring_ends, poly_ends, feature_ends = (data[f"{level}_{k}"].tolist() for k in ("rings", "polys", "features"))
+
+    features, ring, poly = [], 0, 0
+    start = 0
+    for name, feature_end in zip(data["names"].tolist(), feature_ends):
+        polygons = []
+        while poly < feature_end:
+            rings = []
+            while ring < poly_ends[poly]:
+                rings.append(coords[start:ring_ends[ring]])
+                start = ring_ends[ring]
+                ring += 1
+            polygons.append(rings)
+            poly += 1
+        features.append({"type": "Feature", "properties": {NAME_KEY: name},
+                         "geometry": {"type": "MultiPolygon", "coordinates": polygons}})
+    return {"type": "FeatureCollection", "features": features}
+
+if __name__ == "__main__":
+    path = build_cache()
+    for level in LEVELS:
+        size = len(json.dumps(load_india_geojson(level)))
+        print(f"✅ {level}: {size / 1024:.0f} KB of GeoJSON")
+    print("Cache written to", path)
@@ -0,0 +1,167 @@
+"""
+Growth analytics over per-period totals
+---------------------------------------
+For each series (a measure summed by one dimension: state, category, brand,
+district) the totals per (year, quarter) are read once per DB generation, as
+a single GROUP BY that the rollup tables answer where they can. From that
+matrix every period pair is computed in one vectorized pass:
+  growth_percent  (end - start) / start
+  cagr_percent    (end / start) ** (1 / years between) - 1
+at year and quarter granularity, so YoY, QoQ and any start/end window the
+dashboard picks are lookups, not new scans.
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+import rollups
+import result_cache
+import topk
+
+CRORE = 10_000_000
+
+# series -> (table, dimension, measure, filter)
+SERIES = {
+    "transaction.state": ("aggregated_transaction", "state", "SUM(amount)", ""),
+    "transaction.category": ("aggregated_transaction", "category", "SUM(amount)", ""),
+    "insurance.state": ("aggregated_insurance", "state", "SUM(amount)", ""),
+    "users.brand": ("aggregated_user", "brand", "SUM(count)", "WHERE brand != 'TOTAL'"),
+    "transaction.district": ("map_transaction", "district", "SUM(amount)", ""),
+    "users.district": ("map_user", "district", "SUM(registeredUsers)", ""),
+}
+
+
+def period_totals(conn, series):
+    """(key, year, quarter, total) rows for one series."""
+    table, dimension, measure, where = SERIES[series]
+    sql = rollups.grouped_query(table, (dimension, "year", "quarter"), {"total": measure}, where,
+                                rollups.available_rollups(conn))
+    return pd.read_sql_query(sql, conn).rename(columns={dimension: "key"})
+
+def _all_pairs(values, periods, spans):
+    """Growth and CAGR (in %) for every key and every (start, end) period pair -> arrays [key, start, end]."""
+    start, end = values[:, :, None], values[:, None, :]
+    span = spans[None, :] - spans[:, None]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = np.where(start > 0, (end - start) / start * 100, np.nan)
+        cagr = np.where((start > 0) & (end >= 0) & (span > 0), ((end / start) ** (1 / span) - 1) * 100, np.nan)
+    return {"periods": periods, "index": {p: i for i, p in enumerate(periods)},
+            "values": values, "growth": growth, "cagr": cagr}
+
+
+class GrowthTable:
+    """Every period pair of one series, at year and quarter granularity."""
+
+    def __init__(self, totals, dimension):
+        self.dimension = dimension
+        pivot = totals.pivot_table(index="key", columns=["year", "quarter"], values="total",
+                                   aggfunc="sum", fill_value=0.0)
+        self.keys = pivot.index.to_numpy()
+        quarters = [(int(y), int(q)) for y, q in pivot.columns]
+        by_quarter = pivot.to_numpy(dtype=float)
+        years = sorted({y for y, _ in quarters})
+        by_year = np.stack([by_quarter[:, [i for i, (y, _) in enumerate(quarters) if y == year]].sum(axis=1)
+                            for year in years], axis=1) if years else by_quarter
+        self.levels = {
+            "year": _all_pairs(by_year, years, np.array(years, dtype=float)),
+            "quarter": _all_pairs(by_quarter, quarters, np.array([y + (q - 1) / 4 for y, q in quarters])),
+        }
+
+    def periods(self, level="year"):
+        return list(self.levels[level]["periods"])
+
+    def compare(self, start, end):
+        """
+        DataFrame [dimension, start_value, end_value, growth_percent, cagr_percent] for one pair.
+        Periods are years (2022) or (year, quarter) tuples; None means the first / last period.
+        A period missing from the data counts as 0 for every key, as the SQL's CASE ... ELSE 0
+        did: growth is NULL from a missing start and -100% to a missing end.
+        """
+        level = "quarter" if isinstance(start, tuple) or isinstance(end, tuple) else "year"
+        pairs = self.levels[level]
+        periods = pairs["periods"]
+        start = periods[0] if start is None and periods else start
+        end = periods[-1] if end is None and periods else end
+        if start is None or end is None:
+            columns = [self.dimension, "start_value", "end_value", "growth_percent", "cagr_percent"]
+            return pd.DataFrame(columns=columns)
+        if start in pairs["index"] and end in pairs["index"]:
+            i, j = pairs["index"][start], pairs["index"][end]
+            growth, cagr = pairs["growth"][:, i, j], pairs["cagr"][:, i, j]
+            start_values, end_values = pairs["values"][:, i], pairs["values"][:, j]
+        else:
+            column = lambda p: pairs["values"][:, pairs["index"][p]] if p in pairs["index"] else np.zeros(len(self.keys))
+            position = lambda p: p[0] + (p[1] - 1) / 4 if level == "quarter" else p
+            start_values, end_values = column(start), column(end)
+            pair = _all_pairs(np.stack([start_values, end_values], axis=1), [start, end],
+                              np.array([position(start), position(end)], dtype=float))
+            growth, cagr = pair["growth"][:, 0, 1], pair["cagr"][:, 0, 1]
+        return pd.DataFrame({self.dimension: self.keys, "start_value": start_values, "end_value": end_values,
+                             "growth_percent": growth, "cagr_percent": cagr})
+
+
+class GrowthEngine:
+    """GrowthTables per series, built on first use and dropped when the DB's build token changes."""
+
+    def __init__(self):
+        self.generation = None
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def table(self, conn, series):
+        generation = result_cache.get_generation(conn)
+        with self._lock:
+            if generation != self.generation:
+                self.tables = {}
+                self.generation = generation
+            table = self.tables.get(series)
+        if table is None:
+            table = GrowthTable(period_totals(conn, series), SERIES[series][1])
+            with self._lock:
+                if generation == self.generation:
+                    self.tables[series] = table
+        return table
+
+    def periods(self, conn, series, level="year"):
+        return self.table(conn, series).periods(level)
+
+    def growth(self, conn, series, start=None, end=None, limit=None):
+        """
+        Keys ranked by growth between start and end. Keys without a positive start value
+        have NULL growth and rank last, where ORDER BY growth_percent DESC put them.
+        """
+        df = self.table(conn, series).compare(start, end)
+        ranking = np.nan_to_num(df["growth_percent"].to_numpy(dtype=float), nan=-np.inf)
+        return df.iloc[topk.top_indices(ranking, limit)].reset_index(drop=True)
+
+    def yoy(self, conn, series, year, limit=None):
+        return self.growth(conn, series, year - 1, year, limit)
+
+    def qoq(self, conn, series, year, quarter, limit=None):
+        previous = (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+        return self.growth(conn, series, previous, (year, quarter), limit)
+
+    def reset(self):
+        with self._lock:
+            self.generation = None
+            self.tables = {}
+
+    def stats(self):
+        with self._lock:
+            return {"generation": self.generation, "series": sorted(self.tables)}
+
+ENGINE = GrowthEngine()
+
+
+def growth_frame(conn, series, start_year=None, end_year=None, start_quarter=None, end_quarter=None,
+                 limit=None, engine=None):
+    """
+    Registry-facing shape: [dimension, amount_start_cr, amount_end_cr, growth_percent, cagr_percent].
+    With start_quarter / end_quarter the periods are quarters, else whole years.
+    """
+    start = (start_year, start_quarter) if start_quarter else start_year
+    end = (end_year, end_quarter) if end_quarter else end_year
+    df = (engine or ENGINE).growth(conn, series, start, end, limit)
+    df = df.rename(columns={"start_value": "amount_start_cr", "end_value": "amount_end_cr"})
+    df[["amount_start_cr", "amount_end_cr"]] /= CRORE
+    return df.round({"amount_start_cr": 2, "amount_end_cr": 2, "growth_percent": 2, "cagr_percent": 2})
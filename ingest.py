@@ -0,0 +1,392 @@
+"""
+Parallel ingestion engine for the PhonePe Pulse data tree
+---------------------------------------------------------
+Builds every table from a single pass over pulse/data:
+1. Walks each dataset folder and groups its files into (state, year) chunks
+2. Parses the chunks on a process pool
+3. Streams the parsed rows into one batched writer per table
+"""
+
+import os, sys, time, sqlite3, glob, hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import fast_json, schema, rollups, columnar, db_pool, result_cache, ingest_profile, bulk_loader
+
+DB_PATH = "/content/project_files/phonepe_pulse.db"
+BASE_PATH = "/content/pulse/data"
+
+
+# -------------------------------
+# File Parsers (one JSON file -> generator of rows)
+# -------------------------------
+def parse_transaction_file(data, state, year, quarter):
+    """transactionData -> yields [state, year, quarter, category, type, count, amount]"""
+    if "data" in data and "transactionData" in data["data"] and data["data"]["transactionData"] is not None:
+        for entry in data["data"]["transactionData"]:
+            category = entry.get("name")
+            for pi in entry.get("paymentInstruments", []):
+                yield [
+                    state, year, quarter, category,
+                    pi.get("type"), pi.get("count"), pi.get("amount")
+                ]
+
+def parse_user_file(data, state, year, quarter):
+    """usersByDevice + aggregated totals -> yields [state, year, quarter, brand, count, percentage]"""
+    if "data" in data:
+        # ✅ extract device-level info
+        if "usersByDevice" in data["data"] and data["data"]["usersByDevice"] is not None:
+            for entry in data["data"]["usersByDevice"]:
+                yield [
+                    state, year, quarter,
+                    entry.get("brand"), entry.get("count"), entry.get("percentage")
+                ]
+
+        # ✅ also extract aggregated totals (registered users & app opens)
+        if "aggregated" in data["data"] and data["data"]["aggregated"] is not None:
+            agg = data["data"]["aggregated"]
+            yield [
+                state, year, quarter,
+                "TOTAL", agg.get("registeredUsers"), agg.get("appOpens")
+            ]
+
+def parse_map_file(data, state, year, quarter):
+    """hoverDataList -> yields [state, year, quarter, district, type, count, amount]"""
+    if "data" in data and data["data"].get("hoverDataList") is not None:
+        for entry in data["data"]["hoverDataList"]:
+            district = entry.get("name")
+            for metric in entry.get("metric") or []:
+                yield [
+                    state, year, quarter, district,
+                    metric.get("type"), metric.get("count"), metric.get("amount")
+                ]
+
+def parse_map_user_file(data, state, year, quarter):
+    """hoverData {district: {registeredUsers, appOpens}} -> yields [state, year, quarter, district, users, opens]"""
+    if "data" in data and data["data"].get("hoverData") is not None:
+        for district, entry in data["data"]["hoverData"].items():
+            yield [
+                state, year, quarter, district,
+                entry.get("registeredUsers"), entry.get("appOpens")
+            ]
+
+def parse_top_file(data, state, year, quarter):
+    """districts + pincodes lists -> yields [state, year, quarter, level, entityName, type, count, amount]"""
+    if "data" in data:
+        for level in schema.LEVELS:
+            for entry in data["data"].get(level) or []:
+                metric = entry.get("metric") or {}
+                yield [
+                    state, year, quarter, level, entry.get("entityName"),
+                    metric.get("type"), metric.get("count"), metric.get("amount")
+                ]
+
+def parse_top_user_file(data, state, year, quarter):
+    """districts + pincodes lists -> yields [state, year, quarter, level, entityName, registeredUsers]"""
+    if "data" in data:
+        for level in schema.LEVELS:
+            for entry in data["data"].get(level) or []:
+                yield [state, year, quarter, level, entry.get("name"), entry.get("registeredUsers")]
+
+
+# -------------------------------
+# Dataset Registry
+# -------------------------------
+DATASETS = {
+    "aggregated_transaction": {"folder": "aggregated/transaction/country/india/state",
+                               "parser": parse_transaction_file},
+    "aggregated_user":        {"folder": "aggregated/user/country/india/state",
+                               "parser": parse_user_file},
+    "aggregated_insurance":   {"folder": "aggregated/insurance/country/india/state",
+                               "parser": parse_transaction_file},
+    "map_transaction":        {"folder": "map/transaction/hover/country/india/state",
+                               "parser": parse_map_file},
+    "map_user":               {"folder": "map/user/hover/country/india/state",
+                               "parser": parse_map_user_file},
+    "map_insurance":          {"folder": "map/insurance/hover/country/india/state",
+                               "parser": parse_map_file},
+    "top_transaction":        {"folder": "top/transaction/country/india/state",
+                               "parser": parse_top_file},
+    "top_user":               {"folder": "top/user/country/india/state",
+                               "parser": parse_top_user_file},
+    "top_insurance":          {"folder": "top/insurance/country/india/state",
+                               "parser": parse_top_file},
+}
+
+
+# -------------------------------
+# Chunking + Parallel Parsing
+# -------------------------------
+def file_key(file):
+    """Return (state, year, quarter) from a .../state/<state>/<year>/<quarter>.json path."""
+    parts = file.split(os.sep)
+    return parts[-3], int(parts[-2]), int(parts[-1].replace(".json", ""))
+
+def scan_files(base_path, tables=None):
+    """Return [(table, file, size, mtime)] for every dataset file under base_path."""
+    entries = []
+    for table in tables or DATASETS:
+        folder = os.path.join(base_path, DATASETS[table]["folder"])
+        for file in sorted(glob.glob(os.path.join(folder, "*", "*", "*.json"))):
+            st = os.stat(file)
+            entries.append((table, file, st.st_size, st.st_mtime))
+    return entries
+
+def find_chunks(entries):
+    """Group (table, file, ...) entries into (table, [files]) chunks, one per state/year folder."""
+    chunks = {}
+    for table, file, *_ in entries:
+        chunks.setdefault((table, os.path.dirname(file)), []).append(file)
+    return [(table, files) for (table, _), files in chunks.items()]
+
+def iter_chunk(chunk, profiler=None):
+    """
+    Lazily parse one (table, state/year) chunk -> yields (file, sha1, row generator).
+    With a PhaseProfiler the rows are built eagerly so io / decode / rows can be timed apart.
+    """
+    table, files = chunk
+    parser = DATASETS[table]["parser"]
+    for file in files:
+        state, year, quarter = file_key(file)
+        start = time.perf_counter()
+        with open(file, "rb") as f:
+            raw = f.read()
+        read = time.perf_counter()
+        data = fast_json.decode(raw)
+        decoded = time.perf_counter()
+        rows = parser(data, state, year, quarter)
+        if profiler:
+            rows = list(rows)
+            built = time.perf_counter()
+            profiler.add(table, "io", read - start, files=1, nbytes=len(raw))
+            profiler.add(table, "decode", decoded - read, files=1, nbytes=len(raw))
+            profiler.add(table, "rows", built - decoded, rows=len(rows))
+        yield file, hashlib.sha1(raw).hexdigest(), rows
+    if profiler:
+        profiler.sample_rss(table, ("io", "decode", "rows"))
+
+def parse_chunk(chunk, profile=False):
+    """
+    Worker: parse one chunk eagerly so it can be shipped back
+    -> (table, [(file, sha1, rows)], this worker's phase stats or None).
+    """
+    profiler = ingest_profile.PhaseProfiler() if profile else None
+    parsed = [(file, sha1, list(rows)) for file, sha1, rows in iter_chunk(chunk, profiler)]
+    return chunk[0], parsed, profiler.stats if profiler else None
+
+
+# -------------------------------
+# File Manifest
+# -------------------------------
+MANIFEST_TABLE = "ingest_manifest"
+
+def ensure_manifest(conn):
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+        path TEXT PRIMARY KEY, table_name TEXT, state TEXT, year INTEGER, quarter INTEGER,
+        size INTEGER, mtime REAL, sha1 TEXT)""")
+
+def load_manifest(conn, tables):
+    """Return {path: (table_name, size, mtime, sha1)} for the selected tables."""
+    ensure_manifest(conn)
+    marks = ",".join("?" * len(tables))
+    rows = conn.execute(
+        f"SELECT path, table_name, size, mtime, sha1 FROM {MANIFEST_TABLE} WHERE table_name IN ({marks})",
+        tables).fetchall()
+    return {path: (table, size, mtime, sha1) for path, table, size, mtime, sha1 in rows}
+
+def delete_partition(conn, table, state, year, quarter):
+    """Drop the rows one state/year/quarter.json file contributed to a table."""
+    if schema.object_type(conn, schema.storage_table(table)) == "table":
+        conn.execute(f"DELETE FROM {schema.storage_table(table)} WHERE {schema.partition_filter(table)}",
+                     (state, year, quarter))
+
+
+# -------------------------------
+# Ingest
+# -------------------------------
+MAX_MEMORY_MB = 256
+
+
+def ingest_tables(base_path, conn, tables=None, workers=None, incremental=False,
+                  batch_size=bulk_loader.BATCH_SIZE, max_memory_mb=MAX_MEMORY_MB, profiler=None, side_file=False):
+    """
+    Stream the selected tables (default: all nine) from base_path into conn in one transaction.
+    incremental=True only re-parses files that are new or changed since the manifest was
+    written, and replaces just their (state, year, quarter) rows.
+    workers=1 parses in-process; otherwise a process pool of `workers` (default: CPU count).
+    max_memory_mb caps the rows buffered across all writers; at most two chunks per worker
+    are in flight, so peak memory does not grow with the number of years ingested.
+    profiler (an ingest_profile.PhaseProfiler) collects per-table, per-phase timings.
+    The load runs under bulk_loader.bulk_session(). Only side_file=True (a build file no reader
+    has opened, see atomic_rebuild) drops the journal to memory and turns synchronous off; a
+    load into the live DB keeps its journal, so a crash mid-commit cannot corrupt it.
+    """
+    start = time.perf_counter()
+    with bulk_loader.bulk_session(conn, journal=side_file):
+        written = _ingest_tables(base_path, conn, tables, workers, incremental, batch_size, max_memory_mb, profiler)
+    bulk_loader.report(written, time.perf_counter() - start)
+    return written
+
+def _ingest_tables(base_path, conn, tables, workers, incremental, batch_size, max_memory_mb, profiler):
+    tables = list(tables or DATASETS)
+    phases = profiler or ingest_profile.NullProfiler()
+    entries = []
+    for table in tables:
+        with phases.phase(table, "glob") as counters:
+            found = scan_files(base_path, [table])
+            counters.update(files=len(found), nbytes=sum(e[2] for e in found))
+        entries += found
+    manifest = load_manifest(conn, tables)
+    changed = {}  # table -> {(state, year, quarter)} replaced during an incremental run
+
+    if incremental:
+        # unchanged size + mtime => skip without reading the file
+        todo = [e for e in entries if manifest.get(e[1], (None,))[1:3] != (e[2], e[3])]
+        seen = {e[1] for e in entries}
+        for path, (table, *_) in manifest.items():
+            if path not in seen:
+                delete_partition(conn, table, *file_key(path))
+                changed.setdefault(table, set()).add(file_key(path))
+                conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE path = ?", (path,))
+    else:
+        todo = entries
+        marks = ",".join("?" * len(tables))
+        conn.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name IN ({marks})", tables)
+        # emptied up front: a table whose files are all gone must not keep rows its manifest no longer covers
+        for table in tables:
+            schema.ensure_table(conn, table, replace=True)
+
+    stats = {e[1]: e[2:] for e in todo}
+    chunks = find_chunks(todo)
+    budget = max_memory_mb * 1024 * 1024 // len(tables)
+    encoder = schema.DimensionEncoder(conn)
+    writers = {table: bulk_loader.TableWriter(conn, table, incremental, batch_size, budget, encoder) for table in tables}
+
+    def apply(table, parsed, worker_phases=None):
+        if worker_phases:
+            phases.merge(worker_phases)
+        for file, sha1, rows in parsed:
+            state, year, quarter = file_key(file)
+            previous = manifest.get(file)
+            if not incremental or previous is None or previous[3] != sha1:
+                if incremental:
+                    delete_partition(conn, table, state, year, quarter)
+                    changed.setdefault(table, set()).add((state, year, quarter))
+                with phases.phase(table, "write") as counters:
+                    before = writers[table].rows_written + len(writers[table].buffer)
+                    writers[table].add(rows)
+                    counters["rows"] = writers[table].rows_written + len(writers[table].buffer) - before
+            conn.execute(f"INSERT OR REPLACE INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (file, table, state, year, quarter, *stats[file], sha1))
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            apply(chunk[0], iter_chunk(chunk, profiler))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(parse_chunk, chunk, profiler is not None))
+                if len(pending) >= workers * 2:
+                    apply(*pending.popleft().result())
+            while pending:
+                apply(*pending.popleft().result())
+
+    for table, writer in writers.items():
+        with phases.phase(table, "write"):
+            writer.flush()
+    # indexes and rollups are built once the bulk load is done
+    with phases.phase(ingest_profile.ALL, "index"):
+        schema.create_indexes(conn, tables)
+    with phases.phase(ingest_profile.ALL, "rollups"):
+        if incremental:
+            rollups.refresh_rollups(conn, changed)
+        else:
+            rollups.build_rollups(conn, tables)
+    with phases.phase(ingest_profile.ALL, "analyze"):
+        bulk_loader.analyze(conn, tables)
+    with phases.phase(ingest_profile.ALL, "commit"):
+        result_cache.bump_generation(conn)
+        conn.commit()
+    if incremental:
+        print(f"🔄 {len(todo)} new or changed files out of {len(entries)}")
+    for writer in writers.values():
+        writer.close()
+    return {table: w.rows_written for table, w in writers.items()}
+
+def prebuild_figures(conn):
+    import figure_cache  # plotly is only needed when prebuilding
+    figure_cache.prebuild_overview(conn)
+
+def build_db(db_path=DB_PATH, base_path=BASE_PATH, tables=None, workers=None, columnar_dir=None,
+             prebuild=False, profiler=None, side_file=False, batch_size=bulk_loader.BATCH_SIZE,
+             max_memory_mb=MAX_MEMORY_MB):
+    """
+    Full build. columnar_dir additionally writes the memory-mapped columnar store there;
+    prebuild=True renders every Overview figure for the new generation.
+    batch_size / max_memory_mb bound the writers' buffers (see ingest_tables).
+    """
+    phases = profiler or ingest_profile.NullProfiler()
+    conn = sqlite3.connect(db_path)
+    db_pool.enable_wal(conn)
+    ingest_tables(base_path, conn, tables=tables, workers=workers, batch_size=batch_size,
+                  max_memory_mb=max_memory_mb, profiler=profiler, side_file=side_file)
+    if columnar_dir:
+        with phases.phase(ingest_profile.ALL, "columnar"):
+            columnar.write_store(conn, columnar_dir, tables)
+    if prebuild:
+        with phases.phase(ingest_profile.ALL, "figures"):
+            prebuild_figures(conn)
+    return conn
+
+def refresh_db(db_path=DB_PATH, base_path=BASE_PATH, tables=None, workers=None, columnar_dir=None,
+               prebuild=False, profiler=None, side_file=False, batch_size=bulk_loader.BATCH_SIZE,
+               max_memory_mb=MAX_MEMORY_MB):
+    """Incremental build: only new or changed state/year/quarter files are re-ingested."""
+    phases = profiler or ingest_profile.NullProfiler()
+    conn = sqlite3.connect(db_path)
+    db_pool.enable_wal(conn)
+    previous = result_cache.get_generation(conn)
+    written = ingest_tables(base_path, conn, tables=tables, workers=workers, incremental=True, batch_size=batch_size,
+                            max_memory_mb=max_memory_mb, profiler=profiler, side_file=side_file)
+    if columnar_dir:
+        # a new store for the new generation; tables the refresh did not touch are linked from the old one
+        with phases.phase(ingest_profile.ALL, "columnar"):
+            columnar.write_store(conn, columnar_dir, [t for t, n in written.items() if n], base_generation=previous)
+    if prebuild:
+        with phases.phase(ingest_profile.ALL, "figures"):
+            prebuild_figures(conn)
+    return conn
+
+def main(build, argv):
+    """
+    Shared command line for ingest.py and the extract_* scripts:
+    --profile prints the per-phase breakdown, --cprofile PATH also dumps pstats + collapsed
+    stacks (cProfile only sees this process, so it is combined with one in-process worker).
+    --max-memory-mb N caps the rows buffered across all table writers (default MAX_MEMORY_MB).
+    """
+    profiler = ingest_profile.PhaseProfiler() if "--profile" in argv or "--cprofile" in argv else None
+    limits = {}
+    if "--max-memory-mb" in argv:
+        limits["max_memory_mb"] = int(argv[argv.index("--max-memory-mb") + 1])
+    if "--cprofile" in argv:
+        out = argv[argv.index("--cprofile") + 1]
+        conn = ingest_profile.run_cprofile(build, out, profiler=profiler, workers=1, **limits)
+    else:
+        conn = build(profiler=profiler, **limits)
+    if profiler:
+        profiler.report()
+    return conn
+
+if __name__ == "__main__":
+    options = {"columnar_dir": columnar.COLUMNAR_DIR if "--columnar" in sys.argv else None,
+               "prebuild": "--prebuild-figures" in sys.argv}
+    if "--in-place" in sys.argv:
+        # writes the DB readers have open, so the load keeps its journal and synchronous setting
+        build = refresh_db if "--refresh" in sys.argv else build_db
+    else:
+        import atomic_rebuild  # side-file build + validated symlink swap, so the dashboard never sees a partial DB
+        options["incremental"] = "--refresh" in sys.argv
+        build = atomic_rebuild.rebuild
+    conn = main(lambda **kw: build(**options, **kw), sys.argv)
+    print("Tables in DB:", conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall())
@@ -0,0 +1,142 @@
+"""
+Phase-level ingest profiling
+----------------------------
+PhaseProfiler accumulates, per table and phase (glob, io, decode, rows,
+dataframe, write, index, analyze, rollups, commit), the files, rows and bytes
+handled, the seconds spent and the process's max RSS (getrusage ru_maxrss, the
+high-water mark since start) when the phase ended. A spike inside a phase shows
+up there; a phase that stays below an earlier peak reports that earlier peak.
+Worker processes profile their own phases and the results are merged.
+
+run_cprofile() additionally dumps a pstats file plus collapsed stacks
+(<out>.collapsed, one "a;b;c <microseconds>" line per stack) for flame graphs.
+"""
+
+import os, sys, json, time, resource, cProfile, pstats
+from contextlib import contextmanager
+
+PHASES = ("glob", "io", "decode", "rows", "dataframe", "write", "index", "analyze", "rollups", "columnar", "figures", "commit")
+ALL = "(all)"   # table key for phases that cover every table at once
+
+
+def max_rss_mb():
+    """This process's RSS high-water mark so far (one getrusage call, no /proc reads)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 1024   # bytes on macOS, KiB elsewhere
+
+
+class PhaseProfiler:
+    """{table: {phase: {files, rows, bytes, seconds, max_rss_mb}}}; picklable, mergeable."""
+
+    def __init__(self):
+        self.stats = {}
+
+    def add(self, table, phase, seconds=0.0, files=0, rows=0, nbytes=0, rss_mb=None):
+        """Accumulate counters; rss_mb (when sampled) raises the phase's max RSS."""
+        entry = self.stats.setdefault(table, {}).setdefault(
+            phase, {"files": 0, "rows": 0, "bytes": 0, "seconds": 0.0, "max_rss_mb": 0.0})
+        entry["files"] += files
+        entry["rows"] += rows
+        entry["bytes"] += nbytes
+        entry["seconds"] += seconds
+        if rss_mb is not None:
+            entry["max_rss_mb"] = max(entry["max_rss_mb"], rss_mb)
+
+    def sample_rss(self, table, phases):
+        """Record the max RSS once for phases timed file by file (call once per chunk)."""
+        rss = max_rss_mb()
+        for phase in phases:
+            self.add(table, phase, rss_mb=rss)
+
+    @contextmanager
+    def phase(self, table, phase):
+        """Time a block; the block may fill the yielded counters (files / rows / nbytes)."""
+        counters = {"files": 0, "rows": 0, "nbytes": 0}
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.add(table, phase, time.perf_counter() - start, rss_mb=max_rss_mb(), **counters)
+
+    def merge(self, stats):
+        """Fold in another profiler's stats (e.g. returned by a worker process)."""
+        for table, phases in stats.items():
+            for phase, e in phases.items():
+                self.add(table, phase, e["seconds"], e["files"], e["rows"], e["bytes"], e["max_rss_mb"])
+
+    def report(self):
+        order = {p: i for i, p in enumerate(PHASES)}
+        print("📊 Ingest profile (with a process pool, io/decode/rows are summed across the workers; "
+              "max RSS is the process high-water mark when the phase ended)")
+        print(f"   {'table':<24} {'phase':<10} {'files':>7} {'rows':>10} {'MB':>9} {'seconds':>9} {'max RSS MB':>12}")
+        for table, phases in self.stats.items():
+            for phase, e in sorted(phases.items(), key=lambda kv: order.get(kv[0], len(order))):
+                print(f"   {table:<24} {phase:<10} {e['files']:>7} {e['rows']:>10} {e['bytes'] / 2**20:>9.1f} "
+                      f"{e['seconds']:>9.3f} {e['max_rss_mb']:>12.1f}")
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stats, f, indent=2)
+
+
+class NullProfiler(PhaseProfiler):
+    """Stand-in when profiling is off: phases run untimed and nothing is recorded."""
+
+    def add(self, *args, **kwargs):
+        pass
+
+    def sample_rss(self, table, phases):
+        pass
+
+    @contextmanager
+    def phase(self, table, phase):
+        yield {"files": 0, "rows": 0, "nbytes": 0}
+
+
+# -------------------------------
+# cProfile + Collapsed Stacks
+# -------------------------------
+def collapsed_stacks(stats):
+    """
+    Approximate collapsed stacks from a pstats.Stats call graph (cProfile keeps
+    caller->callee edges, not full stacks): each callee's time is split across
+    its callers in proportion to the cumulative time of each edge.
+    """
+    def label(func):
+        file, line, name = func
+        return f"{name} ({os.path.basename(file)}:{line})"
+
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [f for f, (*_, callers) in stats.stats.items() if not callers]
+
+    lines = {}
+    def walk(func, path, fraction, depth):
+        _, _, tt, ct, _ = stats.stats[func]
+        stack = path + [label(func)]
+        key = ";".join(stack)
+        lines[key] = lines.get(key, 0) + tt * fraction
+        if depth >= 64 or not ct:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            if label(callee) in stack:
+                continue   # recursion
+            callee_ct = stats.stats[callee][3]
+            if callee_ct:
+                walk(callee, stack, fraction * edge_ct / callee_ct, depth + 1)
+
+    for root in roots:
+        walk(root, [], 1.0, 0)
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in lines.items() if seconds * 1e6 >= 1]
+
+def run_cprofile(fn, out_path, *args, **kwargs):
+    """Run fn under cProfile; writes out_path (pstats) and out_path.collapsed. Returns fn's result."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    profiler.dump_stats(out_path)
+    with open(out_path + ".collapsed", "w") as f:
+        f.write("\n".join(collapsed_stacks(pstats.Stats(out_path))) + "\n")
+    print(f"📊 cProfile written to {out_path} (+ .collapsed for flame graphs)")
+    return result
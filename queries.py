@@ -0,0 +1,304 @@
+"""
+Central registry of named, parameterized queries
+------------------------------------------------
+Every case-study and dashboard query is defined once here. Values that used to
+be interpolated (state, brand, years, year/quarter, limits) are bound as named
+parameters, so each query is one SQL text -> one prepared statement in the
+connection's statement cache and one result-cache entry per parameter set.
+
+utils.run_query(conn, "case1.Q1", params={"limit": 5}) runs a registered query by name.
+Aggregates that group by state over an encoded table group by state_id and join
+dim_state for the result rows (see schema.grouped_sql).
+
+Computed queries (top-k and growth rankings) have no SQL: compute(conn, **params)
+returns the DataFrame from an in-memory engine (topk.ENGINE / growth.ENGINE) instead.
+"""
+
+from collections import namedtuple
+import growth
+import topk
+
+Query = namedtuple("Query", ["name", "sql", "defaults", "compute"], defaults=(None,))
+
+QUERIES = {}
+
+def register(name, sql, **defaults):
+    QUERIES[name] = Query(name, sql, defaults)
+    return QUERIES[name]
+
+def register_computed(name, compute, **defaults):
+    QUERIES[name] = Query(name, None, defaults, compute)
+    return QUERIES[name]
+
+def get(name):
+    return QUERIES[name]
+
+def bind(name, params=None):
+    """Return (sql, params) for a registered query, with defaults filled in."""
+    query = QUERIES[name]
+    return query.sql, {**query.defaults, **(params or {})}
+
+
+# -------------------------------
+# Case Study 1: Transaction Dynamics
+# -------------------------------
+register_computed("case1.Q1", lambda conn, **p: topk.top_frame(conn, "transaction", "state", "amount",
+                                                            "total_amount", **p), limit=10)
+
+register("case1.Q2", """
+SELECT year, SUM(amount) AS yearly_amount
+FROM aggregated_transaction
+GROUP BY year
+ORDER BY year;
+""")
+
+register("case1.Q3", """
+SELECT state, year, quarter, SUM(amount) AS total_amount
+FROM aggregated_transaction
+WHERE state = :state
+GROUP BY state, year, quarter
+ORDER BY year, quarter;
+""", state="karnataka")
+
+register("case1.Q4", """
+SELECT
+    category,
+    year,
+    ROUND(SUM(amount)/10000000, 2) AS total_amount_cr,
+    ROUND(SUM(amount) * 100.0 / SUM(SUM(amount)) OVER (PARTITION BY year), 2) AS category_share_percent
+FROM aggregated_transaction
+GROUP BY category, year
+ORDER BY year, total_amount_cr DESC;
+""")
+
+register_computed("case1.Q5", lambda conn, **p: growth.growth_frame(conn, "transaction.category", **p),
+                  start_year=2022, end_year=2023, limit=10)
+
+
+# -------------------------------
+# Case Study 2: Device Dominance
+# -------------------------------
+register_computed("case2.Q1", lambda conn, **p: topk.top_frame(conn, "users", "brand", "count", "total_users",
+                                                            exclude={"brand": "TOTAL"}, **p), limit=10)
+
+register("case2.Q2", """
+SELECT year, SUM(percentage) AS total_app_opens
+FROM aggregated_user
+WHERE brand = 'TOTAL'
+GROUP BY year
+ORDER BY year;
+""")
+
+register("case2.Q3", """WITH valid_year AS (
+    SELECT MAX(year) AS yr
+    FROM aggregated_user
+    WHERE brand != 'TOTAL'
+),
+top_state AS (
+    SELECT state_id
+    FROM aggregated_user
+    WHERE brand='TOTAL'
+    GROUP BY state_id
+    ORDER BY SUM(count) DESC
+    LIMIT 1
+)
+SELECT au.state, au.brand, SUM(au.count) AS total_users,
+       ROUND(SUM(au.count)*100.0 / SUM(SUM(au.count)) OVER(), 2) AS market_share_percent
+FROM aggregated_user au
+JOIN top_state ts ON au.state_id = ts.state_id
+JOIN valid_year vy ON au.year = vy.yr
+WHERE au.brand != 'TOTAL'
+GROUP BY au.state, au.brand
+ORDER BY total_users DESC;
+""")
+
+register_computed("case2.Q4", lambda conn, **p: topk.top_frame(conn, "users", "state", "count", "total_users", **p),
+                  brand="TOTAL", year="latest", limit=5)
+
+# the column keeps its original name for existing readers (CSV exports, the app chart) whatever :brand is
+register("case2.Q5", """
+SELECT year, quarter, SUM(count) AS xiaomi_users
+FROM aggregated_user
+WHERE brand = :brand
+GROUP BY year, quarter
+ORDER BY year, quarter;
+""", brand="Xiaomi")
+
+
+# -------------------------------
+# Case Study 3: Insurance Penetration
+# -------------------------------
+register_computed("case3.Q1", lambda conn, **p: topk.top_frame(conn, "insurance", "state", "amount",
+                                                            "total_insurance_amount", **p), limit=10)
+
+register("case3.Q2", """
+SELECT year, SUM(amount) AS yearly_insurance_amount
+FROM aggregated_insurance
+GROUP BY year
+ORDER BY year;
+""")
+
+register("case3.Q3", """
+WITH top_state AS (
+    SELECT state_id
+    FROM aggregated_insurance
+    GROUP BY state_id
+    ORDER BY SUM(amount) DESC
+    LIMIT 1
+)
+SELECT ai.state, ai.year, ai.quarter, SUM(ai.amount) AS quarterly_amount
+FROM aggregated_insurance ai
+JOIN top_state ts ON ai.state_id = ts.state_id
+GROUP BY ai.state, ai.year, ai.quarter
+ORDER BY ai.year, ai.quarter;
+""")
+
+# first -> last year of data (was MIN -> MAX of the yearly amounts)
+register_computed("case3.Q4", lambda conn, **p: growth.growth_frame(conn, "insurance.state", **p),
+                  start_year=None, end_year=None, limit=5)
+
+register("case3.Q5", """
+WITH insurance AS (
+    SELECT state, SUM(amount) AS insurance_amount
+    FROM aggregated_insurance
+    GROUP BY state
+),
+transactions AS (
+    SELECT state, SUM(amount) AS total_amount
+    FROM aggregated_transaction
+    GROUP BY state
+)
+SELECT t.state, insurance_amount, total_amount,
+       ROUND(CAST(insurance_amount AS FLOAT)/total_amount*100,2) AS penetration_percent
+FROM transactions t
+LEFT JOIN insurance i ON t.state = i.state
+ORDER BY penetration_percent DESC
+LIMIT :limit;
+""", limit=10)
+
+
+# -------------------------------
+# Case Study 4: User Engagement
+# -------------------------------
+register_computed("case4.Q1", lambda conn, **p: topk.top_frame(conn, "users", "state", "count", "total_users",
+                                                            year_column=True, **p),
+                  brand="TOTAL", year="latest", limit=10)
+
+register("case4.Q2", """
+SELECT year, SUM(count) AS yearly_users
+FROM aggregated_user
+WHERE brand = 'TOTAL'
+GROUP BY year
+ORDER BY year;
+""")
+
+register("case4.Q3", """
+WITH top_state AS (
+    SELECT state_id
+    FROM aggregated_user
+    WHERE brand = 'TOTAL'
+    GROUP BY state_id
+    ORDER BY SUM(count) DESC
+    LIMIT 1
+)
+SELECT au.state, au.year, au.quarter, SUM(au.percentage) AS total_app_opens
+FROM aggregated_user au
+JOIN top_state ts ON au.state_id = ts.state_id
+WHERE au.brand = 'TOTAL'
+GROUP BY au.state, au.year, au.quarter
+ORDER BY au.year, au.quarter;
+""")
+
+register_computed("case4.Q4", lambda conn, **p: topk.top_frame(conn, "district_users", "district", "registeredUsers",
+                                                            "total_users", year_column=True, **p),
+                  year="latest", limit=10)
+
+register("case4.Q5", """
+WITH totals AS (
+    SELECT state_id,
+           SUM(count) AS total_registered_users,
+           SUM(percentage) AS total_app_opens
+    FROM aggregated_user
+    WHERE brand = 'TOTAL'
+      AND year = (SELECT MAX(year) FROM aggregated_user)
+    GROUP BY state_id
+)
+SELECT ds.state,
+       total_registered_users,
+       total_app_opens,
+       ROUND(CAST(total_app_opens AS FLOAT)/total_registered_users,2) AS engagement_ratio
+FROM totals
+JOIN dim_state ds ON ds.state_id = totals.state_id
+ORDER BY engagement_ratio DESC
+LIMIT :limit;
+""", limit=10)
+
+
+# -------------------------------
+# Case Study 5: Geo-based Transactions
+# -------------------------------
+register_computed("case5.Q1", lambda conn, **p: topk.top_frame(conn, "transaction", "state", "amount",
+                                                            "total_amount", **p), year="latest", limit=10)
+
+register_computed("case5.Q2", lambda conn, **p: topk.top_frame(conn, "top_districts", "entityName", "amount",
+                                                            "total_amount", **p).rename(columns={"entityName": "district"}),
+                  limit=10)
+
+register_computed("case5.Q3", lambda conn, **p: growth.growth_frame(conn, "transaction.state", **p),
+                  start_year=2022, end_year=2023, limit=10)
+
+register("case5.Q4", """
+SELECT year, SUM(amount) AS yearly_amount
+FROM aggregated_transaction
+GROUP BY year
+ORDER BY year;
+""")
+
+register("case5.Q5", """
+WITH total AS (
+    SELECT SUM(amount) AS national_total
+    FROM aggregated_transaction
+    WHERE year = (SELECT MAX(year) FROM aggregated_transaction)
+)
+SELECT
+    state,
+    SUM(amount) AS state_total,
+    ROUND(SUM(amount)*100.0/(SELECT national_total FROM total),2) AS contribution_percent
+FROM aggregated_transaction
+WHERE year = (SELECT MAX(year) FROM aggregated_transaction)
+GROUP BY state
+ORDER BY state_total DESC
+LIMIT :limit;
+""", limit=10)
+
+
+# -------------------------------
+# Dashboard-only queries (app.py)
+# -------------------------------
+register("overview.transactions", """SELECT state, SUM(amount) as total_amount
+FROM aggregated_transaction
+WHERE year = :year AND quarter = :quarter
+GROUP BY state
+ORDER BY total_amount DESC;""", year=2024, quarter=1)
+
+register("overview.insurance", """SELECT state, SUM(amount) as total_amount
+FROM aggregated_insurance
+WHERE year = :year AND quarter = :quarter
+GROUP BY state
+ORDER BY total_amount DESC;""", year=2024, quarter=1)
+
+register("app.insurance_quarterly_state", """
+SELECT year, quarter, SUM(amount) AS quarterly_amount
+FROM aggregated_insurance
+WHERE state = :state
+GROUP BY year, quarter
+ORDER BY year, quarter;
+""", state="karnataka")
+
+register("app.app_opens_quarterly_state", """
+SELECT year, quarter, SUM(percentage) AS total_app_opens
+FROM aggregated_user
+WHERE brand = 'TOTAL' AND state = :state
+GROUP BY year, quarter
+ORDER BY year, quarter;
+""", state="karnataka")
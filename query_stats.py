@@ -0,0 +1,134 @@
+"""
+Query instrumentation
+---------------------
+Every query run through utils.run_query or the dashboard's load_data is timed
+and its result size recorded (rows and bytes materialized into the DataFrame).
+STATS keeps count / p50 / p95 / max per query in-process; queries slower than
+SLOW_QUERY_SECONDS (and failing ones) go to a rotating slow-query log together
+with their EXPLAIN QUERY PLAN.
+"""
+
+import os, time, logging, threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+import rollups
+import result_cache
+
+SLOW_QUERY_SECONDS = 0.5
+SLOW_LOG_PATH = "/content/project_files/logs/slow_queries.log"
+SLOW_LOG_BYTES = 5 * 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+SAMPLES = 1000          # durations kept per query for the percentiles
+
+
+# -------------------------------
+# In-process Statistics
+# -------------------------------
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+class QueryStats:
+    """Thread-safe per-query timings: count, errors, rows, bytes and a window of recent durations."""
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows=0, nbytes=0, error=False):
+        with self._lock:
+            entry = self.queries.get(name)
+            if entry is None:
+                entry = self.queries[name] = {"count": 0, "errors": 0, "rows": 0, "bytes": 0, "max": 0.0,
+                                              "durations": deque(maxlen=self.samples)}
+            entry["count"] += 1
+            entry["errors"] += error
+            entry["rows"] += rows
+            entry["bytes"] += nbytes
+            entry["max"] = max(entry["max"], seconds)
+            entry["durations"].append(seconds)
+
+    def summary(self):
+        """{name: {count, errors, p50, p95, max, rows, bytes}} (seconds; rows/bytes are totals)."""
+        with self._lock:
+            out = {}
+            for name, entry in self.queries.items():
+                durations = sorted(entry["durations"])
+                out[name] = {"count": entry["count"], "errors": entry["errors"],
+                             "p50": _percentile(durations, 50), "p95": _percentile(durations, 95),
+                             "max": entry["max"], "rows": entry["rows"], "bytes": entry["bytes"]}
+            return out
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+
+STATS = QueryStats()
+
+
+# -------------------------------
+# Slow-query Log
+# -------------------------------
+_logger = None
+_logger_lock = threading.Lock()
+
+def slow_log():
+    """The rotating slow-query logger, created on first use."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = logging.getLogger("phonepe_pulse.slow_queries")
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            try:
+                os.makedirs(os.path.dirname(SLOW_LOG_PATH), exist_ok=True)
+                handler = RotatingFileHandler(SLOW_LOG_PATH, maxBytes=SLOW_LOG_BYTES, backupCount=SLOW_LOG_BACKUPS)
+            except OSError as e:
+                print("⚠️ Slow-query log unavailable:", e)
+                handler = logging.NullHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            _logger.addHandler(handler)
+        return _logger
+
+def query_plan(conn, sql, params=None):
+    """EXPLAIN QUERY PLAN of sql as it actually runs (after rollup routing), one step per line."""
+    try:
+        sql = rollups.route_query(sql, rollups.available_rollups(conn))
+        return "\n".join(f"  {detail}" for *_, detail in conn.execute("EXPLAIN QUERY PLAN " + sql, params or ()))
+    except Exception as e:
+        return f"  (plan unavailable: {e})"
+
+def log_query(conn, name, sql, params, seconds, rows, error=None):
+    header = f"{name} {seconds * 1000:.1f} ms, {rows} rows, params={params!r}"
+    body = f"{result_cache.normalize_query(sql)}\n{query_plan(conn, sql, params)}" if sql else "  (computed in Python)"
+    if error:
+        slow_log().error(f"{header} failed: {error}\n{body}")
+    else:
+        slow_log().warning(f"{header}\n{body}")
+
+
+# -------------------------------
+# Instrumented Execution
+# -------------------------------
+def label(query, sql):
+    """Stats key: the registry name when there is one, else the start of the normalized SQL."""
+    return query if query != sql or sql is None else result_cache.normalize_query(sql)[:80]
+
+def timed(conn, name, sql, params, run):
+    """Run run() -> DataFrame, recording its cost under name; slow or failing queries are logged."""
+    start = time.perf_counter()
+    try:
+        df = run()
+    except Exception as e:
+        seconds = time.perf_counter() - start
+        STATS.record(name, seconds, error=True)
+        log_query(conn, name, sql, params, seconds, 0, error=e)
+        raise
+    seconds = time.perf_counter() - start
+    rows = len(df)
+    STATS.record(name, seconds, rows, int(df.memory_usage(deep=True).sum()))
+    if seconds >= SLOW_QUERY_SECONDS:
+        log_query(conn, name, sql, params, seconds, rows)
+    return df
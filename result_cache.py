@@ -0,0 +1,115 @@
+"""
+Ingest-generation-aware, size-bounded query result cache
+--------------------------------------------------------
+Results are keyed on (normalized SQL, parameters, DB generation). The generation
+is a build token "<n>-<uuid4>" stored in the DB's build_meta table and replaced
+by every ingest, so a rebuild invalidates all cached results automatically, and
+two DB files never share a generation even when both count their ingests from 1
+(n is also kept in PRAGMA user_version). Entries are evicted LRU once the cached
+DataFrames exceed max_bytes.
+"""
+
+import re
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MAX_CACHE_MB = 256
+META_TABLE = "build_meta"
+
+
+def ingest_count(conn):
+    """How many ingests built this DB (copied along when a build continues another one)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def get_generation(conn):
+    """The DB's build token; a DB no ingest has stamped yet reports "<n>" from user_version."""
+    try:
+        row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'generation'").fetchone()
+    except sqlite3.OperationalError:
+        row = None   # no build_meta table yet
+    return row[0] if row else str(ingest_count(conn))
+
+def bump_generation(conn):
+    """Mark the DB contents as changed; called at the end of every ingest (inside its transaction)."""
+    count = ingest_count(conn) + 1
+    generation = f"{count}-{uuid.uuid4().hex}"
+    conn.execute(f"PRAGMA user_version = {count}")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(f"INSERT OR REPLACE INTO {META_TABLE} VALUES ('generation', ?)", (generation,))
+    return generation
+
+def normalize_query(sql):
+    """Collapse whitespace and the trailing ';' so formatting differences share one entry."""
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+def params_key(params):
+    """Hashable form of positional (sequence) or named (dict) query parameters."""
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params or ())
+
+
+class ResultCache:
+    """Thread-safe LRU of DataFrames bounded by their in-memory footprint."""
+
+    def __init__(self, max_bytes=MAX_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()       # key -> (df, nbytes)
+        self.generation = None
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        _, nbytes = self.entries.pop(key)
+        self.bytes -= nbytes
+
+    def _set_generation(self, generation):
+        # a newer generation makes every cached result stale
+        if generation != self.generation:
+            self.evictions += len(self.entries)
+            self.entries.clear()
+            self.bytes = 0
+            self.generation = generation
+
+    def get(self, sql, params, generation):
+        key = (normalize_query(sql), params_key(params), generation)
+        with self._lock:
+            self._set_generation(generation)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0].copy()
+            self.misses += 1
+        return None
+
+    def put(self, sql, params, generation, df):
+        key = (normalize_query(sql), params_key(params), generation)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._set_generation(generation)
+            if nbytes > self.max_bytes:
+                return
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (df.copy(), nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def fetch(self, conn, sql, params, loader):
+        """Return the cached result for sql/params at conn's generation, running loader(conn, sql, params) on a miss."""
+        generation = get_generation(conn)
+        df = self.get(sql, params, generation)
+        if df is None:
+            df = loader(conn, sql, params)
+            self.put(sql, params, generation, df)
+        return df
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.bytes, "generation": self.generation}
@@ -0,0 +1,188 @@
+"""
+Rollup tables for the transaction and insurance fact tables
+-----------------------------------------------------------
+Pre-aggregated SUM(count) / SUM(amount) at four grains:
+1. national (year, quarter)
+2. (category, year)
+3. (state, year)
+4. (state, year, quarter)
+Built after a full ingest, patched for just the changed (state, year, quarter)
+keys after an incremental one. route_query() rewrites a query onto the smallest
+rollup that can answer it; grouped_query() builds an engine's GROUP BY on a rollup
+or, failing that, on the fact table's dimension ids.
+"""
+
+import re
+from functools import lru_cache
+import schema
+
+SOURCES = {"aggregated_transaction": "transaction", "aggregated_insurance": "insurance"}
+MEASURES = ("count", "amount")
+PARTITION_KEYS = ("state", "year", "quarter")
+
+# smallest grain first, so routing picks the first one that fits
+GRAINS = [
+    ("quarter", ("year", "quarter")),
+    ("category_year", ("category", "year")),
+    ("state_year", ("state", "year")),
+    ("state_quarter", ("state", "year", "quarter")),
+]
+
+
+def rollup_name(source, grain):
+    return f"rollup_{SOURCES[source]}_{grain}"
+
+def available_rollups(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'rollup_%'")}
+
+def _existing_sources(conn, sources):
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    # None means every source; an empty list means none (e.g. an incremental run with no changes)
+    return [s for s in (SOURCES if sources is None else sources) if s in SOURCES and s in tables]
+
+def _insert_sql(source, name, dims, where=""):
+    cols = ", ".join(dims)
+    return (f"INSERT INTO {name} ({cols}, count, amount) "
+            f"SELECT {cols}, SUM(count), SUM(amount) FROM {source} {where} GROUP BY {cols}")
+
+
+# -------------------------------
+# Build / Refresh
+# -------------------------------
+def build_rollups(conn, sources=None):
+    """(Re)build every rollup of the selected source tables from scratch."""
+    built = []
+    for source in _existing_sources(conn, sources):
+        for grain, dims in GRAINS:
+            name = rollup_name(source, grain)
+            conn.execute(f"DROP TABLE IF EXISTS {name}")
+            dim_cols = ", ".join(f"{d} {'TEXT' if d in ('state', 'category') else 'INTEGER'}" for d in dims)
+            conn.execute(f"CREATE TABLE {name} ({dim_cols}, count INTEGER, amount REAL, "
+                         f"PRIMARY KEY ({', '.join(dims)}))")
+            conn.execute(_insert_sql(source, name, dims))
+            built.append(name)
+    return built
+
+def refresh_rollups(conn, changed):
+    """
+    Patch the rollups after an incremental ingest.
+    changed = {source_table: {(state, year, quarter), ...}} for every file re-ingested or removed.
+    Only the rollup rows covering those keys are recomputed.
+    """
+    touched = [s for s, keys in changed.items() if keys and s in SOURCES]
+    if not touched:
+        return
+    existing = available_rollups(conn)
+    for source in _existing_sources(conn, touched):
+        if any(rollup_name(source, grain) not in existing for grain, _ in GRAINS):
+            build_rollups(conn, [source])
+            continue
+        for grain, dims in GRAINS:
+            name = rollup_name(source, grain)
+            key_cols = [k for k in PARTITION_KEYS if k in dims]
+            keys = {tuple(dict(zip(PARTITION_KEYS, key))[k] for k in key_cols) for key in changed.get(source, ())}
+            where = "WHERE " + " AND ".join(f"{k} = ?" for k in key_cols)
+            for key in keys:
+                conn.execute(f"DELETE FROM {name} {where}", key)
+                conn.execute(_insert_sql(source, name, dims, where), key)
+
+
+# -------------------------------
+# Query Routing
+# -------------------------------
+_SOURCE_COLUMNS = ("state", "year", "quarter", "category", "type")
+_SET_OPERATOR = re.compile(r"\b(?:UNION(?:\s+ALL)?|INTERSECT|EXCEPT)\b", re.I)
+_STAR = re.compile(r"(?:\bSELECT\s+(?:DISTINCT\s+)?|,\s*)(?:\w+\.)?\*", re.I)
+_FROM = re.compile(r"\bFROM\b(.*?)(?=\b(?:WHERE|GROUP|HAVING|ORDER|LIMIT|WINDOW)\b|$)", re.I | re.S)
+
+def route_query(sql, available):
+    """
+    Rewrite sql onto the smallest available rollup that can answer it, or return it unchanged.
+    A query is routable when it only reads SUM(count) / SUM(amount) plus dimension columns
+    the rollup keeps, never joins a fact table to another source (JOIN or comma: row
+    multiplicity would change), and every SELECT reading a fact table aggregates: a
+    GROUP BY, or SUM / MIN / MAX without one.
+    Row selects (SELECT *, bare columns) always stay on the fact table.
+    """
+    return _route(sql, frozenset(available))
+
+def grouped_query(table, dims, measures, where, available):
+    """
+    SELECT dims, measures ... GROUP BY dims (measures = {alias: aggregate}) on the smallest
+    available rollup, or else grouped by dimension id (schema.grouped_sql).
+    """
+    sums = ", ".join(f"{expr} AS {alias}" for alias, expr in measures.items())
+    sql = f"SELECT {', '.join(dims)}, {sums} FROM {table} {where} GROUP BY {', '.join(dims)}"
+    routed = route_query(sql, frozenset(available))
+    return routed if routed != sql else schema.grouped_sql(table, dims, measures, where)
+
+def _select_block(sql, pos):
+    """
+    The SELECT (between set operators) of the scope containing pos, with nested
+    parentheses emptied: "SELECT state, SUM() AS total FROM t GROUP BY state".
+    """
+    start, end, depth = 0, len(sql), 0
+    for i in range(pos - 1, -1, -1):
+        depth += {")": 1, "(": -1}.get(sql[i], 0)
+        if depth < 0:
+            start = i + 1
+            break
+    depth = 0
+    for i in range(pos, len(sql)):
+        depth += {"(": 1, ")": -1}.get(sql[i], 0)
+        if depth < 0:
+            end = i
+            break
+    flat, depth = [], 0
+    for i, ch in enumerate(sql[start:end], start):
+        if ch == ")":
+            depth -= 1
+        if depth == 0:
+            flat.append("\0" if i == pos else ch)   # mark the table reference
+        if ch == "(":
+            depth += 1
+    parts = _SET_OPERATOR.split("".join(flat))
+    return next(p for p in parts if "\0" in p)
+
+def _single_source(block):
+    """The FROM clause of block names one table (nested subqueries are already emptied)."""
+    match = _FROM.search(block)
+    return not match or ("," not in match.group(1) and not re.search(r"\bJOIN\b", match.group(1), re.I))
+
+def _aggregates(block):
+    if _STAR.search(block):
+        return False
+    if re.search(r"\bGROUP\s+BY\b", block, re.I):
+        return True
+    # without GROUP BY the whole select must collapse to one row (and not be a window over rows)
+    return bool(re.search(r"\b(SUM|MIN|MAX)\s*\(", block, re.I)) and not re.search(r"\bOVER\b", block, re.I)
+
+# the same (sql, rollups) pair always routes to the same text, so the
+# connection's prepared-statement cache sees one statement per registered query
+@lru_cache(maxsize=1024)
+def _route(sql, available):
+    sources = [s for s in SOURCES if re.search(rf"\b{s}\b", sql)]
+    if not sources:
+        return sql
+    if re.search(r"\b(COUNT|AVG)\s*\(", sql, re.I):
+        return sql
+    if re.search(r"\bJOIN\s+(" + "|".join(SOURCES) + r")\b", sql, re.I):
+        return sql
+    # every measure reference must sit directly inside SUM(...)
+    for m in re.finditer(r"(?:\w+\.)?\b(" + "|".join(MEASURES) + r")\b", sql):
+        if not re.search(r"SUM\s*\(\s*$", sql[:m.start()], re.I):
+            return sql
+    # every SELECT that reads a fact table must read only it, and aggregate it
+    for source in sources:
+        blocks = [_select_block(sql, m.start()) for m in re.finditer(rf"\b{source}\b", sql)]
+        if not all(_single_source(b) and _aggregates(b) for b in blocks):
+            return sql
+
+    needed = {c for c in _SOURCE_COLUMNS if re.search(rf"\b{c}\b", sql)}
+    for source in sources:
+        for grain, dims in GRAINS:
+            name = rollup_name(source, grain)
+            if needed <= set(dims) and name in available:
+                sql = re.sub(rf"\b{source}\b", name, sql)
+                break
+    return sql
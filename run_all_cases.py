@@ -0,0 +1,46 @@
+"""
+Run all five case studies
+-------------------------
+Executes the 25 case-study queries concurrently on a thread pool, each worker
+thread on its own pooled read-only connection (db_pool), with shared subresults
+computed once (case_runner). A full report takes about as long as the slowest
+query instead of the sum of all of them. The worker threads and their connections
+live for one run and are closed when it ends.
+
+    python run_all_cases.py [db_path] [workers]
+"""
+
+import sys, time
+import db_pool
+import case_runner
+
+DB_PATH = "/content/project_files/phonepe_pulse.db"
+WORKERS = 8
+
+
+def run_all_cases(db_path=DB_PATH, workers=WORKERS, verbose=True):
+    """
+    Returns ({case module: {title: DataFrame}}, {query name: seconds}) --
+    the same per-case dicts as caseN.run_all(), plus each query's wall time.
+    """
+    pool = db_pool.get_pool(db_path)
+    start = time.perf_counter()
+    with case_runner.PooledExecutor(pool, workers) as executor:
+        results, stats = case_runner.run_all_cases(None, verbose=verbose, pool=pool, executor=executor)
+    elapsed = time.perf_counter() - start
+    timings = stats["timings"]
+
+    if verbose:
+        for name, seconds in sorted(timings.items(), key=lambda kv: -kv[1]):
+            print(f"   {name:<10} {seconds * 1000:8.1f} ms")
+        print(f"✅ {len(timings)} queries in {elapsed:.2f}s wall "
+              f"(slowest {max(timings.values(), default=0):.2f}s, sum {sum(timings.values()):.2f}s, {workers} workers)")
+    return results, timings
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else WORKERS
+    try:
+        run_all_cases(db_path, workers)
+    finally:
+        db_pool.get_pool(db_path).close_all()
@@ -0,0 +1,321 @@
+"""
+Schema and index builder for the analytics tables
+-------------------------------------------------
+1. Explicit typed DDL for the nine pulse tables
+2. Dimension tables for repeated strings, integer-coded fact tables and
+   views that keep the original table and column names
+3. Composite / covering indexes picked from the case1-case5 and app.py queries,
+   created after the bulk load
+4. EXPLAIN QUERY PLAN check that flags queries still doing a full table scan
+"""
+
+import re
+import sqlite3
+
+DB_PATH = "/content/project_files/phonepe_pulse.db"
+
+# -------------------------------
+# Typed DDL
+# -------------------------------
+TRANSACTION_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"),
+                      ("category", "TEXT"), ("type", "TEXT"), ("count", "INTEGER"), ("amount", "REAL")]
+# TOTAL rows keep registeredUsers in `count` and appOpens in `percentage`
+USER_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"),
+               ("brand", "TEXT"), ("count", "INTEGER"), ("percentage", "REAL")]
+# map_* hover data: one row per district (and metric type) per state/year/quarter
+MAP_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"),
+              ("district", "TEXT"), ("type", "TEXT"), ("count", "INTEGER"), ("amount", "REAL")]
+MAP_USER_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"),
+                   ("district", "TEXT"), ("registeredUsers", "INTEGER"), ("appOpens", "INTEGER")]
+# top_* lists: one row per district or pincode entity, `level` says which list it came from
+TOP_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"), ("level", "TEXT"),
+              ("entityName", "TEXT"), ("type", "TEXT"), ("count", "INTEGER"), ("amount", "REAL")]
+TOP_USER_SCHEMA = [("state", "TEXT"), ("year", "INTEGER"), ("quarter", "INTEGER"), ("level", "TEXT"),
+                   ("entityName", "TEXT"), ("registeredUsers", "INTEGER")]
+
+TABLES = {
+    "aggregated_transaction": TRANSACTION_SCHEMA,
+    "aggregated_user": USER_SCHEMA,
+    "aggregated_insurance": TRANSACTION_SCHEMA,
+    "map_transaction": MAP_SCHEMA,
+    "map_user": MAP_USER_SCHEMA,
+    "map_insurance": MAP_SCHEMA,
+    "top_transaction": TOP_SCHEMA,
+    "top_user": TOP_USER_SCHEMA,
+    "top_insurance": TOP_SCHEMA,
+}
+
+def column_names(table):
+    return [name for name, _ in TABLES[table]]
+
+
+# -------------------------------
+# Dimension Encoding
+# -------------------------------
+# Repeated strings are stored once in dim_<column> (integer surrogate key);
+# fact_<table> keeps only the ids, and a view named <table> joins them back
+# so existing queries keep working unchanged. The view also exposes the ids
+# (<column>_id): hot aggregates group on those and join the strings per result
+# row (grouped_sql), instead of grouping every fact row on its joined string.
+DIMENSIONS = ("state", "category", "type", "brand", "district")
+ENCODED_TABLES = ("aggregated_transaction", "aggregated_user", "aggregated_insurance",
+                  "map_transaction", "map_user", "map_insurance")
+
+def dim_table(column):
+    return f"dim_{column}"
+
+def storage_table(table):
+    """Physical table that holds a logical table's rows."""
+    return f"fact_{table}" if table in ENCODED_TABLES else table
+
+def storage_column(table, column):
+    return f"{column}_id" if table in ENCODED_TABLES and column in DIMENSIONS else column
+
+def create_table_sql(table):
+    cols = ", ".join(f'"{storage_column(table, name)}" '
+                     f'{"INTEGER" if storage_column(table, name) != name else sql_type}'
+                     for name, sql_type in TABLES[table])
+    return f"CREATE TABLE IF NOT EXISTS {storage_table(table)} ({cols})"
+
+def create_view_sql(table):
+    fact = storage_table(table)
+    select, ids, joins = [], [], []
+    for name, _ in TABLES[table]:
+        if storage_column(table, name) != name:
+            dim = dim_table(name)
+            select.append(f"{dim}.{name} AS {name}")
+            ids.append(f"{fact}.{name}_id AS {name}_id")
+            joins.append(f"LEFT JOIN {dim} ON {dim}.{name}_id = {fact}.{name}_id")
+        else:
+            select.append(f'{fact}."{name}" AS "{name}"')
+    return f"CREATE VIEW IF NOT EXISTS {table} AS SELECT {', '.join(select + ids)} FROM {fact} {' '.join(joins)}"
+
+def grouped_sql(table, dims, measures, where=""):
+    """
+    SELECT dims, measures FROM table [where] GROUP BY dims, with measures = {alias: aggregate}.
+    On an encoded table the dimensions are grouped by id and their strings joined once
+    per result row; the output columns are the same either way. The aggregate reads the
+    fact table itself unless where filters on a dimension string (then the view).
+    """
+    keys = [storage_column(table, d) for d in dims]
+    sums = ", ".join(f"{expr} AS {alias}" for alias, expr in measures.items())
+    source = table
+    if table in ENCODED_TABLES and not any(re.search(rf"\b{d}\b", where) for d in DIMENSIONS):
+        source = storage_table(table)
+    inner = f"SELECT {', '.join(keys)}, {sums} FROM {source} {where} GROUP BY {', '.join(keys)}"
+    if keys == list(dims):
+        return inner
+    select = [f"{dim_table(d)}.{d} AS {d}" if k != d else f"g.{d}" for d, k in zip(dims, keys)]
+    joins = [f"LEFT JOIN {dim_table(d)} ON {dim_table(d)}.{k} = g.{k}" for d, k in zip(dims, keys) if k != d]
+    return f"SELECT {', '.join(select + [f'g.{a}' for a in measures])} FROM ({inner}) g {' '.join(joins)}"
+
+def object_type(conn, name):
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def drop_table(conn, table):
+    """Drop a logical table: its view and fact table, or the plain table."""
+    for name in (table, storage_table(table)):
+        kind = object_type(conn, name)
+        if kind in ("table", "view"):
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+def ensure_table(conn, table, replace=False):
+    """Create a logical table (plus its dimension tables and view when encoded)."""
+    if replace:
+        drop_table(conn, table)
+    if table in ENCODED_TABLES:
+        if object_type(conn, table) == "table":
+            raise RuntimeError(f"{table} was built before dimension encoding; run a full build_db() first")
+        for name in column_names(table):
+            if name in DIMENSIONS:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {dim_table(name)} "
+                             f"({name}_id INTEGER PRIMARY KEY, {name} TEXT UNIQUE)")
+    conn.execute(create_table_sql(table))
+    if table in ENCODED_TABLES:
+        conn.execute(f"DROP VIEW IF EXISTS {table}")   # views from before the id columns are recreated
+        conn.execute(create_view_sql(table))
+
+def partition_filter(table):
+    """WHERE clause on storage_table(table) selecting one (state, year, quarter)."""
+    if table in ENCODED_TABLES:
+        return "state_id = (SELECT state_id FROM dim_state WHERE state = ?) AND year = ? AND quarter = ?"
+    return "state = ? AND year = ? AND quarter = ?"
+
+
+class DimensionEncoder:
+    """Maps dimension strings to ids, adding unseen values to dim_<column> as they arrive."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ids = {}
+
+    def encode(self, column, value):
+        if value is None:
+            return None
+        if column not in self.ids:
+            self.ids[column] = {v: i for i, v in self.conn.execute(
+                f"SELECT {column}_id, {column} FROM {dim_table(column)}")}
+        ids = self.ids[column]
+        if value not in ids:
+            ids[value] = self.conn.execute(
+                f"INSERT INTO {dim_table(column)} ({column}) VALUES (?)", (value,)).lastrowid
+        return ids[value]
+
+    def encode_rows(self, table, rows):
+        """Replace dimension strings by their ids, in place."""
+        positions = [(i, c) for i, c in enumerate(column_names(table)) if storage_column(table, c) != c]
+        for row in rows:
+            for i, column in positions:
+                row[i] = self.encode(column, row[i])
+        return rows
+
+
+# -------------------------------
+# Indexes (created after bulk load)
+# -------------------------------
+# Each index leads with the filter/grouping columns of a query family and
+# ends with the summed measure, so the query is answered from the index alone.
+INDEXES = {
+    "aggregated_transaction": [
+        ("state", "year", "quarter", "amount"),       # GROUP BY state, WHERE state='karnataka'
+        ("year", "quarter", "state", "amount"),       # WHERE year = ... [AND quarter = ...], MAX(year)
+        ("category", "year", "amount"),               # GROUP BY category, year
+    ],
+    "aggregated_insurance": [
+        ("state", "year", "quarter", "amount"),
+        ("year", "quarter", "state", "amount"),
+    ],
+    "aggregated_user": [
+        ("brand", "year", "quarter", "state", "count", "percentage"),  # brand='TOTAL' / 'Xiaomi' / != 'TOTAL'
+        ("state", "year", "brand", "count"),          # top-state device share
+        ("year",),                                    # SELECT MAX(year)
+    ],
+    # the district tables are an order of magnitude larger: every district lookup
+    # goes through (state, district, year, quarter)
+    "map_transaction": [
+        ("state", "district", "year", "quarter", "count", "amount"),
+    ],
+    "map_insurance": [
+        ("state", "district", "year", "quarter", "count", "amount"),
+    ],
+    "map_user": [
+        ("state", "district", "year", "quarter", "registeredUsers", "appOpens"),
+        ("year", "district", "registeredUsers"),      # latest-year top districts, MAX(year)
+    ],
+    "top_transaction": [
+        ("entityName", "count", "amount"),            # GROUP BY entityName (top districts / pincodes)
+        ("state", "year", "quarter", "entityName", "count", "amount"),
+    ],
+    "top_insurance": [
+        ("entityName", "count", "amount"),
+        ("state", "year", "quarter", "entityName", "count", "amount"),
+    ],
+    "top_user": [
+        ("entityName", "registeredUsers"),
+        ("state", "year", "quarter", "entityName", "registeredUsers"),
+    ],
+}
+
+# Level-partitioned tables: every index above is created once per level as a
+# partial index (WHERE level = '<level>'), so a pincode query only ever reads
+# pincode entries and a district query only district entries.
+LEVELS = ("districts", "pincodes")
+PARTITIONS = {
+    "top_transaction": ("level", LEVELS),
+    "top_user": ("level", LEVELS),
+    "top_insurance": ("level", LEVELS),
+}
+
+def index_name(table, columns):
+    return f"idx_{table}_{'_'.join(columns)}"
+
+def index_specs(table):
+    """Yield (index name, storage table, columns, WHERE clause) for every registered index of table."""
+    target = storage_table(table)
+    # the view joins every dimension, so an index only stays covering if it carries all the ids
+    ids = [storage_column(table, c) for c in column_names(table) if storage_column(table, c) != c]
+    column, values = PARTITIONS.get(table, (None, [None]))
+    for columns in INDEXES.get(table, []):
+        columns = [storage_column(table, c) for c in columns]
+        name = index_name(target, columns)
+        if len(columns) > 1:
+            columns += [c for c in ids if c not in columns]
+        if column:
+            columns += [column]   # SQLite only treats a partial index as covering if it holds the filter column
+        for value in values:
+            if value:
+                yield f"{name}_{value}", target, columns, f" WHERE {column} = '{value}'"
+            else:
+                yield name, target, columns, ""
+
+def create_indexes(conn, tables=None):
+    """Create the registered indexes (on the storage tables) for the selected tables in conn."""
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    created = []
+    for table in tables or INDEXES:
+        if storage_table(table) not in existing:
+            continue
+        for name, target, columns, where in index_specs(table):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target} ({', '.join(columns)}){where}")
+            created.append(name)
+    return created
+
+
+# -------------------------------
+# Query Plan Check
+# -------------------------------
+def registered_queries():
+    """Return {name: (sql, default params)} for every SQL query in the queries registry."""
+    import queries
+    return {name: (q.sql, q.defaults) for name, q in queries.QUERIES.items() if q.sql}
+
+_SQL_KEYWORDS = {"WHERE", "JOIN", "LEFT", "INNER", "CROSS", "ON", "GROUP", "ORDER", "LIMIT", "UNION"}
+
+def table_aliases(sql):
+    """Map every name a base table is referred to by in sql (itself or its alias) -> table."""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        if table in TABLES:
+            aliases[table] = table
+            if alias and alias.upper() not in _SQL_KEYWORDS:
+                aliases[alias] = table
+    return aliases
+
+def full_scans(conn, sql, params=None):
+    """Return the base tables a query reads with a full table scan (no index)."""
+    aliases = table_aliases(sql)
+    # views are flattened into their fact tables in the plan
+    aliases.update({storage_table(t): t for t in ENCODED_TABLES})
+    scans = []
+    for *_, detail in conn.execute("EXPLAIN QUERY PLAN " + sql, params or ()):
+        m = re.match(r"SCAN (\w+)$", detail)
+        if m and m.group(1) in aliases:
+            scans.append(aliases[m.group(1)])
+    return scans
+
+def check_query_plans(conn, queries=None, verbose=True):
+    """
+    EXPLAIN every registered query and return {name: [tables scanned without an index]}
+    for the queries that still do a full table scan (or {name: error} if it fails to plan).
+    """
+    flagged = {}
+    for name, query in (queries or registered_queries()).items():
+        sql, params = query if isinstance(query, tuple) else (query, None)
+        try:
+            scans = full_scans(conn, sql, params)
+        except sqlite3.Error as e:
+            flagged[name] = str(e)
+            continue
+        if scans:
+            flagged[name] = scans
+    if verbose:
+        for name, issue in flagged.items():
+            print(f"⚠️ {name}: full scan of {issue}" if isinstance(issue, list) else f"❌ {name}: {issue}")
+        if not flagged:
+            print("✅ No registered query does a full table scan")
+    return flagged
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    check_query_plans(conn)
@@ -0,0 +1,116 @@
+"""
+Synthetic pulse-shaped data tree for benchmarks
+-----------------------------------------------
+Writes the same directory layout and JSON shapes as the PhonePe pulse repo
+(aggregated/, map/, top/ x transaction/user/insurance x state/year/quarter),
+with the number of states, years, districts, pincodes, categories and brands
+as scale factors, so ingest and the queries can be measured beyond the real
+dataset. Values are seeded-random with a yearly growth trend.
+
+Usage: python synthetic_pulse.py out_dir [--states 36] [--years 7] [--districts 20] ...
+"""
+
+import os, json, random, argparse
+
+STATES = [
+    "andaman-&-nicobar-islands", "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chandigarh",
+    "chhattisgarh", "dadra-&-nagar-haveli-&-daman-&-diu", "delhi", "goa", "gujarat", "haryana",
+    "himachal-pradesh", "jammu-&-kashmir", "jharkhand", "karnataka", "kerala", "ladakh", "lakshadweep",
+    "madhya-pradesh", "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "puducherry",
+    "punjab", "rajasthan", "sikkim", "tamil-nadu", "telangana", "tripura", "uttar-pradesh", "uttarakhand",
+    "west-bengal",
+]
+CATEGORIES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+              "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola", "Lenovo", "Huawei"]
+
+DEFAULT_SCALE = {"states": 36, "years": 7, "start_year": 2018, "districts": 20, "pincodes": 10,
+                 "categories": 5, "brands": 10}
+DEVICE_DATA_UNTIL = 2021   # like the real tree, usersByDevice is null from 2022 on
+
+
+def _names(base, n, extra):
+    """First n of base, topped up with generated names."""
+    return base[:n] + [extra.format(i) for i in range(len(base) + 1, n + 1)]
+
+def _write(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"success": True, "code": "SUCCESS", "data": payload}, f)
+    return os.path.getsize(path)
+
+def _metric(rng, scale, growth):
+    count = int(rng.uniform(0.5, 1.5) * scale * growth) + 1
+    return {"type": "TOTAL", "count": count, "amount": round(count * rng.uniform(200, 2000), 2)}
+
+
+def generate(out_dir, states=36, years=7, start_year=2018, districts=20, pincodes=10,
+             categories=5, brands=10, seed=0):
+    """Write the tree under out_dir (the pulse 'data' directory); returns {"files": n, "bytes": total}."""
+    rng = random.Random(seed)
+    state_names = _names(STATES, states, "synthetic-state-{}")
+    category_names = _names(CATEGORIES, categories, "Category {}")
+    brand_names = _names(BRANDS, brands, "Brand {}")
+    files = size = 0
+
+    for state in state_names:
+        district_names = [f"{state.replace('-', ' ')} district {d}" for d in range(1, districts + 1)]
+        pincode_names = [str(100000 + rng.randrange(900000)) for _ in range(pincodes)]
+        weight = rng.uniform(0.2, 3.0)
+        for year in range(start_year, start_year + years):
+            for quarter in range(1, 5):
+                growth = weight * 1.4 ** (year - start_year) * (1 + 0.05 * quarter)
+                rel = os.path.join(state, str(year), f"{quarter}.json")
+
+                def path(*parts):
+                    return os.path.join(out_dir, *parts, "country", "india", "state", rel)
+
+                # aggregated
+                size += _write(path("aggregated", "transaction"), {"transactionData": [
+                    {"name": c, "paymentInstruments": [_metric(rng, 1e6, growth)]} for c in category_names]})
+                size += _write(path("aggregated", "insurance"), {"transactionData": [
+                    {"name": "Insurance", "paymentInstruments": [_metric(rng, 1e3, growth)]}]})
+                users = int(rng.uniform(0.5, 1.5) * 1e6 * growth)
+                devices = None
+                if year <= DEVICE_DATA_UNTIL:
+                    shares = [rng.random() for _ in brand_names]
+                    devices = [{"brand": b, "count": int(users * s / sum(shares)), "percentage": s / sum(shares)}
+                               for b, s in zip(brand_names, shares)]
+                size += _write(path("aggregated", "user"), {
+                    "aggregated": {"registeredUsers": users, "appOpens": int(users * rng.uniform(5, 40))},
+                    "usersByDevice": devices})
+
+                # map (district hover data)
+                for kind, scale in (("transaction", 1e5), ("insurance", 1e2)):
+                    size += _write(path("map", kind, "hover"), {"hoverDataList": [
+                        {"name": d, "metric": [_metric(rng, scale, growth)]} for d in district_names]})
+                size += _write(path("map", "user", "hover"), {"hoverData": {
+                    d: {"registeredUsers": int(rng.uniform(0.5, 1.5) * 5e4 * growth),
+                        "appOpens": int(rng.uniform(0.5, 1.5) * 1e6 * growth)} for d in district_names}})
+
+                # top (districts + pincodes)
+                for kind, scale in (("transaction", 1e5), ("insurance", 1e2)):
+                    size += _write(path("top", kind), {"states": None,
+                        "districts": [{"entityName": d, "metric": _metric(rng, scale, growth)} for d in district_names],
+                        "pincodes": [{"entityName": p, "metric": _metric(rng, scale / 10, growth)} for p in pincode_names]})
+                size += _write(path("top", "user"), {"states": None,
+                    "districts": [{"name": d, "registeredUsers": int(rng.uniform(0.5, 1.5) * 5e4 * growth)}
+                                  for d in district_names],
+                    "pincodes": [{"name": p, "registeredUsers": int(rng.uniform(0.5, 1.5) * 5e3 * growth)}
+                                 for p in pincode_names]})
+                files += 9
+
+    print(f"✅ Wrote {files} files ({size / 1e6:.1f} MB) under {out_dir}")
+    return {"files": files, "bytes": size}
+
+def add_scale_arguments(parser):
+    for name, default in DEFAULT_SCALE.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir")
+    add_scale_arguments(parser)
+    args = vars(parser.parse_args())
+    generate(args.pop("out_dir"), **args)
@@ -0,0 +1,29 @@
+import os, sys
+import pytest
+
+# the modules live flat at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest, query_stats, synthetic_pulse
+
+SCALE = {"states": 4, "years": 6, "districts": 3, "pincodes": 2, "categories": 3, "brands": 3}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def slow_log(tmp_path_factory):
+    """Failing / slow queries in the tests log next to them, not into the project's log directory."""
+    query_stats.SLOW_LOG_PATH = str(tmp_path_factory.mktemp("logs") / "slow_queries.log")
+
+@pytest.fixture(scope="session")
+def pulse_tree(tmp_path_factory):
+    """A small synthetic pulse data tree (shared, never modified)."""
+    base = str(tmp_path_factory.mktemp("pulse") / "data")
+    synthetic_pulse.generate(base, **SCALE)
+    return base
+
+@pytest.fixture(scope="session")
+def pulse_db(pulse_tree, tmp_path_factory):
+    """A full build of pulse_tree (shared, read it only)."""
+    path = str(tmp_path_factory.mktemp("db") / "pulse.db")
+    ingest.build_db(path, pulse_tree, workers=1).close()
+    return path
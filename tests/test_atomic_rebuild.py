@@ -0,0 +1,78 @@
+import os, sqlite3, functools
+import pytest
+import atomic_rebuild, bulk_loader, columnar, ingest, result_cache, schema
+import extract_map_user
+
+
+@pytest.fixture
+def live(pulse_tree, tmp_path):
+    """A blue-green layout under tmp_path with one full build live (and its columnar store)."""
+    paths = {"db_path": str(tmp_path / "pulse.db"), "builds_dir": str(tmp_path / "builds"),
+             "columnar_dir": str(tmp_path / "columnar")}
+    atomic_rebuild.rebuild(base_path=pulse_tree, workers=1, **paths).close()
+    return paths
+
+def _counts(db_path):
+    return atomic_rebuild.table_counts(db_path)
+
+
+def test_partial_rebuild_carries_the_other_tables(live, pulse_tree):
+    before = _counts(live["db_path"])
+    conn = atomic_rebuild.rebuild(base_path=pulse_tree, tables=["map_user"], workers=1, **live)
+    assert _counts(live["db_path"]) == before
+    assert set(before) == set(schema.TABLES)
+    # the store was written for the new build before the swap, linking the tables it did not rebuild
+    assert columnar.store_generation(live["columnar_dir"]) == result_cache.get_generation(conn)
+    assert set(columnar.open_store(live["columnar_dir"], result_cache.get_generation(conn))) == set(schema.TABLES)
+
+def test_extract_script_goes_through_the_swap(live, pulse_tree, monkeypatch):
+    monkeypatch.setattr(atomic_rebuild, "rebuild", functools.partial(atomic_rebuild.rebuild,
+                                                                     builds_dir=live["builds_dir"]))
+    first = os.path.realpath(live["db_path"])
+    conn = extract_map_user.build_db(live["db_path"], pulse_tree, workers=1)
+    assert os.path.realpath(live["db_path"]) != first
+    assert result_cache.ingest_count(conn) == 2
+    assert conn.execute("SELECT COUNT(*) FROM aggregated_transaction").fetchone()[0]
+
+def test_first_partial_build_validates_only_its_tables(pulse_tree, tmp_path):
+    conn = atomic_rebuild.rebuild(str(tmp_path / "pulse.db"), pulse_tree, tables=["map_user"], workers=1,
+                                  builds_dir=str(tmp_path / "builds"))
+    assert set(atomic_rebuild.table_counts(str(tmp_path / "pulse.db"))) == {"map_user"}
+    conn.close()
+
+def test_incremental_rebuild_store_matches_the_live_build(live, pulse_tree):
+    conn = atomic_rebuild.rebuild(base_path=pulse_tree, incremental=True, workers=1, **live)
+    assert columnar.store_generation(live["columnar_dir"]) == result_cache.get_generation(conn)
+
+def test_live_load_keeps_the_journal(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "live.db"))
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = FULL")
+    with bulk_loader.bulk_session(conn, journal=False):
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    with bulk_loader.bulk_session(conn, journal=True):
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_figures_are_prebuilt_only_after_the_swap(live, pulse_tree, monkeypatch):
+    prebuilt = []
+    monkeypatch.setattr(ingest, "prebuild_figures", lambda conn: prebuilt.append(
+        (os.path.realpath(live["db_path"]), result_cache.get_generation(conn))))
+    conn = atomic_rebuild.rebuild(base_path=pulse_tree, tables=["map_user"], workers=1, prebuild=True, **live)
+    assert prebuilt == [(os.path.realpath(live["db_path"]), result_cache.get_generation(conn))]
+
+    monkeypatch.setattr(atomic_rebuild, "validate", lambda *args: ["forced failure"])
+    with pytest.raises(RuntimeError):
+        atomic_rebuild.rebuild(base_path=pulse_tree, tables=["map_user"], workers=1, prebuild=True, **live)
+    assert len(prebuilt) == 1
+
+def test_memory_bounds_reach_the_ingest(live, pulse_tree, monkeypatch):
+    seen = []
+    ingest_tables = ingest.ingest_tables
+    monkeypatch.setattr(ingest, "ingest_tables", lambda *args, **kw: seen.append(kw) or ingest_tables(*args, **kw))
+    atomic_rebuild.rebuild(base_path=pulse_tree, tables=["map_user"], workers=1, batch_size=7, max_memory_mb=1,
+                           **live).close()
+    assert (seen[-1]["batch_size"], seen[-1]["max_memory_mb"]) == (7, 1)
+    assert ingest.main(lambda **kw: kw, ["ingest.py", "--max-memory-mb", "64"]) == {"profiler": None,
+                                                                                    "max_memory_mb": 64}
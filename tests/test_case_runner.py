@@ -0,0 +1,81 @@
+import sqlite3
+import pandas as pd
+import pytest
+import case_runner, db_pool, queries, run_all_cases, utils
+
+
+# -------------------------------
+# SQL helpers
+# -------------------------------
+def test_canonical_ignores_spacing_but_not_literals():
+    a = "SELECT  state ,SUM(amount)\n FROM t WHERE name = 'a  b' ;"
+    b = "SELECT state, SUM( amount ) FROM t WHERE name='a  b'"
+    assert case_runner.canonical(a) == case_runner.canonical(b)
+    assert case_runner.canonical(b) != case_runner.canonical(b.replace("'a  b'", "'a b'"))
+
+def test_parse_ctes_finds_nested_bodies():
+    sql = ("WITH top AS (SELECT state FROM t WHERE x IN (SELECT 1) LIMIT 1), "
+           "share AS (SELECT * FROM top) SELECT * FROM share")
+    ctes = case_runner.parse_ctes(sql)
+    assert [name for name, *_ in ctes] == ["top", "share"]
+    assert [sql[start:end] for _, start, end in ctes] == [
+        "SELECT state FROM t WHERE x IN (SELECT 1) LIMIT 1", "SELECT * FROM top"]
+    assert case_runner.parse_ctes("SELECT 1") == []
+
+def test_rows_sql_round_trips_a_small_result():
+    df = pd.DataFrame({"state": ["assam", "goa"], "total": [1.5, 2]})
+    sql, params = case_runner._rows_sql(df, "p")
+    out = pd.read_sql_query(sql, sqlite3.connect(":memory:"), params=params)
+    pd.testing.assert_frame_equal(out, df)
+    sql, params = case_runner._rows_sql(df.iloc[:0], "p")
+    assert list(pd.read_sql_query(sql, sqlite3.connect(":memory:"), params=params).columns) == ["state", "total"]
+
+
+# -------------------------------
+# Batch rewriting
+# -------------------------------
+def _case_names():
+    return list(dict.fromkeys(n for m in case_runner.case_modules() for n in m.TITLES.values()))
+
+def test_batch_matches_one_query_at_a_time(pulse_db):
+    conn = sqlite3.connect(pulse_db)
+    names = _case_names()
+    results, stats = case_runner.run_batch(conn, names)
+    for name in names:
+        pd.testing.assert_frame_equal(results[name], utils.run_query(conn, name), check_dtype=False, obj=name)
+    assert stats["shared_scalars"] and stats["shared_ctes"] and stats["deduplicated"]
+    assert stats["computed"] == sum(1 for n in names if queries.get(n).compute)
+
+def test_limit_variants_share_one_execution(pulse_db):
+    conn = sqlite3.connect(pulse_db)
+    sql_names = [n for n in queries.QUERIES if queries.get(n).sql and ":limit" in queries.get(n).sql]
+    if not sql_names:
+        pytest.skip("no registered SQL query takes a :limit")
+    name = sql_names[0]
+    results, stats = case_runner.run_batch(conn, [name, name], params={name: {"limit": 2}})
+    assert len(results[name]) <= 2
+    full = utils.run_query(conn, name, params={"limit": 2})
+    pd.testing.assert_frame_equal(results[name], full, check_dtype=False)
+
+
+# -------------------------------
+# Worker threads and their connections
+# -------------------------------
+def test_pooled_batches_close_their_connections(pulse_db):
+    conn = sqlite3.connect(pulse_db)
+    names = _case_names()
+    expected, _ = case_runner.run_batch(conn, names)
+    pool = db_pool.ConnectionPool(pulse_db)
+    with case_runner.PooledExecutor(pool, 4) as executor:
+        for _ in range(3):
+            results, _ = case_runner.run_batch(None, names, pool=pool, executor=executor)
+            assert pool.open_connections() <= 4
+    assert pool.open_connections() == 0
+    results, _ = case_runner.run_batch(None, names, pool=pool, workers=4)
+    assert pool.open_connections() == 0
+    for name in names:
+        pd.testing.assert_frame_equal(results[name], expected[name], obj=name)
+
+def test_run_all_cases_leaves_no_connections_open(pulse_db):
+    run_all_cases.run_all_cases(pulse_db, workers=4, verbose=False)
+    assert db_pool.get_pool(pulse_db).open_connections() == 0
@@ -0,0 +1,64 @@
+import os, json, shutil, sqlite3
+import pandas as pd
+import columnar, ingest, result_cache
+
+TOTALS = "SELECT state, SUM(amount) AS amount FROM aggregated_transaction WHERE year = ? AND quarter = ? GROUP BY state"
+
+
+def _totals(store, year, quarter):
+    df = store["aggregated_transaction"].group_sum(["state"], ["amount"], {"year": year, "quarter": quarter})
+    return df.sort_values("state").reset_index(drop=True)
+
+def _sql_totals(conn, year, quarter):
+    return pd.read_sql_query(TOTALS + " ORDER BY state", conn, params=(year, quarter))
+
+def _double(base):
+    folder = os.path.join(base, ingest.DATASETS["aggregated_transaction"]["folder"])
+    for state in os.listdir(folder):
+        path = os.path.join(folder, state, "2018", "1.json")
+        with open(path) as f:
+            data = json.load(f)
+        for entry in data["data"]["transactionData"]:
+            for pi in entry["paymentInstruments"]:
+                pi["amount"] *= 2
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+
+def test_store_is_swapped_whole_and_follows_the_db(pulse_tree, tmp_path):
+    base, db, store_dir = str(tmp_path / "data"), str(tmp_path / "pulse.db"), str(tmp_path / "columnar")
+    shutil.copytree(pulse_tree, base)
+    conn = ingest.build_db(db, base, workers=1, columnar_dir=store_dir)
+    first = result_cache.get_generation(conn)
+    assert os.path.islink(store_dir) and columnar.store_generation(store_dir) == first
+    store = columnar.open_store(store_dir, first)
+    pd.testing.assert_frame_equal(_totals(store, 2018, 1), _sql_totals(conn, 2018, 1))
+    linked = os.stat(os.path.join(store_dir, "map_user", "meta.json")).st_ino
+    conn.close()
+
+    _double(base)
+    conn = ingest.refresh_db(db, base, workers=1, columnar_dir=store_dir)
+    second = result_cache.get_generation(conn)
+    assert columnar.open_store(store_dir, first) == {}          # an old-generation store is never served
+    store = columnar.open_store(store_dir, second)
+    pd.testing.assert_frame_equal(_totals(store, 2018, 1), _sql_totals(conn, 2018, 1))
+    # untouched tables are linked from the previous store, not rewritten
+    assert os.stat(os.path.join(store_dir, "map_user", "meta.json")).st_ino == linked
+    conn.close()
+
+    conn = ingest.refresh_db(db, base, workers=1, columnar_dir=store_dir)
+    assert columnar.open_store(store_dir, result_cache.get_generation(conn))
+    stores = [d for d in os.listdir(tmp_path) if d.startswith("columnar.")]
+    assert len(stores) == columnar.KEEP_STORES and not any(".swap." in d for d in stores)
+
+def test_store_from_another_lineage_is_rewritten(pulse_db, tmp_path):
+    store_dir = str(tmp_path / "columnar")
+    conn = sqlite3.connect(pulse_db)
+    columnar.write_store(conn, store_dir, ["aggregated_transaction"])
+    other = sqlite3.connect(":memory:")
+    conn.backup(other)
+    result_cache.bump_generation(other)
+    # base_generation does not match the store, so every table is written again
+    written = columnar.write_store(other, store_dir, [], base_generation="not-the-store")
+    assert "aggregated_transaction" in written and "map_user" in written
+    assert columnar.store_generation(store_dir) == result_cache.get_generation(other)
@@ -0,0 +1,45 @@
+import gc
+import threading
+import db_pool
+
+THREADS = 20
+
+
+def _query(pool, barrier=None):
+    pool.connection().execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    if barrier is not None:
+        barrier.wait()
+
+
+def test_connections_do_not_grow_with_short_lived_threads(pulse_db):
+    """One thread per rerun, as Streamlit does: each connection goes away with its thread."""
+    pool = db_pool.ConnectionPool(pulse_db)
+    for _ in range(THREADS):
+        thread = threading.Thread(target=_query, args=(pool,))
+        thread.start()
+        thread.join()
+        assert pool.open_connections() <= 1
+    del thread
+    gc.collect()
+    assert pool.open_connections() == 0
+
+def test_live_threads_hold_one_connection_each(pulse_db):
+    pool = db_pool.ConnectionPool(pulse_db)
+    barrier = threading.Barrier(THREADS + 1)
+    threads = [threading.Thread(target=_query, args=(pool, barrier)) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    assert pool.open_connections() == THREADS
+    del threads, thread
+    gc.collect()
+    assert pool.open_connections() == 0
+
+def test_a_thread_reuses_its_connection(pulse_db):
+    pool = db_pool.ConnectionPool(pulse_db)
+    assert pool.connection() is pool.connection()
+    assert pool.open_connections() == 1
+    pool.close_all()
+    assert pool.open_connections() == 0
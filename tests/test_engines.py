@@ -0,0 +1,63 @@
+import sqlite3
+import pandas as pd
+import pytest
+import ingest, growth, utils, synthetic_pulse
+from conftest import SCALE
+
+TOP_STATES = """
+SELECT state, SUM(amount) AS total_amount FROM aggregated_transaction
+GROUP BY state ORDER BY total_amount DESC LIMIT 10
+"""
+
+
+@pytest.fixture
+def two_dbs(pulse_db, tmp_path):
+    """The session DB plus one built from a differently seeded tree, both with a fresh ingest count of 1."""
+    base = str(tmp_path / "data")
+    synthetic_pulse.generate(base, seed=1, **SCALE)
+    other = str(tmp_path / "other.db")
+    ingest.build_db(other, base, workers=1).close()
+    return [sqlite3.connect(pulse_db), sqlite3.connect(other)]
+
+def test_topk_cubes_follow_the_connection(two_dbs):
+    for conn in two_dbs + two_dbs:
+        expected = pd.read_sql_query(TOP_STATES, conn)
+        pd.testing.assert_frame_equal(utils.run_query(conn, "case1.Q1"), expected, check_dtype=False)
+
+def test_growth_tables_follow_the_connection(two_dbs):
+    for conn in two_dbs + two_dbs:
+        fresh = growth.growth_frame(conn, "transaction.category", 2022, 2023, limit=10, engine=growth.GrowthEngine())
+        pd.testing.assert_frame_equal(utils.run_query(conn, "case1.Q5"), fresh)
+
+# the pre-engine case5.Q3, with the years bound
+BASELINE_STATE_GROWTH = """
+WITH yearly_data AS (
+    SELECT state, year, SUM(amount) AS total_amount FROM aggregated_transaction
+    WHERE year IN (:start, :end) GROUP BY state, year
+),
+pivoted AS (
+    SELECT state,
+           SUM(CASE WHEN year = :start THEN total_amount ELSE 0 END) AS amt_start,
+           SUM(CASE WHEN year = :end THEN total_amount ELSE 0 END) AS amt_end
+    FROM yearly_data GROUP BY state
+)
+SELECT state, ROUND(((amt_end - amt_start) * 100.0 / NULLIF(amt_start, 0)), 2) AS growth_percent
+FROM pivoted ORDER BY growth_percent DESC
+"""
+
+@pytest.mark.parametrize("start, end", [(2020, 2023), (2023, 2030), (2017, 2023)])
+def test_missing_years_give_null_growth_rows_like_the_sql(pulse_db, start, end):
+    conn = sqlite3.connect(pulse_db)
+    expected = pd.read_sql_query(BASELINE_STATE_GROWTH, conn, params={"start": start, "end": end})
+    got = growth.growth_frame(conn, "transaction.state", start, end, engine=growth.GrowthEngine())
+    assert len(got) == len(expected)
+    merged = got.merge(expected, on="state", suffixes=("", "_sql"))
+    pd.testing.assert_series_equal(merged["growth_percent"], merged["growth_percent_sql"].astype(float),
+                                   check_names=False)
+    # NULL growth ranks last, as ORDER BY ... DESC does in SQLite
+    assert got["growth_percent"].isna().tolist() == sorted(got["growth_percent"].isna().tolist())
+
+def test_missing_quarter_counts_as_zero(pulse_db):
+    conn = sqlite3.connect(pulse_db)
+    df = growth.GrowthEngine().growth(conn, "transaction.category", (2023, 4), (2031, 1))
+    assert len(df) and (df["growth_percent"] == -100).all()
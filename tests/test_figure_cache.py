@@ -0,0 +1,69 @@
+import os, shutil, sqlite3
+import pandas as pd
+import pytest
+import figure_cache, result_cache
+
+GEOJSON = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "properties": {"ST_NM": "Goa"},
+     "geometry": {"type": "MultiPolygon", "coordinates": [[[[73.7, 14.9], [74.2, 14.9], [74.2, 15.4], [73.7, 14.9]]]]}},
+]}
+
+
+class Builds:
+    """build() stand-in that counts how often the figures are actually rendered."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return figure_cache.build_overview_figures(
+            pd.DataFrame({"state": ["Goa"], "total_amount": [1.0]}), "Transactions", GEOJSON)
+
+
+@pytest.fixture
+def db(pulse_db, tmp_path):
+    path = str(tmp_path / "pulse.db")
+    shutil.copy(pulse_db, path)
+    return sqlite3.connect(path)
+
+
+def test_figures_are_keyed_on_the_generation(tmp_path):
+    build = Builds()
+    cache = figure_cache.FigureCache(str(tmp_path))
+    fig_map, fig_bar = cache.get("Transactions", 2023, 1, "1-a", build)
+    cache.get("Transactions", 2023, 1, "1-a", build)
+    assert build.count == 1 and list(fig_bar.data[0].x) == ["Goa"]
+    # a new process finds the figures on disk
+    figure_cache.FigureCache(str(tmp_path)).get("Transactions", 2023, 1, "1-a", build)
+    assert build.count == 1
+    # the next generation misses, and the old one is dropped from memory
+    cache.get("Transactions", 2023, 1, "2-b", build)
+    assert build.count == 2
+    assert {key[3] for key in cache.memory} == {"2-b"}
+
+def test_prebuild_keeps_only_the_live_generation(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(figure_cache, "YEARS", [2022, 2023])
+    figure_dir = str(tmp_path / "figures")
+    stale = os.path.join(figure_dir, "0-stale")
+    os.makedirs(stale)
+    open(os.path.join(stale, "transactions_2018_q1.json"), "w").close()
+
+    built = figure_cache.prebuild_overview(db, figure_dir, GEOJSON)
+    generation = result_cache.get_generation(db)
+    assert built and os.listdir(figure_dir) == [generation]
+    assert len(os.listdir(os.path.join(figure_dir, generation))) == built
+
+    # every prebuilt pair is a hit for this generation ...
+    build = Builds()
+    year, quarter = figure_cache.YEARS[0], figure_cache.QUARTERS[0]
+    figure_cache.FigureCache(figure_dir).get("Transactions", year, quarter, generation, build)
+    assert build.count == 0
+    # ... and a miss once an ingest bumps it
+    bumped = result_cache.bump_generation(db)
+    db.commit()
+    figure_cache.FigureCache(figure_dir).get("Transactions", year, quarter, bumped, build)
+    assert build.count == 1
+
+    figure_cache.prebuild_overview(db, figure_dir, GEOJSON)
+    assert os.listdir(figure_dir) == [bumped]
@@ -0,0 +1,75 @@
+import os, urllib.error
+import numpy as np
+import pytest
+import geo
+
+
+def _square(x, y, size=1.0, steps=20):
+    """A closed square ring with `steps` collinear points per side."""
+    side = np.linspace(0, size, steps, endpoint=False)
+    ring = ([[x + t, y] for t in side] + [[x + size, y + t] for t in side] +
+            [[x + size - t, y + size] for t in side] + [[x, y + size - t] for t in side] + [[x, y]])
+    return np.round(np.array(ring), 4).tolist()
+
+GEOJSON = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "properties": {"ST_NM": "Goa", "other": 1},
+     "geometry": {"type": "Polygon", "coordinates": [_square(73.7, 14.9, 0.5)]}},
+    {"type": "Feature", "properties": {"ST_NM": "Andaman & Nicobar"},
+     "geometry": {"type": "MultiPolygon", "coordinates": [[_square(92.5, 11.5, 0.3)], [_square(93.0, 7.0, 0.2)]]}},
+]}
+
+
+# -------------------------------
+# Douglas-Peucker
+# -------------------------------
+def test_simplify_drops_collinear_points_and_keeps_corners():
+    ring = np.array(_square(0, 0))
+    out = geo.simplify_ring(ring, 0.001)
+    assert out.tolist() == [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+
+def test_simplify_keeps_points_further_than_the_tolerance():
+    ring = np.array([[0, 0], [1, 0.05], [2, 0], [2, 2], [0, 2], [0, 0]], dtype=float)
+    assert len(geo.simplify_ring(ring, 0.1)) == 5
+    assert len(geo.simplify_ring(ring, 0.01)) == 6
+
+def test_simplify_never_goes_below_four_points():
+    ring = np.array([[0, 0], [1, 0], [1, 1e-9], [0, 1e-9], [0, 0]])
+    assert len(geo.simplify_ring(ring, 10)) >= 4
+    assert geo.simplify_ring(ring, 0) is ring
+
+
+# -------------------------------
+# .npz cache round trip
+# -------------------------------
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "geo" / "india_states.npz")
+    assert geo.build_cache(GEOJSON, path) == path
+    full = geo.load_india_geojson("full", path)
+    assert [f["properties"] for f in full["features"]] == [{"ST_NM": "Goa"}, {"ST_NM": "Andaman & Nicobar"}]
+    goa, andaman = (f["geometry"] for f in full["features"])
+    assert goa == {"type": "MultiPolygon", "coordinates": [GEOJSON["features"][0]["geometry"]["coordinates"]]}
+    assert andaman == {"type": "MultiPolygon", "coordinates": GEOJSON["features"][1]["geometry"]["coordinates"]}
+
+    low = geo.load_india_geojson("low", path)
+    assert [len(ring) for f in low["features"] for poly in f["geometry"]["coordinates"] for ring in poly] == [5, 5, 5]
+    assert geo.load_india_geojson("low", path) is low    # loaded once per process
+
+def test_unknown_level(tmp_path):
+    with pytest.raises(ValueError):
+        geo.load_india_geojson("tiny", str(tmp_path / "india_states.npz"))
+
+
+# -------------------------------
+# Offline
+# -------------------------------
+def test_no_cache_no_file_no_network_fails_soft(tmp_path, monkeypatch):
+    def offline(*args, **kwargs):
+        raise urllib.error.URLError("offline")
+    monkeypatch.setattr(geo, "BUNDLED_GEOJSON", str(tmp_path / "missing.geojson"))
+    monkeypatch.setattr(geo.urllib.request, "urlopen", offline)
+    path = str(tmp_path / "india_states.npz")
+    assert geo.load_india_geojson("medium", path) == {"type": "FeatureCollection", "features": []}
+    assert not os.path.exists(path)
+    # retried (not cached as empty) once the GeoJSON is available
+    geo.build_cache(GEOJSON, path)
+    assert len(geo.load_india_geojson("medium", path)["features"]) == 2
@@ -0,0 +1,110 @@
+import os, json, shutil, sqlite3
+import pytest
+import atomic_rebuild, ingest, rollups, schema
+
+
+def _row(row):
+    # rollup sums depend on the order rows were added in; compare them to 12 significant digits
+    return tuple(float(f"{v:.12g}") if isinstance(v, float) else v for v in row)
+
+def _tables(path):
+    """Every pulse table and rollup, as sorted row lists."""
+    conn = sqlite3.connect(path)
+    names = [t for t in schema.TABLES if schema.object_type(conn, t)] + sorted(rollups.available_rollups(conn))
+    columns = lambda name: ", ".join(f'"{c}"' for c in schema.column_names(name)) if name in schema.TABLES else "*"
+    out = {name: sorted(map(_row, conn.execute(f"SELECT {columns(name)} FROM {name}")), key=repr) for name in names}
+    conn.close()
+    return out
+
+def _manifest(path):
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute(f"SELECT path, sha1 FROM {ingest.MANIFEST_TABLE}").fetchall())
+    conn.close()
+    return rows
+
+@pytest.fixture
+def tree(pulse_tree, tmp_path):
+    """A private, editable copy of the synthetic tree plus a full build of it."""
+    base = str(tmp_path / "data")
+    shutil.copytree(pulse_tree, base)
+    db = str(tmp_path / "pulse.db")
+    ingest.build_db(db, base, workers=1).close()
+    return base, db
+
+def _file(base, table, state_index=0, year_index=-1, quarter=4):
+    folder = os.path.join(base, ingest.DATASETS[table]["folder"])
+    state = sorted(os.listdir(folder))[state_index]
+    year = sorted(os.listdir(os.path.join(folder, state)))[year_index]
+    return os.path.join(folder, state, year, f"{quarter}.json")
+
+def _edit(path, change):
+    with open(path) as f:
+        data = json.load(f)
+    change(data["data"])
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+def _double_amounts(data):
+    for entry in data["transactionData"]:
+        for pi in entry["paymentInstruments"]:
+            pi["amount"] *= 2
+
+
+def test_refresh_without_changes_keeps_everything(tree):
+    base, db = tree
+    before, manifest = _tables(db), _manifest(db)
+    ingest.refresh_db(db, base, workers=1).close()
+    ingest.refresh_db(db, base, workers=1).close()
+    assert _tables(db) == before
+    assert _manifest(db) == manifest
+
+def test_touched_but_identical_file_is_not_rewritten(tree):
+    base, db = tree
+    before = _tables(db)
+    path = _file(base, "aggregated_transaction")
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 60))
+    ingest.refresh_db(db, base, workers=1).close()
+    assert _tables(db) == before
+
+def test_refresh_matches_a_full_build(tree, tmp_path):
+    base, db = tree
+    changed = _file(base, "aggregated_transaction")
+    _edit(changed, _double_amounts)
+    _edit(_file(base, "map_user", state_index=1), lambda d: d["hoverData"].popitem())
+    os.remove(_file(base, "aggregated_insurance", year_index=0, quarter=1))
+    added = _file(base, "aggregated_transaction", year_index=-1, quarter=4).replace(
+        os.sep + "4.json", os.sep + "5.json")
+    shutil.copy(changed, added)
+
+    generation = sqlite3.connect(db).execute("PRAGMA user_version").fetchone()[0]
+    ingest.refresh_db(db, base, workers=1).close()
+    fresh = str(tmp_path / "fresh.db")
+    ingest.build_db(fresh, base, workers=1).close()
+
+    assert _tables(db) == _tables(fresh)
+    assert _manifest(db) == _manifest(fresh)
+    assert sqlite3.connect(db).execute("PRAGMA user_version").fetchone()[0] == generation + 1
+
+def _remove_table_files(base, table):
+    shutil.rmtree(os.path.join(base, ingest.DATASETS[table]["folder"]))
+
+def test_rebuild_drops_a_table_whose_files_are_gone(tree):
+    base, db = tree
+    _remove_table_files(base, "map_insurance")
+    ingest.build_db(db, base, tables=["map_insurance", "map_user"], workers=1).close()
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM map_insurance").fetchone()[0] == 0
+    assert conn.execute(f"SELECT COUNT(*) FROM {ingest.MANIFEST_TABLE} WHERE table_name = 'map_insurance'"
+                        ).fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM map_user").fetchone()[0]
+
+def test_partial_rebuild_without_files_fails_validation(tree, tmp_path):
+    base, _ = tree
+    paths = {"db_path": str(tmp_path / "live.db"), "builds_dir": str(tmp_path / "builds")}
+    atomic_rebuild.rebuild(base_path=base, workers=1, **paths).close()
+    live, before = os.path.realpath(paths["db_path"]), atomic_rebuild.table_counts(paths["db_path"])
+    _remove_table_files(base, "map_insurance")
+    with pytest.raises(RuntimeError):
+        atomic_rebuild.rebuild(base_path=base, tables=["map_insurance"], workers=1, **paths)
+    assert os.path.realpath(paths["db_path"]) == live
+    assert atomic_rebuild.table_counts(paths["db_path"]) == before
@@ -0,0 +1,104 @@
+import os, json, shutil, sqlite3
+import pytest
+import ingest, schema
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+KEY = ("goa", 2023, 1)
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+def _parse(table, fixture):
+    return list(ingest.DATASETS[table]["parser"](_load(fixture), *KEY))
+
+
+# -------------------------------
+# map_* hover files
+# -------------------------------
+@pytest.mark.parametrize("table", ["map_transaction", "map_insurance"])
+def test_map_hover_rows(table):
+    assert _parse(table, "map_transaction_hover.json") == [
+        [*KEY, "north goa district", "TOTAL", 1496374, 2.4133245e9],
+        [*KEY, "south goa district", "TOTAL", 1041622, 1.7425301e9],
+    ]
+
+def test_map_hover_empty_list_gives_no_rows():
+    assert _parse("map_transaction", "map_transaction_empty.json") == []
+
+def test_map_user_hover_rows():
+    assert _parse("map_user", "map_user_hover.json") == [
+        [*KEY, "north goa district", 231052, 5061428],
+        [*KEY, "south goa district", 174516, 3844025],
+    ]
+
+
+# -------------------------------
+# top_* district / pincode lists
+# -------------------------------
+def test_top_rows_carry_their_level():
+    rows = _parse("top_transaction", "top_transaction.json")
+    assert rows[:2] == [
+        [*KEY, "districts", "north goa", "TOTAL", 1496374, 2.4133245e9],
+        [*KEY, "districts", "south goa", "TOTAL", 1041622, 1.7425301e9],
+    ]
+    assert [(r[3], r[4]) for r in rows[2:]] == [("pincodes", "403001"), ("pincodes", "403507"),
+                                                ("pincodes", "403601")]
+
+def test_top_user_rows_carry_their_level():
+    assert _parse("top_user", "top_user.json") == [
+        [*KEY, "districts", "north goa", 231052],
+        [*KEY, "districts", "south goa", 174516],
+        [*KEY, "pincodes", "403507", 30141],
+        [*KEY, "pincodes", "403601", 27905],
+    ]
+
+@pytest.mark.parametrize("table, fixture", [("top_transaction", "top_transaction_no_pincodes.json"),
+                                            ("top_user", "top_user_no_pincodes.json")])
+def test_empty_pincodes_list_gives_district_rows_only(table, fixture):
+    rows = _parse(table, fixture)
+    assert len(rows) == 1 and rows[0][3] == "districts"
+
+def test_every_row_matches_its_table_schema():
+    for table, fixture in [("map_transaction", "map_transaction_hover.json"), ("map_user", "map_user_hover.json"),
+                           ("top_transaction", "top_transaction.json"), ("top_user", "top_user.json")]:
+        assert {len(row) for row in _parse(table, fixture)} == {len(schema.column_names(table))}
+
+
+# -------------------------------
+# Fixture tree -> tables and level partitions
+# -------------------------------
+@pytest.fixture
+def fixture_db(tmp_path):
+    """The fixtures laid out as a pulse tree (goa, 2023, quarters 1 and 2) and built into a DB."""
+    files = {"map_transaction": ["map_transaction_hover.json", "map_transaction_empty.json"],
+             "map_user": ["map_user_hover.json"],
+             "top_transaction": ["top_transaction.json", "top_transaction_no_pincodes.json"],
+             "top_user": ["top_user.json", "top_user_no_pincodes.json"]}
+    base = str(tmp_path / "data")
+    for table, fixtures in files.items():
+        folder = os.path.join(base, ingest.DATASETS[table]["folder"], "goa", "2023")
+        os.makedirs(folder)
+        for quarter, fixture in enumerate(fixtures, 1):
+            shutil.copy(os.path.join(FIXTURES, fixture), os.path.join(folder, f"{quarter}.json"))
+    db = str(tmp_path / "pulse.db")
+    ingest.build_db(db, base, tables=list(files), workers=1).close()
+    return sqlite3.connect(db)
+
+def test_fixture_tree_loads_every_row(fixture_db):
+    count = lambda sql: fixture_db.execute(sql).fetchone()[0]
+    assert count("SELECT COUNT(*) FROM map_transaction") == 2
+    assert count("SELECT COUNT(*) FROM map_transaction WHERE quarter = 2") == 0
+    assert count("SELECT COUNT(*) FROM map_user") == 2
+    assert fixture_db.execute("SELECT quarter, level, COUNT(*) FROM top_transaction GROUP BY 1, 2 ORDER BY 1, 2"
+                              ).fetchall() == [(1, "districts", 2), (1, "pincodes", 3), (2, "districts", 1)]
+    assert fixture_db.execute("SELECT quarter, level, COUNT(*) FROM top_user GROUP BY 1, 2 ORDER BY 1, 2"
+                              ).fetchall() == [(1, "districts", 2), (1, "pincodes", 2), (2, "districts", 1)]
+
+def test_level_queries_read_their_partial_index(fixture_db):
+    for level in schema.LEVELS:
+        plan = " ".join(d for *_, d in fixture_db.execute(
+            "EXPLAIN QUERY PLAN SELECT entityName, SUM(amount) FROM top_transaction "
+            f"WHERE level = '{level}' GROUP BY entityName"))
+        assert f"_{level}" in plan, plan
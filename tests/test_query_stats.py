@@ -0,0 +1,67 @@
+import time, logging, sqlite3
+import pandas as pd
+import pytest
+import query_stats
+
+SQL = "SELECT state, SUM(amount) AS total FROM aggregated_transaction GROUP BY state"
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+@pytest.fixture
+def records(monkeypatch):
+    """Fresh STATS, a 50 ms threshold, and the slow-query log's records."""
+    monkeypatch.setattr(query_stats, "STATS", query_stats.QueryStats())
+    monkeypatch.setattr(query_stats, "SLOW_QUERY_SECONDS", 0.05)
+    handler = Records()
+    logger = query_stats.slow_log()
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+
+def _run(conn, name, delay=0.0):
+    def run():
+        time.sleep(delay)
+        return pd.read_sql_query(SQL, conn)
+    return query_stats.timed(conn, name, SQL, {}, run)
+
+
+def test_only_a_query_over_the_threshold_is_logged(pulse_db, records):
+    conn = sqlite3.connect(pulse_db)
+    _run(conn, "fast")
+    assert records == []
+    _run(conn, "slow", delay=0.06)
+    assert len(records) == 1
+    message = records[0].getMessage()
+    assert records[0].levelno == logging.WARNING and message.startswith("slow ")
+    assert "aggregated_transaction" in message and "\n  " in message   # SQL and its plan
+    with open(query_stats.SLOW_LOG_PATH) as f:
+        assert sum(" WARNING slow " in line for line in f) == 1
+
+def test_a_failing_query_is_logged_as_an_error(pulse_db, records):
+    conn = sqlite3.connect(pulse_db)
+    with pytest.raises(ZeroDivisionError):
+        query_stats.timed(conn, "broken", SQL, {}, lambda: 1 / 0)
+    assert [r.levelno for r in records] == [logging.ERROR]
+    assert query_stats.STATS.summary()["broken"]["errors"] == 1
+
+def test_stats_are_kept_per_query_name(pulse_db, records):
+    conn = sqlite3.connect(pulse_db)
+    for _ in range(3):
+        rows = len(_run(conn, "a"))
+    _run(conn, "b")
+    summary = query_stats.STATS.summary()
+    assert set(summary) == {"a", "b"}
+    assert summary["a"]["count"] == 3 and summary["b"]["count"] == 1
+    assert summary["a"]["rows"] == 3 * rows and summary["a"]["errors"] == 0
+    assert 0 < summary["a"]["p50"] <= summary["a"]["p95"] <= summary["a"]["max"]
+
+def test_label_prefers_the_registry_name():
+    assert query_stats.label("case1.Q2", SQL) == "case1.Q2"
+    assert query_stats.label(SQL, SQL).startswith("SELECT state")
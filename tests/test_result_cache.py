@@ -0,0 +1,42 @@
+import sqlite3
+import pandas as pd
+import ingest, result_cache
+
+
+def test_generation_is_unique_per_build(pulse_tree, tmp_path):
+    first, second = str(tmp_path / "a.db"), str(tmp_path / "b.db")
+    generations = []
+    for path in (first, second):
+        conn = ingest.build_db(path, pulse_tree, workers=1)
+        generations.append(result_cache.get_generation(conn))
+        assert result_cache.ingest_count(conn) == 1
+        conn.close()
+    assert generations[0] != generations[1]
+
+    conn = ingest.refresh_db(first, pulse_tree, workers=1)
+    assert result_cache.get_generation(conn) not in generations
+    assert result_cache.ingest_count(conn) == 2
+
+def test_unstamped_db_reports_its_ingest_count():
+    conn = sqlite3.connect(":memory:")
+    assert result_cache.get_generation(conn) == "0"
+    generation = result_cache.bump_generation(conn)
+    assert generation.startswith("1-") and result_cache.get_generation(conn) == generation
+
+def test_cache_never_serves_another_db(tmp_path):
+    cache, calls = result_cache.ResultCache(), []
+
+    def loader(conn, sql, params):
+        calls.append(conn)
+        return pd.read_sql_query(sql, conn)
+
+    dbs = []
+    for name, value in (("a", 1), ("b", 2)):
+        conn = sqlite3.connect(str(tmp_path / f"{name}.db"))
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (?)", (value,))
+        result_cache.bump_generation(conn)
+        conn.commit()
+        dbs.append(conn)
+    assert [cache.fetch(conn, "SELECT x FROM t", None, loader).iloc[0, 0] for conn in dbs] == [1, 2]
+    assert len(calls) == 2
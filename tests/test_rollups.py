@@ -0,0 +1,112 @@
+import sqlite3
+import pandas as pd
+import pytest
+import rollups
+
+ROLLUPS = {rollups.rollup_name(s, g) for s in rollups.SOURCES for g, _ in rollups.GRAINS}
+
+
+def routed(sql):
+    return rollups.route_query(sql, ROLLUPS) != sql
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    for table in rollups.SOURCES:
+        conn.execute(f"CREATE TABLE {table} (state TEXT, year INTEGER, quarter INTEGER, category TEXT, "
+                     f"type TEXT, count INTEGER, amount REAL)")
+        rows = [(state, year, quarter, category, "TOTAL", year + quarter, (year - 2017) * quarter * 10.5)
+                for state in ("assam", "karnataka") for year in (2018, 2019) for quarter in (1, 2, 3, 4)
+                for category in ("Recharge", "Merchant payments")]
+        conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    rollups.build_rollups(conn)
+    return conn
+
+
+# -------------------------------
+# Routing decisions
+# -------------------------------
+@pytest.mark.parametrize("sql, grain", [
+    ("SELECT year, quarter, SUM(amount) AS a FROM aggregated_transaction GROUP BY year, quarter", "quarter"),
+    ("SELECT category, SUM(count) FROM aggregated_transaction WHERE year = :year GROUP BY category", "category_year"),
+    ("SELECT state, SUM(amount) FROM aggregated_transaction GROUP BY state ORDER BY 2 DESC LIMIT 5", "state_year"),
+    ("SELECT state, SUM(amount) FROM aggregated_transaction WHERE quarter = 2 GROUP BY state", "state_quarter"),
+    ("SELECT SUM(amount) FROM aggregated_transaction WHERE year = 2019", "quarter"),
+])
+def test_aggregations_route_to_smallest_grain(sql, grain):
+    assert rollups.route_query(sql, ROLLUPS) == sql.replace("aggregated_transaction", f"rollup_transaction_{grain}")
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM aggregated_transaction WHERE state = 'assam' LIMIT 3",
+    "SELECT t.* FROM aggregated_transaction t",
+    "SELECT state, year FROM aggregated_transaction",
+    "SELECT DISTINCT state FROM aggregated_transaction",
+    "SELECT state, SUM(amount) OVER (PARTITION BY state) FROM aggregated_transaction",
+    "SELECT state, type, SUM(amount) FROM aggregated_transaction GROUP BY state, type",
+    "SELECT state, SUM(amount) / SUM(count) FROM aggregated_transaction GROUP BY state HAVING MAX(amount) > 1",
+    "SELECT state, COUNT(*) FROM aggregated_transaction GROUP BY state",
+    "SELECT a.state, SUM(b.amount) FROM aggregated_user a JOIN aggregated_transaction b ON a.state = b.state "
+    "GROUP BY a.state",
+    "SELECT t.state, SUM(t.amount) AS a FROM aggregated_transaction t, aggregated_insurance i "
+    "WHERE t.state = i.state GROUP BY t.state",
+    "SELECT t.state, SUM(t.amount) FROM aggregated_transaction t CROSS JOIN aggregated_user u GROUP BY t.state",
+    "SELECT state FROM aggregated_transaction UNION SELECT state FROM aggregated_insurance GROUP BY state",
+    "WITH t AS (SELECT state, SUM(amount) AS a FROM aggregated_transaction GROUP BY state) "
+    "SELECT t.state, a FROM t WHERE t.state IN (SELECT state FROM aggregated_transaction WHERE year = 2019)",
+])
+def test_row_selects_and_unsafe_aggregations_stay_on_the_fact_table(sql):
+    assert not routed(sql)
+
+def test_every_fact_table_reference_is_checked():
+    sql = ("SELECT state, SUM(amount) FROM aggregated_transaction "
+           "WHERE year = (SELECT MAX(year) FROM aggregated_transaction) GROUP BY state")
+    assert rollups.route_query(sql, ROLLUPS) == sql.replace("aggregated_transaction", "rollup_transaction_state_year")
+
+def test_missing_rollup_falls_through_to_a_larger_grain():
+    sql = "SELECT year, SUM(amount) FROM aggregated_insurance GROUP BY year"
+    available = ROLLUPS - {"rollup_insurance_quarter"}
+    assert rollups.route_query(sql, available) == sql.replace("aggregated_insurance", "rollup_insurance_category_year")
+    assert rollups.route_query(sql, set()) == sql
+
+
+# -------------------------------
+# Routed results match the fact table
+# -------------------------------
+@pytest.mark.parametrize("sql", [
+    "SELECT year, quarter, SUM(amount) AS a, SUM(count) AS c FROM aggregated_transaction "
+    "GROUP BY year, quarter ORDER BY year, quarter",
+    "SELECT category, year, SUM(amount) AS a FROM aggregated_insurance GROUP BY category, year ORDER BY 1, 2",
+    "SELECT state, SUM(amount) AS a FROM aggregated_transaction WHERE year = 2019 AND quarter = 3 "
+    "GROUP BY state ORDER BY state",
+    "SELECT SUM(amount) AS a FROM aggregated_transaction WHERE state = 'assam'",
+    "SELECT * FROM aggregated_transaction WHERE state = 'assam' ORDER BY year, quarter, category",
+    "SELECT state, year FROM aggregated_transaction ORDER BY state, year",
+])
+def test_routed_results_match(conn, sql):
+    available = rollups.available_rollups(conn)
+    expected = pd.read_sql_query(sql, conn)
+    pd.testing.assert_frame_equal(pd.read_sql_query(rollups.route_query(sql, available), conn), expected)
+
+
+# -------------------------------
+# Refresh
+# -------------------------------
+def _snapshot(conn):
+    return {name: conn.execute(f"SELECT * FROM {name} ORDER BY 1, 2, 3").fetchall()
+            for name in sorted(rollups.available_rollups(conn))}
+
+def test_refresh_without_changes_is_a_no_op(conn):
+    before = _snapshot(conn)
+    rollups.refresh_rollups(conn, {})
+    rollups.refresh_rollups(conn, {"aggregated_transaction": set()})
+    assert _snapshot(conn) == before
+
+def test_refresh_patches_only_changed_keys(conn):
+    conn.execute("UPDATE aggregated_transaction SET amount = amount * 2 WHERE state = 'assam' AND year = 2019 "
+                 "AND quarter = 2")
+    conn.execute("DELETE FROM aggregated_transaction WHERE state = 'karnataka' AND year = 2018 AND quarter = 4")
+    rollups.refresh_rollups(conn, {"aggregated_transaction": {("assam", 2019, 2), ("karnataka", 2018, 4)}})
+    refreshed = _snapshot(conn)
+    rollups.build_rollups(conn)
+    assert refreshed == _snapshot(conn)
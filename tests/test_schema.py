@@ -0,0 +1,28 @@
+import sqlite3
+import pandas as pd
+import pytest
+import schema
+
+
+@pytest.mark.parametrize("table, dims, where", [
+    ("map_transaction", ("state",), ""),
+    ("map_user", ("district", "state", "year", "quarter"), ""),
+    ("aggregated_user", ("brand", "year"), "WHERE brand != 'TOTAL'"),
+    ("top_transaction", ("entityName", "year"), "WHERE level = 'districts'"),
+])
+def test_grouped_sql_matches_grouping_the_view(pulse_db, table, dims, where):
+    conn = sqlite3.connect(pulse_db)
+    measure = schema.column_names(table)[-1]
+    expected = pd.read_sql_query(f"SELECT {', '.join(dims)}, SUM({measure}) AS total FROM {table} {where} "
+                                 f"GROUP BY {', '.join(dims)} ORDER BY {', '.join(dims)}", conn)
+    got = pd.read_sql_query(schema.grouped_sql(table, dims, {"total": f"SUM({measure})"}, where), conn)
+    got = got.sort_values(list(dims)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected)
+
+def test_encoded_aggregates_group_on_ids(pulse_db):
+    conn = sqlite3.connect(pulse_db)
+    sql = schema.grouped_sql("map_transaction", ("state",), {"total": "SUM(amount)"})
+    assert "GROUP BY state_id" in sql
+    # no per-row join of dim_state inside the aggregate
+    plan = [d for *_, d in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    assert not any("USE TEMP B-TREE FOR GROUP BY" in d for d in plan)
@@ -0,0 +1,161 @@
+"""
+Top-k over pre-aggregated totals
+--------------------------------
+Each source is loaded once per DB generation as a small cube: its totals grouped
+by every filterable dimension (state, category / brand / district, year,
+quarter), held as integer-coded NumPy arrays. A top-k query
+  1. masks the cube rows by any filter combination,
+  2. sums the measure per value of the ranked dimension (np.bincount),
+  3. picks the k largest with np.argpartition and sorts only those k,
+so the dashboard's "top N by X" bars never go back to the fact tables. The
+per-dimension aggregate arrays are kept per (dimension, measure, filters).
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+import rollups
+import result_cache
+
+MAX_AGGREGATES = 512    # per-filter aggregate arrays kept per source
+
+# source -> (table, dimensions, measures, filter)
+SOURCES = {
+    "transaction": ("aggregated_transaction", ("state", "category", "year", "quarter"), ("count", "amount"), ""),
+    "insurance": ("aggregated_insurance", ("state", "year", "quarter"), ("count", "amount"), ""),
+    "users": ("aggregated_user", ("brand", "state", "year", "quarter"), ("count", "percentage"), ""),
+    "district_transaction": ("map_transaction", ("district", "state", "year", "quarter"), ("count", "amount"), ""),
+    "district_users": ("map_user", ("district", "state", "year", "quarter"), ("registeredUsers", "appOpens"), ""),
+    "top_districts": ("top_transaction", ("entityName", "state", "year", "quarter"), ("count", "amount"),
+                      "WHERE level = 'districts'"),
+    "top_pincodes": ("top_transaction", ("entityName", "state", "year", "quarter"), ("count", "amount"),
+                     "WHERE level = 'pincodes'"),
+}
+
+
+def top_indices(values, k=None):
+    """Indices of the k largest values, largest first: O(n) partial selection, then a sort of just k."""
+    order = lambda idx: idx[np.argsort(-values[idx], kind="stable")]
+    if k is None or k >= len(values):
+        return order(np.arange(len(values)))
+    return order(np.argpartition(-values, k - 1)[:k])
+
+
+class Cube:
+    """One source's totals per dimension combination, dictionary-coded for masking and bincount."""
+
+    def __init__(self, conn, source):
+        table, dims, measures, where = SOURCES[source]
+        sql = rollups.grouped_query(table, dims, {m: f"SUM({m})" for m in measures}, where,
+                                    rollups.available_rollups(conn))
+        df = pd.read_sql_query(sql, conn)
+        self.codes, self.values = {}, {}
+        for dim in dims:
+            self.codes[dim], self.values[dim] = pd.factorize(df[dim], use_na_sentinel=False)
+        # integer measures come back as ints; keep float64 for bincount weights, remember the kind
+        self.measures = {m: df[m].to_numpy(dtype=float) for m in measures}
+        self.integer = {m: df[m].dtype.kind in "iu" for m in measures}
+        self.aggregates = {}
+        self._lock = threading.Lock()
+
+    def latest(self, dim="year"):
+        return max(self.values[dim]) if len(self.values[dim]) else None
+
+    def _mask(self, filters, exclude):
+        mask = np.ones(len(next(iter(self.measures.values()))), dtype=bool)
+        for dim, wanted in filters.items():
+            if wanted == "latest":
+                wanted = self.latest(dim)
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            codes = [i for i, v in enumerate(self.values[dim]) if v in wanted]
+            mask &= np.isin(self.codes[dim], codes)
+        for dim, unwanted in exclude.items():
+            unwanted = unwanted if isinstance(unwanted, (list, tuple, set)) else [unwanted]
+            mask &= ~np.isin(self.codes[dim], [i for i, v in enumerate(self.values[dim]) if v in unwanted])
+        return mask
+
+    def aggregate(self, by, measure, filters=None, exclude=None):
+        """(totals, present) arrays indexed by the codes of `by`; present marks values that had rows."""
+        filters, exclude = filters or {}, exclude or {}
+        freeze = lambda d: tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple, set)) else v)
+                                        for k, v in d.items()))
+        key = (by, measure, freeze(filters), freeze(exclude))
+        with self._lock:
+            cached = self.aggregates.get(key)
+        if cached is not None:
+            return cached
+        mask = self._mask(filters, exclude)
+        codes, n = self.codes[by][mask], len(self.values[by])
+        result = (np.bincount(codes, weights=self.measures[measure][mask], minlength=n),
+                  np.bincount(codes, minlength=n) > 0)
+        with self._lock:
+            if len(self.aggregates) >= MAX_AGGREGATES:
+                self.aggregates.clear()
+            self.aggregates[key] = result
+        return result
+
+    def topk(self, by, measure, k=None, filters=None, exclude=None):
+        """DataFrame [by, measure] of the k values of `by` with the largest summed measure."""
+        totals, present = self.aggregate(by, measure, filters, exclude)
+        candidates = np.flatnonzero(present)
+        idx = candidates[top_indices(totals[candidates], k)]
+        values = totals[idx].round().astype(np.int64) if self.integer[measure] else totals[idx]
+        return pd.DataFrame({by: self.values[by][idx], measure: values})
+
+
+class TopKEngine:
+    """
+    Cubes per source, built on first use and dropped when the DB generation changes
+    (a build token unique to each ingest and DB file, so another DB never sees these cubes).
+    """
+
+    def __init__(self):
+        self.generation = None
+        self.cubes = {}
+        self._lock = threading.Lock()
+
+    def cube(self, conn, source):
+        generation = result_cache.get_generation(conn)
+        with self._lock:
+            if generation != self.generation:
+                self.cubes = {}
+                self.generation = generation
+            cube = self.cubes.get(source)
+        if cube is None:
+            cube = Cube(conn, source)
+            with self._lock:
+                if generation == self.generation:
+                    self.cubes[source] = cube
+        return cube
+
+    def topk(self, conn, source, by, measure, k=None, filters=None, exclude=None):
+        return self.cube(conn, source).topk(by, measure, k, filters, exclude)
+
+    def reset(self):
+        """Forget every cube (the next query rebuilds from the DB, e.g. for cold benchmark runs)."""
+        with self._lock:
+            self.generation = None
+            self.cubes = {}
+
+    def stats(self):
+        with self._lock:
+            return {"generation": self.generation,
+                    "cubes": {s: len(c.aggregates) for s, c in self.cubes.items()}}
+
+ENGINE = TopKEngine()
+
+
+def top_frame(conn, source, by, measure, name=None, limit=None, exclude=None, year_column=False, engine=None,
+              **filters):
+    """
+    Registry-facing shape: [by, (year,) name] for the top `limit` values of `by`.
+    filters are any of the source's dimensions (value, list of values, or year="latest");
+    year_column=True adds the resolved year, as the "latest year" case queries return it.
+    """
+    filters = {dim: value for dim, value in filters.items() if value is not None}
+    cube = (engine or ENGINE).cube(conn, source)
+    df = cube.topk(by, measure, limit, filters, exclude).rename(columns={measure: name or measure})
+    if year_column:
+        year = cube.latest() if filters.get("year", "latest") == "latest" else filters["year"]
+        df.insert(1, "year", year)
+    return df
@@ -1,24 +1,60 @@
 import sqlite3
 import pandas as pd
+import rollups
+import db_pool
+import queries
+import query_stats
 
 # ✅ Database location
 DB_PATH = "/content/project_files/phonepe_pulse.db"
 
-def connect_db():
-    """Create and return a connection to the SQLite database."""
+def connect_db(read_only=False):
+    """
+    Create and return a connection to the SQLite database.
+    read_only=True returns this thread's pooled, tuned read-only connection instead.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_pool.get_pool(DB_PATH).connection() if read_only else sqlite3.connect(DB_PATH)
         print("✅ Database connected successfully!")
         return conn
     except Exception as e:
         print("❌ Database connection failed:", e)
         return None
 
-def run_query(conn, query):
-    """Run a SQL query and return results as a pandas DataFrame."""
+def run_query(conn, query, route=True, params=None):
+    """
+    Run a SQL query and return results as a pandas DataFrame.
+    query may be a name from the queries registry ("case1.Q1"); params then override its defaults.
+    Every call is recorded in query_stats.STATS; slow ones also go to the slow-query log.
+    With route=True, fact-table aggregations are answered from the smallest rollup table.
+    """
+    name, compute = query, None
     try:
-        df = pd.read_sql_query(query, conn)
-        return df
+        if query in queries.QUERIES:
+            compute = queries.get(query).compute
+            query, params = queries.bind(query, params)
+        name = query_stats.label(name, query)
+
+        def execute():
+            if compute:
+                return compute(conn, **params)
+            sql = rollups.route_query(query, rollups.available_rollups(conn)) if route else query
+            return pd.read_sql_query(sql, conn, params=params)
+
+        # timed, sized and (when slow or failing) logged with its query plan
+        return query_stats.timed(conn, name, query, params, execute)
     except Exception as e:
         print("⚠️ Query execution error:", e)
         return pd.DataFrame()
+
+def normalize_state_names(df, column="state"):
+    """Pulse state slugs -> the ST_NM names used by the India GeoJSON."""
+    df[column] = df[column].str.replace("-", " ").str.title()
+    mapping = {
+        "Andaman & Nicobar Islands": "Andaman & Nicobar",
+        "Nct Of Delhi": "Delhi",
+        "Jammu & Kashmir": "Jammu And Kashmir",
+        "Dadra & Nagar Havelli & Daman & Diu": "Dadra And Nagar Haveli And Daman And Diu"
+    }
+    df[column] = df[column].replace(mapping)
+    return df